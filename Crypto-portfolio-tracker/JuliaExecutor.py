@@ -1,57 +1,87 @@
 import subprocess
+import argparse
 import json
 import os
+import queue
+import socket
+import socketserver
+import sys
 import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future
+
+# Packages the ML scripts use; pool workers load them once at startup
+ML_PACKAGES = ["CSV", "DataFrames", "MLJ", "MLJLinearModels", "Statistics"]
+
+# Unix socket of the long-lived executor daemon (one per user)
+DAEMON_SOCKET = os.environ.get(
+    "JULIA_DAEMON_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"crypto-tracker-julia-{os.getuid()}.sock"))
+DAEMON_IDLE_TIMEOUT = 30 * 60
 
 class SimpleJuliaExecutor:
     """Simplified Julia executor for .jl files"""
-    
-    def __init__(self):
+
+    def __init__(self, preload=(), startup_timeout=120, verbose=True):
         self.julia_process = None
         self.julia_script_path = None
         self.is_running = False
+        self.preload = list(preload)
+        self.startup_timeout = startup_timeout
+        self.verbose = verbose
+        self.lines = None
+        self.stderr_tail = deque(maxlen=50)
         self.start_julia_process()
-    
+
     def create_julia_script(self):
         """Create Julia communication script"""
         julia_script = '''
 using JSON
 
-function execute_julia_file(file_path)
+# Packages named on the command line are loaded once, before accepting jobs
+for pkg in ARGS
+    Core.eval(Main, Meta.parse("using " * pkg))
+end
+
+function execute_julia_file(file_path, env)
+    previous_env = Dict(k => get(ENV, k, nothing) for k in keys(env))
+    output_path, output_io = mktemp()
     try
         if !isfile(file_path)
             return Dict("success" => false, "error" => "File not found: " * file_path)
         end
-        
-        # Capture both stdout and the result
-        old_stdout = stdout
-        (rd, wr) = redirect_stdout()
-        
-        # Execute the file
-        result = include(file_path)
-        
-        # Restore stdout and get output
-        redirect_stdout(old_stdout)
-        close(wr)
-        output = read(rd, String)
-        close(rd)
-        
+        for (k, v) in env
+            ENV[k] = string(v)
+        end
+
+        # Capture stdout in a temp file (a pipe would block once its buffer fills)
+        result = redirect_stdout(output_io) do
+            Base.include(Main, file_path)
+        end
+        close(output_io)
+
         return Dict(
             "success" => true,
-            "output" => output,
+            "output" => read(output_path, String),
             "result" => isnothing(result) ? "Script completed successfully" : string(result),
             "file" => basename(file_path)
         )
-        
+
     catch e
-        # Restore stdout if needed
-        try
-            redirect_stdout(old_stdout)
-        catch
+        close(output_io)
+        return Dict("success" => false, "error" => string(e), "output" => read(output_path, String),
+                    "file" => basename(file_path))
+    finally
+        for (k, v) in previous_env
+            if isnothing(v)
+                delete!(ENV, k)
+            else
+                ENV[k] = v
+            end
         end
-        
-        return Dict("success" => false, "error" => string(e), "file" => basename(file_path))
+        rm(output_path, force=true)
     end
 end
 
@@ -61,19 +91,20 @@ flush(stdout)
 while true
     try
         line = readline()
-        
+
         if line == "EXIT" || line == ""
             break
         end
-        
-        # Execute the file specified in the line
-        result = execute_julia_file(strip(line))
-        
+
+        # A job is either a bare file path or {"file": ..., "env": {...}}
+        job = startswith(line, "{") ? JSON.parse(line) : Dict("file" => strip(line))
+        result = execute_julia_file(job["file"], get(job, "env", Dict()))
+
         println("RESULT_START")
         println(JSON.json(result))
         println("RESULT_END")
         flush(stdout)
-        
+
     catch e
         println("RESULT_START")
         error_result = Dict("success" => false, "error" => "Communication error: " * string(e))
@@ -83,7 +114,7 @@ while true
     end
 end
 '''
-        
+
         fd, path = tempfile.mkstemp(suffix='.jl', text=True)
         try:
             with os.fdopen(fd, 'w') as f:
@@ -92,65 +123,108 @@ end
         except:
             os.close(fd)
             raise
-    
+
+    def _pump(self, stream, sink):
+        """Reader thread: move lines from a pipe into a queue/deque so reads never block the caller"""
+        for line in iter(stream.readline, ""):
+            sink(line)
+        sink(None)
+
+    def _next_line(self, deadline):
+        """Next stdout line, None at EOF, or raise TimeoutError once the deadline passes"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError
+        try:
+            return self.lines.get(timeout=remaining)
+        except queue.Empty:
+            raise TimeoutError
+
     def start_julia_process(self):
         """Start Julia process"""
         try:
-            self.julia_script_path = self.create_julia_script()
-            
+            if self.julia_script_path is None:
+                self.julia_script_path = self.create_julia_script()
+
             self.julia_process = subprocess.Popen([
-                'julia', '--startup-file=no', self.julia_script_path
-            ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, text=True, bufsize=0)
-            
+                'julia', '--startup-file=no', self.julia_script_path, *self.preload
+            ], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, text=True, bufsize=1)
+
+            self.lines = queue.Queue()
+            self.stderr_tail.clear()
+            keep_stderr = lambda line, tail=self.stderr_tail: line is not None and tail.append(line)
+            threading.Thread(target=self._pump, args=(self.julia_process.stdout, self.lines.put),
+                             daemon=True).start()
+            threading.Thread(target=self._pump, args=(self.julia_process.stderr, keep_stderr),
+                             daemon=True).start()
+
             # Wait for ready signal
-            start_time = time.time()
-            while time.time() - start_time < 20:
-                line = self.julia_process.stdout.readline()
+            deadline = time.monotonic() + self.startup_timeout
+            while True:
+                line = self._next_line(deadline)
+                if line is None:
+                    break
                 if line.strip() == "JULIA_READY":
                     self.is_running = True
-                    print("✓ Julia ready for ML tasks")
+                    if self.verbose:
+                        print("✓ Julia ready for ML tasks")
                     return True
-                elif line == "":
-                    break
-            
+
             print("✗ Julia failed to start")
             self.cleanup()
             return False
-            
+
+        except TimeoutError:
+            print(f"✗ Julia did not start within {self.startup_timeout}s")
+            self.cleanup()
+            return False
         except Exception as e:
             print(f"✗ Failed to start Julia: {e}")
             self.cleanup()
             return False
-    
-    def execute_file(self, file_path, timeout=60):
-        """Execute Julia file"""
-        if not self.is_running:
+
+    def restart(self):
+        """Kill the current process (if any) and start a fresh one"""
+        self.kill()
+        return self.start_julia_process()
+
+    def execute_file(self, file_path, timeout=60, env=None):
+        """Execute Julia file; `env` is applied to ENV for the duration of the job"""
+        if not self.is_running or self.julia_process.poll() is not None:
+            self.is_running = False
             return {"success": False, "error": "Julia not running"}
-        
+
         try:
-            # Send file path
-            self.julia_process.stdin.write(os.path.abspath(file_path) + "\n")
+            # Send the job
+            job = {"file": os.path.abspath(file_path), "env": env or {}}
+            self.julia_process.stdin.write(json.dumps(job) + "\n")
             self.julia_process.stdin.flush()
-            
+
             # Read result
             return self._read_result(timeout)
-            
+
         except Exception as e:
             return {"success": False, "error": f"Execution error: {e}"}
-    
+
     def _read_result(self, timeout):
-        """Read execution result"""
-        start_time = time.time()
+        """Read execution result, enforcing a hard deadline.
+
+        A hung job is killed: the process state is unknown afterwards, so the
+        caller has to restart() before reusing this executor.
+        """
+        deadline = time.monotonic() + timeout
         result_started = False
         result_lines = []
-        
-        while time.time() - start_time < timeout:
-            try:
-                line = self.julia_process.stdout.readline()
-                if line == "":
-                    break
-                
+
+        try:
+            while True:
+                line = self._next_line(deadline)
+                if line is None:
+                    self.is_running = False
+                    stderr = "".join(self.stderr_tail).strip()
+                    return {"success": False, "error": f"Julia process exited. {stderr}".strip()}
+
                 line = line.strip()
                 if line == "RESULT_START":
                     result_started = True
@@ -160,14 +234,20 @@ end
                             return json.loads("\n".join(result_lines))
                         except:
                             return {"success": False, "error": "JSON parsing error"}
-                    break
+                    return {"success": False, "error": "Empty result"}
                 elif result_started:
                     result_lines.append(line)
-            except:
-                break
-        
-        return {"success": False, "error": "Execution timeout"}
-    
+        except TimeoutError:
+            self.kill()
+            return {"success": False, "error": "Execution timeout", "timeout": True}
+
+    def kill(self):
+        """Terminate the process immediately"""
+        self.is_running = False
+        if self.julia_process and self.julia_process.poll() is None:
+            self.julia_process.kill()
+            self.julia_process.wait()
+
     def cleanup(self):
         """Clean up"""
         self.is_running = False
@@ -177,10 +257,230 @@ end
                 self.julia_process.stdin.flush()
                 self.julia_process.wait(timeout=3)
             except:
-                self.julia_process.terminate()
-        
+                self.julia_process.kill()
+
         if self.julia_script_path and os.path.exists(self.julia_script_path):
             try:
                 os.unlink(self.julia_script_path)
             except:
                 pass
+        self.julia_script_path = None
+
+
+class JuliaWorkerPool:
+    """N warm Julia processes serving a shared job queue.
+
+    Each worker preloads the ML packages once. Jobs carry a hard deadline;
+    a worker whose job times out or whose process dies is restarted before
+    it takes the next job. submit() returns a concurrent.futures.Future.
+    """
+
+    def __init__(self, size=None, preload=ML_PACKAGES, startup_timeout=300):
+        self.size = size or max(1, min(4, os.cpu_count() or 1))
+        self.jobs = queue.Queue()
+        self.workers = []
+        self.threads = []
+        started = []
+
+        # Julia startup dominates, so bring the workers up in parallel
+        def start(index):
+            started.append((index, SimpleJuliaExecutor(preload, startup_timeout, verbose=False)))
+
+        launchers = [threading.Thread(target=start, args=(i,)) for i in range(self.size)]
+        for thread in launchers:
+            thread.start()
+        for thread in launchers:
+            thread.join()
+        self.workers = [worker for _, worker in sorted(started, key=lambda item: item[0])]
+
+        for worker in self.workers:
+            thread = threading.Thread(target=self._serve, args=(worker,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"✓ Julia worker pool ready ({sum(w.is_running for w in self.workers)}/{self.size} workers)")
+
+    @property
+    def is_running(self):
+        return any(worker.is_running for worker in self.workers)
+
+    def submit(self, file_path, timeout=600, env=None):
+        future = Future()
+        self.jobs.put((future, file_path, timeout, env))
+        return future
+
+    def run_all(self, jobs, timeout=600):
+        """Run (file_path, env) jobs concurrently and return their results in order"""
+        futures = [self.submit(file_path, timeout, env) for file_path, env in jobs]
+        return [future.result() for future in futures]
+
+    def _serve(self, worker):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                return
+            future, file_path, timeout, env = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if not worker.is_running:
+                worker.restart()
+            result = worker.execute_file(file_path, timeout=timeout, env=env)
+            if not worker.is_running:
+                # Crashed or killed after a timeout: bring up a replacement now, not on the next job
+                worker.restart()
+            future.set_result(result)
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+        for worker in self.workers:
+            worker.cleanup()
+
+    close = shutdown
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out"""
+
+    def handle(self):
+        server = self.server
+        server.last_used = time.monotonic()
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request.get("op")
+            if op == "ping":
+                response = {"ok": True, "workers": server.pool.size, "pid": os.getpid()}
+            elif op == "run":
+                jobs = [(file_path, env) for file_path, env in request["jobs"]]
+                response = {"ok": True, "results": server.pool.run_all(jobs, request.get("timeout", 600))}
+            elif op == "shutdown":
+                response = {"ok": True}
+                threading.Thread(target=server.shutdown, daemon=True).start()
+            else:
+                response = {"ok": False, "error": f"Unknown op: {op}"}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        server.last_used = time.monotonic()
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class JuliaDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve a JuliaWorkerPool on a unix socket so warm workers outlive each pipeline run.
+
+    Exits after idle_timeout seconds without requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=DAEMON_SOCKET, size=None, idle_timeout=DAEMON_IDLE_TIMEOUT):
+        self.pool = JuliaWorkerPool(size=size)
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _DaemonHandler)
+        os.chmod(socket_path, 0o600)
+
+    def service_actions(self):
+        if self.idle_timeout and time.monotonic() - self.last_used > self.idle_timeout:
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def serve(self):
+        try:
+            self.serve_forever(poll_interval=1.0)
+        finally:
+            self.server_close()
+            self.pool.shutdown()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class JuliaDaemonClient:
+    """Talk to a running JuliaDaemon; same run_all() interface as JuliaWorkerPool"""
+
+    def __init__(self, socket_path=DAEMON_SOCKET):
+        self.socket_path = socket_path
+
+    def _request(self, payload, timeout=None):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(payload) + "\n").encode())
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+        if not line:
+            raise ConnectionError("Julia daemon closed the connection")
+        return json.loads(line)
+
+    def ping(self):
+        try:
+            return self._request({"op": "ping"}, timeout=5).get("ok", False)
+        except (OSError, ValueError):
+            return False
+
+    def run_all(self, jobs, timeout=600):
+        jobs = [(os.path.abspath(file_path), env or {}) for file_path, env in jobs]
+        # Jobs queue behind each other on the pool, so allow for every one of them
+        response = self._request({"op": "run", "jobs": jobs, "timeout": timeout},
+                                 timeout=timeout * max(1, len(jobs)) + 30)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "Julia daemon request failed"))
+        return response["results"]
+
+    def shutdown(self):
+        return self._request({"op": "shutdown"}, timeout=10)
+
+    def close(self):
+        """Nothing to release: the daemon stays warm for the next run"""
+
+
+def connect_daemon(socket_path=DAEMON_SOCKET, spawn=True, startup_timeout=600):
+    """Return a client for a live daemon, starting one in the background if needed (or None)"""
+    client = JuliaDaemonClient(socket_path)
+    if client.ping():
+        return client
+    if not spawn:
+        return None
+    log_path = os.path.join(tempfile.gettempdir(), f"crypto-tracker-julia-{os.getuid()}.log")
+    with open(log_path, "a") as log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--socket", socket_path],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                         start_new_session=True)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if client.ping():
+            return client
+        time.sleep(0.5)
+    print(f"✗ Julia daemon did not come up; see {log_path}")
+    return None
+
+
+def main(argv=None):
+    """Manage the Julia executor daemon"""
+    parser = argparse.ArgumentParser(description="Persistent Julia executor daemon")
+    parser.add_argument("command", choices=["serve", "start", "stop", "status"])
+    parser.add_argument("--socket", default=DAEMON_SOCKET)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--idle-timeout", type=int, default=DAEMON_IDLE_TIMEOUT,
+                        help="seconds without requests before the daemon exits (0 = never)")
+    args = parser.parse_args(argv)
+
+    client = JuliaDaemonClient(args.socket)
+    if args.command == "serve":
+        JuliaDaemon(args.socket, args.workers, args.idle_timeout).serve()
+    elif args.command == "start":
+        print("✓ Julia daemon running" if connect_daemon(args.socket) else "✗ Julia daemon failed to start")
+    elif args.command == "stop":
+        if client.ping():
+            client.shutdown()
+            print("✓ Julia daemon stopped")
+        else:
+            print("Julia daemon is not running")
+    else:
+        print(f"✓ Julia daemon running on {args.socket}" if client.ping() else "Julia daemon is not running")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,28 @@
 # CoinGecko API Configuration
 
-# Mapping of coin symbols to CoinGecko IDs
-COINS = {
-    "BTC": "bitcoin",
-    "ETH": "ethereum",
-    "SOL": "solana",
-    "XRP": "ripple"
-}
+from coin_registry import coingecko_ids
+
+# Mapping of coin symbols to CoinGecko IDs, from the coin registry (coins.csv)
+COINS = coingecko_ids()
 
 # CoinGecko API base URL
 BASE_URL = "https://api.coingecko.com/api/v3"
 
 # Number of days of historical data to fetch
 DAYS = 180
+
+# Fetch engine settings (free tier allows roughly 10-50 calls/minute)
+RATE_LIMIT_PER_MINUTE = 30
+MAX_CONCURRENT_REQUESTS = 4
+MAX_RETRIES = 3
+
+# Response cache: TTL in seconds per endpoint fragment, total size cap
+CACHE_PATH = "data/http_cache.sqlite"
+CACHE_TTLS = {
+    "/market_chart": 60 * 60,
+    "/simple/price": 60,
+}
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Spot prices: /simple/price takes a comma-separated id list; request URLs are kept within this length
+MAX_URL_LENGTH = 2000
@@ -0,0 +1,269 @@
+import json
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+import urllib.error
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+# Raw response handed back by a transport
+TransportResponse = namedtuple("TransportResponse", ["status", "headers", "body"])
+
+# Outcome of one logical request (after retries); latency is the final attempt, elapsed covers all attempts
+FetchResult = namedtuple("FetchResult", ["key", "data", "status", "latency", "elapsed", "attempts", "error"])
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Raised when a request fails with a non-retryable status or runs out of retries"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RequestsTransport:
+    """Transport backed by a shared requests.Session connection pool"""
+
+    def __init__(self, pool_size=10, timeout=30):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url, params=None, headers=None):
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        body = response.json() if response.content and response.ok else None
+        return TransportResponse(response.status_code, dict(response.headers), body)
+
+    def close(self):
+        self.session.close()
+
+
+class UrllibTransport:
+    """Dependency-free transport, handy against a local stub HTTP server"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def get(self, url, params=None, headers=None):
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                raw = response.read()
+                return TransportResponse(response.status, dict(response.headers),
+                                         json.loads(raw) if raw else None)
+        except urllib.error.HTTPError as e:
+            return TransportResponse(e.code, dict(e.headers or {}), None)
+
+    def close(self):
+        pass
+
+
+class CachingTransport:
+    """Wrap a transport with a ResponseCache.
+
+    Fresh entries are served without touching the network; stale ones are
+    revalidated with If-None-Match/If-Modified-Since. In offline mode only the
+    cache is consulted (falling back to the newest entry for the same endpoint)
+    and a miss raises FetchError instead of going to the network.
+    """
+
+    def __init__(self, inner, cache, offline=False):
+        self.inner = inner
+        self.cache = cache
+        self.offline = offline
+
+    def lookup(self, url, params=None):
+        """Serve a request from the cache alone, or return None if it needs the network"""
+        if self.offline:
+            entry = self.cache.get(url, params) or self.cache.latest_for(url)
+            if entry is None:
+                self.cache.count("misses")
+                raise FetchError(f"Offline and no cached response for {url}")
+            self.cache.count("hits")
+            return TransportResponse(200, {"X-Cache": "offline"}, entry["body"])
+
+        entry = self.cache.get(url, params)
+        if entry and entry["fresh"]:
+            self.cache.count("hits")
+            return TransportResponse(200, {"X-Cache": "hit"}, entry["body"])
+        return None
+
+    def get(self, url, params=None, headers=None):
+        cached = self.lookup(url, params)
+        if cached is not None:
+            return cached
+
+        entry = self.cache.get(url, params)
+        conditional = dict(headers or {})
+        if entry and entry["etag"]:
+            conditional["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            conditional["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.inner.get(url, params=params, headers=conditional or None)
+        if response.status == 304 and entry:
+            self.cache.count("revalidated")
+            self.cache.touch(url, params)
+            return TransportResponse(200, {"X-Cache": "revalidated"}, entry["body"])
+
+        self.cache.count("misses")
+        if 200 <= response.status < 300 and response.body is not None:
+            self.cache.put(url, params, response.body, response.headers)
+        return response
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+        self.cache.close()
+
+
+class FetchEngine:
+    """Run GET requests concurrently under a shared token-bucket rate limit.
+
+    Failed attempts (connection errors, 429 and 5xx) are retried with
+    exponential backoff and full jitter; a Retry-After header wins when present.
+    """
+
+    def __init__(self, transport=None, rate_per_minute=30, burst=1, max_workers=4,
+                 max_retries=3, backoff_base=1.0, backoff_max=30.0):
+        self.transport = transport or RequestsTransport(pool_size=max_workers)
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.latencies = []
+        self._latency_lock = threading.Lock()
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def fetch(self, key, url, params=None, headers=None):
+        """Fetch one URL with rate limiting and retries; never raises, errors go in the result"""
+        started = time.perf_counter()
+        started_wall = time.time()
+        latency = 0.0
+        status = None
+        error = None
+
+        # Answers the transport can give from a local cache skip the rate limiter
+        lookup = getattr(self.transport, "lookup", None)
+        if lookup is not None:
+            try:
+                cached = lookup(url, params)
+            except FetchError as e:
+                return FetchResult(key, None, None, 0.0, time.perf_counter() - started, 0, e)
+            if cached is not None:
+                tracing.record(f"cache {key}", started_wall, time.perf_counter() - started, "fetch",
+                               url=url, cache=cached.headers.get("X-Cache"))
+                return FetchResult(key, cached.body, cached.status, 0.0,
+                                   time.perf_counter() - started, 0, None)
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            attempt_start = time.perf_counter()
+            attempt_wall = time.time()
+            retry_after = None
+            try:
+                response = self.transport.get(url, params=params, headers=headers)
+                latency = time.perf_counter() - attempt_start
+                status = response.status
+                if 200 <= status < 300:
+                    self._record(latency)
+                    self._trace(key, url, attempt_wall, latency, attempt, status,
+                                cache=response.headers.get("X-Cache"))
+                    return FetchResult(key, response.body, status, latency,
+                                       time.perf_counter() - started, attempt + 1, None)
+                error = FetchError(f"HTTP {status} for {url}", status)
+                if status not in RETRYABLE_STATUS:
+                    break
+                retry_after = response.headers.get("Retry-After")
+            except FetchError as e:
+                latency = time.perf_counter() - attempt_start
+                error = e
+                self._trace(key, url, attempt_wall, latency, attempt, None, error)
+                break
+            except Exception as e:
+                latency = time.perf_counter() - attempt_start
+                error = e
+            self._record(latency)
+            self._trace(key, url, attempt_wall, latency, attempt, status, error)
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+        return FetchResult(key, None, status, latency, time.perf_counter() - started,
+                           attempt + 1, error)
+
+    def fetch_many(self, jobs):
+        """Run (key, url, params) jobs concurrently; results come back in job order"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.fetch, key, url, params) for key, url, params in jobs]
+            return [future.result() for future in futures]
+
+    def _record(self, latency):
+        with self._latency_lock:
+            self.latencies.append(latency)
+
+    def _trace(self, key, url, start, latency, attempt, status, error=None, cache=None):
+        """One trace span per HTTP attempt (no-op unless tracing is on)"""
+        tracing.record(f"GET {key}", start, latency, "fetch", url=url, attempt=attempt + 1,
+                       status=status, error=None if error is None else str(error), cache=cache)
+
+    def latency_summary(self):
+        """Count, mean, p50, p95 and max of every attempt's latency in seconds"""
+        with self._latency_lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return {"count": 0}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples),
+            "p50": pick(0.50),
+            "p95": pick(0.95),
+            "max": samples[-1],
+        }
+
+    def close(self):
+        self.transport.close()
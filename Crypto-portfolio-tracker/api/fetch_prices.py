@@ -1,59 +1,305 @@
-import requests
 import time
 import csv
+import io
+import math
 import os
+import argparse
+import sys
+import tempfile
 from datetime import datetime
-from config import COINS, BASE_URL, DAYS
+from pathlib import Path
 
-def fetch_coin_history(coin_id, days):
-    """Fetch historical price data for a coin from CoinGecko API"""
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import tracing
+from api.config import (COINS, BASE_URL, DAYS, RATE_LIMIT_PER_MINUTE, MAX_CONCURRENT_REQUESTS, MAX_RETRIES,
+                        CACHE_PATH, CACHE_TTLS, CACHE_MAX_BYTES)
+from api.fetch_engine import FetchEngine, RequestsTransport, CachingTransport
+from api.response_cache import ResponseCache
+from api.price_store import DAY_MS, PriceStore, is_daily_bar
+
+DATA_DIR = "data"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def coin_history_request(coin_id, days, interval=None):
+    """Build the market_chart endpoint and params for a coin"""
     endpoint = f"{BASE_URL}/coins/{coin_id}/market_chart"
     params = {
         "vs_currency": "usd",
         "days": days
     }
+    if interval:
+        params["interval"] = interval
+    return endpoint, params
+
+def fetch_coin_history(coin_id, days, interval=None):
+    """Fetch historical price data for a coin from CoinGecko API"""
+    import requests
+
+    endpoint, params = coin_history_request(coin_id, days, interval)
     response = requests.get(endpoint, params=params)
     response.raise_for_status()  # Raise exception for bad status codes
     return response.json()
 
-def save_to_csv(coin_symbol, prices_data):
-    """Save price data to CSV file"""
-    data_dir = "data"
-    os.makedirs(data_dir, exist_ok=True)
+def history_path(coin_symbol):
+    """Path of the history CSV for a coin"""
+    return os.path.join(DATA_DIR, f"{coin_symbol}_history.csv")
 
-    filename = os.path.join(data_dir, f"{coin_symbol}_history.csv")
+def format_rows(prices_data):
+    """Serialize [timestamp_ms, price] pairs into CSV text (no header)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Each item in prices is [timestamp_ms, price]
+    for timestamp_ms, price in prices_data:
+        # Convert timestamp from milliseconds to datetime
+        date = datetime.fromtimestamp(timestamp_ms / 1000).strftime(DATE_FORMAT)
+        writer.writerow([date, price])
+    return buffer.getvalue()
 
-    with open(filename, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["date", "price"])
+def save_to_csv(coin_symbol, prices_data):
+    """Save price data to CSV file, replacing any existing history atomically"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    filename = history_path(coin_symbol)
 
-        # Each item in prices is [timestamp_ms, price]
-        for timestamp_ms, price in prices_data:
-            # Convert timestamp from milliseconds to datetime
-            date = datetime.fromtimestamp(timestamp_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
-            writer.writerow([date, price])
+    # Write to a temp file in the same directory, then rename over the target
+    fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, suffix=".csv.tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write("date,price\r\n")
+            f.write(format_rows(prices_data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except (OSError, ValueError):
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
 
     return len(prices_data)
 
-def main():
-    """Fetch and save historical price data for all coins"""
-    for coin_symbol, coin_id in COINS.items():
+def _trim_partial_tail(filename):
+    """Drop a trailing line left half-written by an interrupted append"""
+    with open(filename, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                keep = pos + newline + 1
+                if keep != size:
+                    f.truncate(keep)
+                return keep
+        f.truncate(0)
+        return 0
+
+def _tail_rows(filename, count):
+    """(byte offset, timestamp_ms) of the last `count` rows, oldest first; the header is skipped.
+
+    Expects a file ending in a complete line (see _trim_partial_tail).
+    """
+    with open(filename, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0 and tail.count(b"\n") <= count:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+    lines = tail.split(b"\n")[:-1]
+    offset = pos
+    if pos > 0:
+        # The first line read may start before the chunk
+        offset += len(lines[0]) + 1
+        lines = lines[1:]
+    rows = []
+    for line in lines:
+        date = line.decode().strip().split(",", 1)[0]
         try:
-            print(f"Fetching {coin_symbol}...")
+            rows.append((offset, int(datetime.strptime(date, DATE_FORMAT).timestamp() * 1000)))
+        except ValueError:
+            pass  # header
+        offset += len(line) + 1
+    return rows[-count:]
+
+def read_last_timestamp(filename):
+    """Return the last stored timestamp in milliseconds, or None if there is none.
+
+    Only the tail of the file is read, so the cost does not grow with history length.
+    """
+    if not os.path.exists(filename) or _trim_partial_tail(filename) == 0:
+        return None
+    rows = _tail_rows(filename, 1)
+    return rows[-1][1] if rows else None
 
-            # Fetch data from CoinGecko
-            data = fetch_coin_history(coin_id, DAYS)
-            prices = data.get("prices", [])
+def append_to_csv(coin_symbol, prices_data, last_timestamp_ms):
+    """Append rows newer than last_timestamp_ms to the history CSV.
 
-            # Save to CSV
-            num_records = save_to_csv(coin_symbol, prices)
-            print(f"[OK] Saved {num_records} records to {coin_symbol}_history.csv")
+    Every response ends with the current price, off the daily grid. When the
+    stored history ends with such a point and newer data arrived, that point
+    is replaced instead of kept, so the history stays daily bars plus at most
+    one trailing current price.
 
-            # Delay to respect rate limits (2 seconds between requests)
-            time.sleep(2)
+    Stored dates have one-second resolution, so the overlap is compared in seconds.
+    All new rows go out in a single O_APPEND write followed by fsync.
+    """
+    filename = history_path(coin_symbol)
+    newest_second = max((int(ts) // 1000 for ts, _ in prices_data), default=None)
+    replace_at = None
+    if not is_daily_bar(last_timestamp_ms) and newest_second is not None \
+            and newest_second > last_timestamp_ms // 1000:
+        tail = _tail_rows(filename, 2)
+        if tail and tail[-1][1] == last_timestamp_ms:
+            replace_at = tail[-1][0]
+            last_timestamp_ms = tail[0][1] if len(tail) > 1 else None
+
+    new_rows = sorted(
+        (ts, price) for ts, price in prices_data
+        if last_timestamp_ms is None or int(ts) // 1000 > last_timestamp_ms // 1000
+    )
+    if not new_rows:
+        return 0
+
+    payload = format_rows(new_rows).encode()
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND)
+    try:
+        if replace_at is not None:
+            os.ftruncate(fd, replace_at)
+        os.write(fd, payload)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return len(new_rows)
+
+def plan_sync(coin_symbol, full=False):
+    """Decide what to request for a coin: returns (last_timestamp_ms, days, interval)"""
+    last_timestamp_ms = None if full else read_last_timestamp(history_path(coin_symbol))
+    if last_timestamp_ms is None:
+        return None, DAYS, None
+
+    # Only request the days missing since the last stored row (plus one for overlap).
+    # Daily interval keeps the granularity consistent with the full 180-day download.
+    missing_days = (time.time() * 1000 - last_timestamp_ms) / DAY_MS
+    days = max(1, min(DAYS, math.ceil(missing_days) + 1))
+    return last_timestamp_ms, days, "daily"
+
+def update_store(coin_symbol, prices_data, replace=False):
+    """Mirror fetched prices into the columnar price store.
+
+    Timestamps are cut to whole seconds to match the CSV; a store that does
+    not exist yet is seeded from the (already updated) history CSV.
+    """
+    store = PriceStore(DATA_DIR)
+    if not replace and not store.exists(coin_symbol):
+        return store.import_csv(coin_symbol, history_path(coin_symbol))
+    timestamps = [int(ts) // 1000 * 1000 for ts, _ in prices_data]
+    prices = [price for _, price in prices_data]
+    if replace:
+        return store.write(coin_symbol, timestamps, prices)
+    # Same as the CSV: the previous "now" point gives way to newer data
+    latest = store.latest(coin_symbol)
+    if latest and not is_daily_bar(latest[0]) and timestamps and max(timestamps) > latest[0]:
+        store.drop_last(coin_symbol)
+    return store.append(coin_symbol, timestamps, prices)
+
+def apply_sync(coin_symbol, prices_data, last_timestamp_ms):
+    """Write fetched prices: full rewrite when there was no history, append otherwise"""
+    if last_timestamp_ms is None:
+        written = save_to_csv(coin_symbol, prices_data)
+    else:
+        written = append_to_csv(coin_symbol, prices_data, last_timestamp_ms)
+    update_store(coin_symbol, prices_data, replace=last_timestamp_ms is None)
+    return written
+
+def sync_coin(coin_symbol, coin_id, full=False):
+    """Bring a coin's history CSV up to date; returns the number of rows written"""
+    last_timestamp_ms, days, interval = plan_sync(coin_symbol, full)
+    data = fetch_coin_history(coin_id, days, interval)
+    return apply_sync(coin_symbol, data.get("prices", []), last_timestamp_ms)
+
+def build_engine(use_cache=True, offline=False):
+    """FetchEngine configured from config.py, optionally behind the response cache"""
+    transport = None
+    if use_cache or offline:
+        cache = ResponseCache(CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttls=CACHE_TTLS)
+        inner = None if offline else RequestsTransport(pool_size=MAX_CONCURRENT_REQUESTS)
+        transport = CachingTransport(inner, cache, offline=offline)
+    return FetchEngine(transport=transport,
+                       rate_per_minute=RATE_LIMIT_PER_MINUTE,
+                       max_workers=MAX_CONCURRENT_REQUESTS,
+                       max_retries=MAX_RETRIES)
+
+def sync_all(coins, full=False, engine=None):
+    """Sync every coin concurrently through a rate-limited FetchEngine.
+
+    Returns a list of (coin_symbol, records_written, FetchResult); records_written is None on failure.
+    """
+    own_engine = engine is None
+    if own_engine:
+        engine = build_engine()
+    try:
+        plans = {symbol: plan_sync(symbol, full) for symbol in coins}
+        jobs = []
+        for symbol, coin_id in coins.items():
+            _, days, interval = plans[symbol]
+            endpoint, params = coin_history_request(coin_id, days, interval)
+            jobs.append((symbol, endpoint, params))
+
+        outcomes = []
+        for result in engine.fetch_many(jobs):
+            written = None
+            if result.error is None:
+                try:
+                    with tracing.span(f"write {result.key}", "fetch"):
+                        written = apply_sync(result.key, (result.data or {}).get("prices", []),
+                                             plans[result.key][0])
+                except Exception as e:
+                    result = result._replace(error=e)
+            outcomes.append((result.key, written, result))
+        return outcomes
+    finally:
+        if own_engine:
+            engine.close()
+
+def main(argv=None):
+    """Fetch and save historical price data for all coins"""
+    parser = argparse.ArgumentParser(description="Fetch price history from CoinGecko")
+    parser.add_argument("--full", action="store_true",
+                        help=f"re-download the full {DAYS}-day window instead of syncing incrementally")
+    parser.add_argument("--offline", action="store_true",
+                        default=os.environ.get("CRYPTO_TRACKER_OFFLINE") == "1",
+                        help="serve responses only from the local cache (or set CRYPTO_TRACKER_OFFLINE=1)")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--coins", nargs="+", choices=list(COINS), default=list(COINS),
+                        help="only sync these coins")
+    args = parser.parse_args(argv)
 
-        except Exception as e:
-            print(f"[ERROR] Error fetching {coin_symbol}: {str(e)}")
+    coins = {symbol: COINS[symbol] for symbol in args.coins}
+    failed = 0
+    engine = build_engine(use_cache=not args.no_cache, offline=args.offline)
+    try:
+        print(f"Fetching {', '.join(coins)}{' (offline)' if args.offline else ''}...")
+        for coin_symbol, num_records, result in sync_all(coins, full=args.full, engine=engine):
+            timing = f"{result.latency * 1000:.0f} ms, {result.attempts} attempt(s)"
+            if num_records is None:
+                failed += 1
+                print(f"[ERROR] Error fetching {coin_symbol}: {result.error} ({timing})")
+            else:
+                print(f"[OK] Saved {num_records} records to {coin_symbol}_history.csv ({timing})")
+        cache = getattr(engine.transport, "cache", None)
+        if cache is not None:
+            print("[OK] Cache: " + ", ".join(f"{name}={count}" for name, count in cache.stats.items()))
+    finally:
+        engine.close()
+    if failed:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,187 @@
+"""
+Columnar on-disk store for price series.
+
+Each coin is kept as two flat little-endian files under data/prices/:
+  {COIN}.ts  int64 epoch milliseconds, strictly increasing
+  {COIN}.px  float64 prices, one per timestamp
+
+Both files can be memory-mapped with NumPy and grow by appending, and the
+latest point is read with a single seek regardless of history length.
+The .ts file is written last, so its length is the committed row count.
+"""
+import argparse
+import csv
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+ROW_BYTES = 8
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def _to_bytes(values, typecode):
+    """Pack a sequence into little-endian bytes"""
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def is_daily_bar(timestamp_ms):
+    """Daily bars fall on UTC midnight; anything else is the intra-day "now" point of a response"""
+    return timestamp_ms % DAY_MS == 0
+
+
+class PriceStore:
+    """Reader/writer for the columnar price files of every coin"""
+
+    def __init__(self, data_dir="data"):
+        self.root = os.path.join(data_dir, "prices")
+
+    def paths(self, coin):
+        base = os.path.join(self.root, coin)
+        return base + ".ts", base + ".px"
+
+    def exists(self, coin):
+        return os.path.exists(self.paths(coin)[0])
+
+    def count(self, coin):
+        """Number of committed rows"""
+        ts_path, px_path = self.paths(coin)
+        if not os.path.exists(ts_path):
+            return 0
+        return min(os.path.getsize(ts_path), os.path.getsize(px_path)) // ROW_BYTES
+
+    def latest(self, coin):
+        """Return (timestamp_ms, price) of the newest row, or None; O(1)"""
+        n = self.count(coin)
+        if n == 0:
+            return None
+        ts_path, px_path = self.paths(coin)
+        offset = (n - 1) * ROW_BYTES
+        with open(ts_path, "rb") as f:
+            f.seek(offset)
+            (timestamp,) = struct.unpack("<q", f.read(ROW_BYTES))
+        with open(px_path, "rb") as f:
+            f.seek(offset)
+            (price,) = struct.unpack("<d", f.read(ROW_BYTES))
+        return timestamp, price
+
+    def latest_price(self, coin, default=0.0):
+        row = self.latest(coin)
+        return row[1] if row else default
+
+    def append(self, coin, timestamps, prices):
+        """Append rows newer than the last stored timestamp; returns rows written"""
+        os.makedirs(self.root, exist_ok=True)
+        ts_path, px_path = self.paths(coin)
+        n = self.count(coin)
+        self._truncate(ts_path, px_path, n)
+
+        last = self.latest(coin)
+        rows = sorted(zip((int(t) for t in timestamps), (float(p) for p in prices)))
+        new_rows = []
+        for timestamp, price in rows:
+            floor = new_rows[-1][0] if new_rows else (last[0] if last else None)
+            if floor is None or timestamp > floor:
+                new_rows.append((timestamp, price))
+        if not new_rows:
+            return 0
+
+        # Prices first, timestamps last: the .ts length is the commit marker
+        for path, column, typecode in ((px_path, 1, "d"), (ts_path, 0, "q")):
+            with open(path, "ab") as f:
+                f.write(_to_bytes([row[column] for row in new_rows], typecode))
+                f.flush()
+                os.fsync(f.fileno())
+        return len(new_rows)
+
+    def write(self, coin, timestamps, prices):
+        """Replace a coin's series"""
+        ts_path, px_path = self.paths(coin)
+        for path in (ts_path, px_path):
+            if os.path.exists(path):
+                os.unlink(path)
+        return self.append(coin, timestamps, prices)
+
+    def drop_last(self, coin):
+        """Remove the newest row"""
+        n = self.count(coin)
+        if n:
+            self._truncate(*self.paths(coin), n - 1)
+
+    def _truncate(self, ts_path, px_path, n):
+        """Drop any uncommitted tail left by an interrupted append"""
+        for path in (ts_path, px_path):
+            if os.path.exists(path) and os.path.getsize(path) != n * ROW_BYTES:
+                with open(path, "rb+") as f:
+                    f.truncate(n * ROW_BYTES)
+
+    def arrays(self, coin, mmap=True):
+        """Return (timestamps, prices) as NumPy arrays, memory-mapped read-only by default"""
+        import numpy as np
+
+        n = self.count(coin)
+        ts_path, px_path = self.paths(coin)
+        if n == 0:
+            return np.empty(0, dtype="<i8"), np.empty(0, dtype="<f8")
+        if mmap:
+            return (np.memmap(ts_path, dtype="<i8", mode="r", shape=(n,)),
+                    np.memmap(px_path, dtype="<f8", mode="r", shape=(n,)))
+        return (np.fromfile(ts_path, dtype="<i8", count=n),
+                np.fromfile(px_path, dtype="<f8", count=n))
+
+    def range(self, coin, start_ms=None, end_ms=None):
+        """Return (timestamps, prices) with start_ms <= timestamp < end_ms"""
+        import numpy as np
+
+        timestamps, prices = self.arrays(coin)
+        lo = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side="left"))
+        hi = len(timestamps) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side="left"))
+        return timestamps[lo:hi], prices[lo:hi]
+
+    def import_csv(self, coin, csv_path):
+        """Load a {coin}_history.csv (date,price) into the store, replacing the series"""
+        timestamps, prices = [], []
+        with open(csv_path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                date = datetime.strptime(row["date"], DATE_FORMAT)
+                timestamps.append(int(date.timestamp() * 1000))
+                prices.append(float(row["price"]))
+        return self.write(coin, timestamps, prices)
+
+    def export_csv(self, coin, csv_path):
+        """Write the series in the {coin}_history.csv layout"""
+        timestamps, prices = self.arrays(coin, mmap=False)
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["date", "price"])
+            for timestamp, price in zip(timestamps.tolist(), prices.tolist()):
+                writer.writerow([datetime.fromtimestamp(timestamp / 1000).strftime(DATE_FORMAT), price])
+        return len(timestamps)
+
+
+def main(argv=None):
+    """Convert between history CSVs and the columnar store"""
+    parser = argparse.ArgumentParser(description="Import/export the columnar price store")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("coins", nargs="+", help="coin symbols, e.g. BTC ETH")
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    store = PriceStore(args.data_dir)
+    for coin in args.coins:
+        csv_path = os.path.join(args.data_dir, f"{coin}_history.csv")
+        if args.action == "import":
+            count = store.import_csv(coin, csv_path)
+            print(f"[OK] Imported {count} rows of {coin} into the price store")
+        else:
+            count = store.export_csv(coin, csv_path)
+            print(f"[OK] Exported {count} rows of {coin} to {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
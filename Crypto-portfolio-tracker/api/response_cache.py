@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def cache_key(url, params=None):
+    """Stable key for an endpoint + query params"""
+    canonical = json.dumps([url, sorted((params or {}).items())], default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Persistent HTTP response cache in a single SQLite file.
+
+    Entries carry an expiry (per-endpoint TTL) plus the ETag/Last-Modified
+    validators needed for conditional revalidation. Total body size is capped
+    and the least recently used entries are evicted first.
+    """
+
+    def __init__(self, path="data/http_cache.sqlite", max_bytes=50 * 1024 * 1024,
+                 ttls=None, default_ttl=3600):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_url ON responses (url, stored_at)")
+        self.db.commit()
+
+    def ttl_for(self, url):
+        """TTL in seconds for the first configured endpoint fragment found in the URL"""
+        for fragment, ttl in self.ttls.items():
+            if fragment in url:
+                return ttl
+        return self.default_ttl
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def _row_to_entry(self, row):
+        if row is None:
+            return None
+        key, body, etag, last_modified, expires_at = row
+        self.db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return {"key": key, "body": json.loads(body), "etag": etag,
+                "last_modified": last_modified, "fresh": expires_at > time.time()}
+
+    def get(self, url, params=None):
+        """Return the cached entry (fresh or stale) for a request, or None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT key, body, etag, last_modified, expires_at FROM responses WHERE key = ?",
+                (cache_key(url, params),)).fetchone()
+            return self._row_to_entry(row)
+
+    def latest_for(self, url):
+        """Most recently stored entry for an endpoint, whatever its params"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT key, body, etag, last_modified, expires_at FROM responses "
+                "WHERE url = ? ORDER BY stored_at DESC LIMIT 1", (url,)).fetchone()
+            return self._row_to_entry(row)
+
+    def put(self, url, params, body, headers=None):
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        payload = json.dumps(body)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url, params), url, payload, headers.get("etag"),
+                 headers.get("last-modified"), now, now + self.ttl_for(url), now, len(payload)))
+            self.stats["stores"] += 1
+            self._evict()
+            self.db.commit()
+
+    def touch(self, url, params):
+        """Extend the expiry of an entry the server confirmed unchanged (304)"""
+        now = time.time()
+        with self.lock:
+            self.db.execute("UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                            (now + self.ttl_for(url), now, cache_key(url, params)))
+            self.db.commit()
+
+    def _evict(self):
+        (total,) = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
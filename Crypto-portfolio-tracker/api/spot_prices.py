@@ -0,0 +1,138 @@
+"""
+Latest USD price of every registry coin from CoinGecko's /simple/price.
+
+One request carries as many coin ids as fit in MAX_URL_LENGTH, so 500 coins
+take a handful of requests instead of a market_chart call each. The chunks
+go through the same rate-limited, cached FetchEngine as the history sync,
+and the prices land in data/spot_prices.csv.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import urllib.parse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from api.config import BASE_URL, COINS, MAX_URL_LENGTH
+from api.fetch_prices import DATA_DIR, build_engine
+
+SPOT_PATH = os.path.join(DATA_DIR, "spot_prices.csv")
+ENDPOINT = f"{BASE_URL}/simple/price"
+
+
+def spot_params(coin_ids):
+    return {"ids": ",".join(coin_ids), "vs_currencies": "usd", "include_last_updated_at": "true"}
+
+
+def request_url(coin_ids):
+    return f"{ENDPOINT}?{urllib.parse.urlencode(spot_params(coin_ids))}"
+
+
+def chunk_ids(coin_ids, max_url_length=MAX_URL_LENGTH):
+    """Split coin ids into groups whose request URL stays within max_url_length (an overlong id goes alone)"""
+    base = len(request_url([]))
+    separator = len(urllib.parse.quote_plus(","))
+    chunks, current, length = [], [], base
+    for coin_id in coin_ids:
+        size = len(urllib.parse.quote_plus(coin_id))
+        if current and length + separator + size > max_url_length:
+            chunks.append(current)
+            current, length = [], base
+        length += size + (separator if current else 0)
+        current.append(coin_id)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def fetch_spot_prices(coins, engine, max_url_length=MAX_URL_LENGTH):
+    """Latest prices for {symbol: coingecko_id}.
+
+    Returns ({symbol: (price_usd, last_updated_at)}, symbols the API had no price for, [FetchResult]).
+    """
+    by_id = {}
+    for symbol, coin_id in coins.items():
+        by_id.setdefault(coin_id, []).append(symbol)
+    chunks = chunk_ids(list(by_id), max_url_length)
+    jobs = [(f"spot[{index}]", ENDPOINT, spot_params(chunk)) for index, chunk in enumerate(chunks)]
+
+    prices = {}
+    results = engine.fetch_many(jobs)
+    for result in results:
+        if result.error is not None:
+            continue
+        for coin_id, quote in (result.data or {}).items():
+            if "usd" not in quote:
+                continue
+            for symbol in by_id.get(coin_id, []):
+                prices[symbol] = (float(quote["usd"]), quote.get("last_updated_at"))
+    failed_ids = {coin_id for result, chunk in zip(results, chunks) if result.error is not None for coin_id in chunk}
+    missing = [symbol for symbol, coin_id in coins.items() if symbol not in prices and coin_id not in failed_ids]
+    return prices, missing, results
+
+
+def write_spot_prices(path, prices):
+    """Replace path with symbol,price_usd,last_updated_at rows (atomically)"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".csv.tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["symbol", "price_usd", "last_updated_at"])
+            for symbol, (price, updated) in prices.items():
+                writer.writerow([symbol, price, "" if updated is None else updated])
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_spot_prices(path=SPOT_PATH):
+    """{symbol: price_usd} from a spot price file"""
+    with open(path, "r", newline="") as f:
+        return {row["symbol"]: float(row["price_usd"]) for row in csv.DictReader(f)}
+
+
+def main(argv=None):
+    """Fetch the latest price of every coin into data/spot_prices.csv"""
+    parser = argparse.ArgumentParser(description="Fetch latest prices from CoinGecko in batched requests")
+    parser.add_argument("--coins", nargs="+", choices=list(COINS), default=list(COINS),
+                        help="only these coins (default: every registry coin)")
+    parser.add_argument("--offline", action="store_true",
+                        default=os.environ.get("CRYPTO_TRACKER_OFFLINE") == "1",
+                        help="serve responses only from the local cache (or set CRYPTO_TRACKER_OFFLINE=1)")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--max-url-length", type=int, default=MAX_URL_LENGTH,
+                        help="longest request URL; decides how many coins share a request")
+    args = parser.parse_args(argv)
+
+    coins = {symbol: COINS[symbol] for symbol in args.coins}
+    engine = build_engine(use_cache=not args.no_cache, offline=args.offline)
+    try:
+        prices, missing, results = fetch_spot_prices(coins, engine, args.max_url_length)
+    finally:
+        engine.close()
+
+    errors = [result for result in results if result.error is not None]
+    for result in errors:
+        print(f"[ERROR] {result.key}: {result.error}")
+    if missing:
+        print(f"[ERROR] No price for {', '.join(missing)} (check their coingecko_id in the coin registry)")
+    if prices:
+        # Whatever arrived is still the freshest price there is; a failed chunk makes the stage retry
+        write_spot_prices(SPOT_PATH, prices)
+        latency = max(result.latency for result in results)
+        print(f"[OK] Saved {len(prices)} spot prices to {SPOT_PATH} "
+              f"({len(results)} request(s), slowest {latency * 1000:.0f} ms)")
+    if errors or not prices:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
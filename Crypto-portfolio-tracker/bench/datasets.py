@@ -0,0 +1,137 @@
+"""
+Synthetic, reproducible datasets for the benchmarks.
+
+A dataset is a data directory laid out like the real one: the columnar
+price store (data/prices/), the wallet store (wallets.sqlite) and a
+{coin}_forecast.csv per coin. Everything is derived from the Scale and its
+seed, and a manifest records what was generated so an existing dataset is
+reused instead of being rebuilt.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from coin_registry import Coin, write_registry
+
+Scale = namedtuple("Scale", [
+    "wallets",
+    "coins",
+    "days",         # length of every price history
+    "bar_minutes",  # spacing of the price bars (1440 = daily, 1 = minute bars)
+    "seed",
+])
+
+# small matches what the app handles today; the others grow one axis or more
+SCALES = {
+    "small": Scale(wallets=5, coins=4, days=180, bar_minutes=1440, seed=0),
+    "medium": Scale(wallets=100_000, coins=50, days=365, bar_minutes=60, seed=0),
+    "wide": Scale(wallets=10_000, coins=500, days=365, bar_minutes=60, seed=0),
+    "large": Scale(wallets=1_000_000, coins=100, days=730, bar_minutes=60, seed=0),
+    "xl": Scale(wallets=10_000_000, coins=20, days=3 * 365, bar_minutes=1, seed=0),
+}
+
+BASE_COINS = ["BTC", "ETH", "SOL", "XRP"]
+BASE_PRICES = {"BTC": 60_000.0, "ETH": 3_000.0, "SOL": 150.0, "XRP": 0.5}
+# Histories end here, so a dataset does not depend on when it was generated
+END_MS = 1_704_067_200_000  # 2024-01-01 00:00:00 UTC
+MINUTE_MS = 60_000
+MANIFEST_VERSION = 1
+
+
+def scale_key(scale):
+    return f"w{scale.wallets}-c{scale.coins}-d{scale.days}-b{scale.bar_minutes}-s{scale.seed}"
+
+
+def coin_symbols(count):
+    """The four real coins, then synthetic C005, C006, ..."""
+    if count < len(BASE_COINS):
+        raise ValueError(f"Benchmarks need at least {len(BASE_COINS)} coins, got {count}")
+    return BASE_COINS + [f"C{i:03d}" for i in range(len(BASE_COINS) + 1, count + 1)]
+
+
+def coin_id(symbol):
+    """CoinGecko-style id served by the stub server"""
+    return symbol.lower()
+
+
+def history_rows(scale):
+    return scale.days * 1440 // scale.bar_minutes
+
+
+def synthetic_series(rng, symbol, rows, bar_minutes):
+    """(timestamps, prices): a geometric random walk with ~60% annualized volatility"""
+    timestamps = END_MS - np.arange(rows - 1, -1, -1, dtype=np.int64) * bar_minutes * MINUTE_MS
+    start = BASE_PRICES.get(symbol) or float(np.exp(rng.uniform(np.log(0.01), np.log(1000.0))))
+    volatility = 0.6 * np.sqrt(bar_minutes / (365 * 1440))
+    prices = start * np.exp(np.cumsum(rng.normal(0.0, volatility, rows)))
+    return timestamps, prices
+
+
+def write_price_store(data_dir, symbol, timestamps, prices):
+    """Write a series in the PriceStore layout (.px first; the .ts length commits the rows)"""
+    root = os.path.join(data_dir, "prices")
+    os.makedirs(root, exist_ok=True)
+    np.asarray(prices, dtype="<f8").tofile(os.path.join(root, f"{symbol}.px"))
+    np.asarray(timestamps, dtype="<i8").tofile(os.path.join(root, f"{symbol}.ts"))
+
+
+def write_forecasts(data_dir, symbol, last_price, rng, horizon=7):
+    from ml.forecasting import write_forecast_csv
+
+    write_forecast_csv(data_dir, symbol, last_price * np.cumprod(1.0 + rng.normal(0.0, 0.01, horizon)))
+
+
+def write_wallets(data_dir, scale, symbols):
+    from portfolio.wallet_store import WalletStore
+    from scripts.generate_mock_wallets import iter_wallet_batches
+
+    keys = [symbol.lower() for symbol in symbols]
+    store = WalletStore(os.path.join(data_dir, "wallets.sqlite"), symbols)
+    try:
+        def items():
+            for addresses, holdings in iter_wallet_batches(scale.wallets, scale.seed, keys):
+                for address, row in zip(addresses, holdings.tolist()):
+                    yield address, dict(zip(keys, row))
+        store.replace_all(items())
+    finally:
+        store.close()
+
+
+def load_manifest(data_dir):
+    try:
+        with open(os.path.join(data_dir, "manifest.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_dataset(data_dir, scale, log=print):
+    """Generate the dataset for scale into data_dir unless it is already there; returns the coin symbols"""
+    symbols = coin_symbols(scale.coins)
+    manifest = {"version": MANIFEST_VERSION, "scale": scale._asdict()}
+    os.makedirs(data_dir, exist_ok=True)
+    # The cases point the coin registry here, so every stage sizes itself to the dataset
+    write_registry(os.path.join(data_dir, "coins.csv"),
+                   [Coin(symbol, coin_id(symbol), None, None) for symbol in symbols])
+    if load_manifest(data_dir) == manifest:
+        return symbols
+
+    manifest_path = os.path.join(data_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        os.unlink(manifest_path)
+    rows = history_rows(scale)
+    log(f"- Generating {scale.coins} coins x {rows} bars and {scale.wallets} wallets in {data_dir}")
+    # One child RNG per coin: a coin's series does not depend on how many coins there are
+    for symbol, child in zip(symbols, np.random.SeedSequence(scale.seed).spawn(len(symbols))):
+        rng = np.random.default_rng(child)
+        timestamps, prices = synthetic_series(rng, symbol, rows, scale.bar_minutes)
+        write_price_store(data_dir, symbol, timestamps, prices)
+        write_forecasts(data_dir, symbol, prices[-1], rng)
+    write_wallets(data_dir, scale, symbols)
+
+    # Written last: a manifest means the dataset is complete
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    return symbols
@@ -0,0 +1,97 @@
+"""
+Local stand-in for the CoinGecko market_chart endpoint.
+
+Serves /coins/{id}/market_chart from a benchmark dataset's price store so
+the fetch path can be timed without the network or its rate limits.
+Responses are encoded once per (coin, days) and then reused, so the
+server itself stays out of the measurement as far as possible.
+"""
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "coins" or parts[2] != "market_chart":
+            return self._send(404, b"{}")
+        days = urllib.parse.parse_qs(url.query).get("days", ["max"])[0]
+        body = self.server.stub.response(parts[1], days)
+        if body is None:
+            return self._send(404, b'{"error": "coin not found"}')
+        if self.server.stub.latency:
+            threading.Event().wait(self.server.stub.latency)
+        self._send(200, body)
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """Serve market_chart for {coin_id: (timestamps, prices)} on 127.0.0.1 in a background thread.
+
+    max_points caps a response to the newest points; latency (seconds) is
+    added to every response to mimic a remote API.
+    """
+
+    def __init__(self, series, max_points=None, latency=0.0):
+        self.series = series
+        self.max_points = max_points
+        self.latency = latency
+        self._responses = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def response(self, coin_id, days):
+        key = (coin_id, days)
+        with self._lock:
+            if key in self._responses:
+                return self._responses[key]
+        if coin_id not in self.series:
+            return None
+        timestamps, prices = self.series[coin_id]
+        if days != "max":
+            start = int(np.searchsorted(timestamps, timestamps[-1] - float(days) * DAY_MS, side="left"))
+            timestamps, prices = timestamps[start:], prices[start:]
+        if self.max_points:
+            timestamps, prices = timestamps[-self.max_points:], prices[-self.max_points:]
+        body = json.dumps({"prices": [[int(t), float(p)] for t, p in zip(timestamps.tolist(),
+                                                                         prices.tolist())]}).encode()
+        with self._lock:
+            self._responses[key] = body
+        return body
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,347 @@
+"""
+Benchmark cases for every stage of the app, and the runner that times them.
+
+Each run of a case happens in a fresh (spawned) process, so its peak RSS
+is the case's own and no cache or import from an earlier case carries
+over. A case does its setup, then wraps the measured work in
+ctx.measure() and returns the number of items it processed (points,
+rows, coins, wallets) for the throughput figure.
+"""
+import gc
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+import numpy as np
+
+from coin_registry import ENV_VAR as REGISTRY_ENV_VAR
+from tracing import peak_rss_mb
+
+Case = namedtuple("Case", ["name", "unit", "description", "run"])
+
+RESULTS_VERSION = 1
+DEFAULT_TOLERANCE = 0.2
+# Differences below these are noise, whatever the ratio
+NOISE_SECONDS = 0.005
+NOISE_MB = 5.0
+TICK_ROWS = 24
+
+
+def current_rss_mb():
+    """Resident set size right now (Linux), else the peak so far"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+class Context:
+    """What a case gets: the dataset, a scratch directory for its outputs, and the timer"""
+
+    def __init__(self, data_dir, symbols, scratch, options):
+        self.data_dir = data_dir
+        self.symbols = symbols
+        self.scratch = scratch
+        self.options = options
+        self.measurement = None
+
+    @contextmanager
+    def measure(self):
+        gc.collect()
+        rss_start = current_rss_mb()
+        cpu = time.process_time()
+        start = time.perf_counter()
+        yield
+        self.measurement = {"seconds": time.perf_counter() - start,
+                            "cpu_seconds": time.process_time() - cpu,
+                            "rss_start_mb": rss_start,
+                            "peak_rss_mb": peak_rss_mb()}
+
+
+# --- cases ---------------------------------------------------------------
+
+def bench_fetch(ctx):
+    """Full-history download of every coin from the stub server, written to a fresh price store"""
+    from api.fetch_engine import FetchEngine, RequestsTransport
+    from api.price_store import PriceStore
+    from bench.datasets import coin_id
+
+    workers = ctx.options["fetch_workers"]
+    engine = FetchEngine(RequestsTransport(pool_size=workers), rate_per_minute=1e9, burst=workers,
+                         max_workers=workers, max_retries=0)
+    store = PriceStore(ctx.scratch)
+    jobs = [(symbol, f"{ctx.options['base_url']}/coins/{coin_id(symbol)}/market_chart",
+             {"vs_currency": "usd", "days": "max"}) for symbol in ctx.symbols]
+    points = 0
+    try:
+        with ctx.measure():
+            for result in engine.fetch_many(jobs):
+                if result.error is not None:
+                    raise RuntimeError(f"Fetching {result.key} failed: {result.error}")
+                prices = result.data["prices"]
+                store.write(result.key, [row[0] for row in prices], [row[1] for row in prices])
+                points += len(prices)
+    finally:
+        engine.close()
+    return points
+
+
+def bench_preprocess(ctx):
+    """Lag-feature matrices of every coin, materialized from the memory-mapped store"""
+    from api.price_store import PriceStore
+    from ml.features import store_lag_view
+
+    store = PriceStore(ctx.data_dir)
+    rows = 0
+    with ctx.measure():
+        for symbol in ctx.symbols:
+            _, features = store_lag_view(store, symbol, ctx.options["lags"])
+            rows += len(np.ascontiguousarray(features))
+    return rows
+
+
+def bench_forecast_numpy(ctx):
+    """Batched NumPy fit and 7-day rollout of every coin"""
+    from ml.forecasting import NumpyBackend, load_series
+
+    backend = NumpyBackend(lags=ctx.options["lags"])
+    with ctx.measure():
+        backend.forecast(load_series(ctx.data_dir, ctx.symbols))
+    return len(ctx.symbols)
+
+
+def bench_forecast_online(ctx):
+    """Online (RLS) refresh after a tick of new bars per coin; the initial fit is setup"""
+    from ml.forecasting import OnlineBackend, load_series
+
+    series = load_series(ctx.data_dir, ctx.symbols)
+    backend = OnlineBackend(ctx.options["lags"], path=os.path.join(ctx.scratch, "model_state.sqlite"))
+    try:
+        backend.forecast({coin: (ts[:-TICK_ROWS], px[:-TICK_ROWS]) for coin, (ts, px) in series.items()})
+        with ctx.measure():
+            backend.forecast(series)
+    finally:
+        backend.close()
+    return len(ctx.symbols)
+
+
+def bench_forecast_julia(ctx):
+    """forecast.jl for every coin on the warm Julia daemon (needs Julia)"""
+    from ml.forecasting import JuliaBackend, load_series
+
+    series = load_series(ctx.data_dir, ctx.symbols)
+    backend = JuliaBackend(lags=ctx.options["lags"])
+    try:
+        with ctx.measure():
+            backend.forecast(series)
+    finally:
+        backend.close()
+    return len(ctx.symbols)
+
+
+def bench_valuation(ctx):
+    """Every wallet valued over the forecast horizon and written to portfolio_forecast.csv"""
+    from portfolio.valuation import load_forecast_matrix, write_portfolio_forecast
+    from portfolio.wallet_store import WalletStore
+
+    wallets = WalletStore(os.path.join(ctx.data_dir, "wallets.sqlite"), ctx.symbols)
+    try:
+        with ctx.measure():
+            days, prices = load_forecast_matrix(ctx.data_dir, ctx.symbols)
+            count = write_portfolio_forecast(os.path.join(ctx.scratch, "portfolio_forecast.csv"),
+                                             wallets.items(), prices, days, ctx.symbols)
+    finally:
+        wallets.close()
+    return count
+
+
+def _gui_load(app):
+    """The GUI's refresh, then a wallet search and one wallet's forecast, as the worker threads run them"""
+    app.load_wallets()
+    app.load_prices()
+    app.read_forecast()
+    address = app.search_wallets("0x", None, 50)[0]
+    app.compute_portfolio_forecast(address, app.wallets[address])
+
+
+def _headless_app(data_dir):
+    from gui.main import CryptoPortfolioApp
+
+    class HeadlessApp(CryptoPortfolioApp):
+        """The GUI's worker methods without a Tk window"""
+
+        def __init__(self, data_dir):
+            from gui.data_cache import FileCache, LRUMemo
+
+            self.data_dir = data_dir
+            self.wallets = None
+            self.file_cache = FileCache(hash_contents=True)
+            self.portfolio_memo = LRUMemo(maxsize=4096)
+
+    return HeadlessApp(data_dir)
+
+
+def bench_gui_load(ctx):
+    """Cold GUI data load: wallet store, latest prices, forecasts, search and one valuation"""
+    app = _headless_app(ctx.data_dir)
+    with ctx.measure():
+        _gui_load(app)
+    return 1
+
+
+def bench_gui_reload(ctx):
+    """The same load again with the GUI's file caches and memo warm"""
+    app = _headless_app(ctx.data_dir)
+    _gui_load(app)
+    with ctx.measure():
+        _gui_load(app)
+    return 1
+
+
+CASES = {case.name: case for case in [
+    Case("fetch", "points/s", bench_fetch.__doc__, bench_fetch),
+    Case("preprocess", "rows/s", bench_preprocess.__doc__, bench_preprocess),
+    Case("forecast_numpy", "coins/s", bench_forecast_numpy.__doc__, bench_forecast_numpy),
+    Case("forecast_online", "coins/s", bench_forecast_online.__doc__, bench_forecast_online),
+    Case("forecast_julia", "coins/s", bench_forecast_julia.__doc__, bench_forecast_julia),
+    Case("valuation", "wallets/s", bench_valuation.__doc__, bench_valuation),
+    Case("gui_load", "loads/s", bench_gui_load.__doc__, bench_gui_load),
+    Case("gui_reload", "loads/s", bench_gui_reload.__doc__, bench_gui_reload),
+]}
+# forecast_julia needs a Julia toolchain, so it only runs when asked for
+DEFAULT_CASES = [name for name in CASES if name != "forecast_julia"]
+
+
+# --- runner --------------------------------------------------------------
+
+def _run_once(name, data_dir, symbols, options):
+    """One run of a case; executes in a fresh process"""
+    scratch = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    os.environ[REGISTRY_ENV_VAR] = os.path.join(data_dir, "coins.csv")
+    try:
+        ctx = Context(data_dir, symbols, scratch, options)
+        items = CASES[name].run(ctx)
+        if ctx.measurement is None:
+            raise RuntimeError(f"Benchmark {name} never called ctx.measure()")
+        return {**ctx.measurement, "items": items}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def run_case(name, data_dir, symbols, options, repeat=3):
+    """Run a case `repeat` times, each in its own process; returns its result entry"""
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            runs.append(pool.submit(_run_once, name, data_dir, symbols, options).result())
+    seconds = statistics.median(run["seconds"] for run in runs)
+    items = runs[0]["items"]
+    return {
+        "unit": CASES[name].unit,
+        "items": items,
+        "seconds": seconds,
+        "min_seconds": min(run["seconds"] for run in runs),
+        "cpu_seconds": statistics.median(run["cpu_seconds"] for run in runs),
+        "throughput": items / seconds if seconds > 0 else None,
+        "peak_rss_mb": max(run["peak_rss_mb"] or 0.0 for run in runs),
+        "rss_growth_mb": statistics.median((run["peak_rss_mb"] or 0.0) - (run["rss_start_mb"] or 0.0)
+                                           for run in runs),
+        "runs": runs,
+    }
+
+
+def environment():
+    """Where the numbers came from"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpu_count": os.cpu_count(),
+            "commit": commit}
+
+
+def run_suite(scale, data_dir, cases=DEFAULT_CASES, repeat=3, options=None, log=print):
+    """Generate (or reuse) the dataset for scale, run the cases and return the results document"""
+    from bench.datasets import coin_id, ensure_dataset
+    from bench.stub_server import StubServer
+
+    symbols = ensure_dataset(data_dir, scale, log)
+    options = {"lags": 3, "fetch_workers": 8, "fetch_max_points": 100_000, "stub_latency": 0.0,
+               **(options or {})}
+    results = {"version": RESULTS_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+               "scale": scale._asdict(), "options": options, "environment": environment(), "cases": {}}
+
+    stub = None
+    if "fetch" in cases:
+        from api.price_store import PriceStore
+
+        store = PriceStore(data_dir)
+        stub = StubServer({coin_id(symbol): store.arrays(symbol) for symbol in symbols},
+                          options["fetch_max_points"], options["stub_latency"])
+    try:
+        for name in cases:
+            log(f"- {name}: {CASES[name].description}")
+            run_options = {**options, "base_url": stub.base_url} if stub else options
+            results["cases"][name] = run_case(name, os.path.abspath(data_dir), symbols, run_options, repeat)
+            result = results["cases"][name]
+            log(f"  {result['seconds'] * 1000:.1f} ms, {format_throughput(result)}, "
+                f"peak {result['peak_rss_mb']:.0f} MB")
+    finally:
+        if stub:
+            stub.close()
+    return results
+
+
+def format_throughput(result):
+    if result["throughput"] is None:
+        return "-"
+    return f"{result['throughput']:,.1f} {result['unit']}"
+
+
+# --- baseline comparison -------------------------------------------------
+
+Comparison = namedtuple("Comparison", ["case", "baseline_seconds", "seconds", "time_ratio",
+                                       "baseline_peak_mb", "peak_mb", "memory_ratio", "status"])
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare every case with the baseline document.
+
+    A case regresses when its median time or its peak RSS grew by more than
+    `tolerance` (0.2 = 20%) and by more than the noise floor. Raises
+    ValueError if the two were measured at different scales.
+    """
+    if baseline.get("scale") != results["scale"]:
+        raise ValueError(f"Baseline scale {baseline.get('scale')} differs from {results['scale']}")
+    rows = []
+    for name, result in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            rows.append(Comparison(name, None, result["seconds"], None, None, result["peak_rss_mb"], None, "new"))
+            continue
+        time_ratio = result["seconds"] / base["seconds"] if base["seconds"] else None
+        memory_ratio = result["peak_rss_mb"] / base["peak_rss_mb"] if base["peak_rss_mb"] else None
+        slower = (time_ratio or 0) > 1 + tolerance and result["seconds"] - base["seconds"] > NOISE_SECONDS
+        larger = ((memory_ratio or 0) > 1 + tolerance
+                  and result["peak_rss_mb"] - base["peak_rss_mb"] > NOISE_MB)
+        if slower or larger:
+            status = "regression"
+        elif (time_ratio is not None and time_ratio < 1 / (1 + tolerance)
+              and base["seconds"] - result["seconds"] > NOISE_SECONDS):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append(Comparison(name, base["seconds"], result["seconds"], time_ratio,
+                               base["peak_rss_mb"], result["peak_rss_mb"], memory_ratio, status))
+    return rows
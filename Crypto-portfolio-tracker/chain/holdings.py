@@ -0,0 +1,57 @@
+"""
+Holdings as the PortfolioTracker contract stores them.
+
+The contract keeps one uint256 per coin. Off-chain holdings are floats
+(4 decimals in the generated wallets), so amounts go on-chain as fixed
+point with HOLDINGS_DECIMALS decimals and come back divided by the same.
+"""
+import os
+
+HOLDINGS_DECIMALS = 8
+# Field order of the contract's Holdings struct, as wallet-store keys. The struct is fixed:
+# registry coins beyond these are not carried on-chain (see unsupported_coins)
+CONTRACT_COINS = ["btc", "eth", "sol", "xrp"]
+
+
+def to_units(amount):
+    return int(round(float(amount) * 10 ** HOLDINGS_DECIMALS))
+
+
+def from_units(units):
+    return int(units) / 10 ** HOLDINGS_DECIMALS
+
+
+def unsupported_coins(coins=None):
+    """Registry coins (lower case) the contract has no field for; default: the whole registry"""
+    if coins is None:
+        from coin_registry import symbols
+        coins = symbols()
+    return [coin.lower() for coin in coins if coin.lower() not in CONTRACT_COINS]
+
+
+def encode_holdings(holdings):
+    """{"btc": 1.5, ...} -> (btc, eth, sol, xrp) fixed-point tuple for the contract"""
+    return tuple(to_units(holdings.get(coin, 0.0)) for coin in CONTRACT_COINS)
+
+
+def decode_holdings(row):
+    """(btc, eth, sol, xrp) from the contract -> {"btc": 1.5, ...}"""
+    return {coin: from_units(units) for coin, units in zip(CONTRACT_COINS, row)}
+
+
+def read_contract_address(data_dir="data"):
+    """Address scripts/deploy.py saved, or None if the contract was never deployed"""
+    path = os.path.join(data_dir, "contract_address.txt")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return f.read().strip() or None
+
+
+def read_deploy_block(data_dir="data"):
+    """Block the contract was deployed in (0 if scripts/deploy.py did not record it)"""
+    path = os.path.join(data_dir, "contract_block.txt")
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r") as f:
+        return int(f.read().strip() or 0)
@@ -0,0 +1,148 @@
+"""
+Incremental indexer: PortfolioTracker HoldingsUpdated logs -> wallet store.
+
+Logs are read in block ranges from the last checkpoint up to the chain head
+(minus `confirmations`), so a resync costs time in proportion to the blocks
+added since, not to the number of wallets. Each range is applied to
+data/wallets.sqlite together with its checkpoint in one SQLite transaction,
+so an interrupted run resumes where it stopped; within a range the last log
+for a wallet wins. A range the node refuses (too many results, range
+limits) is halved and retried, and later ranges stay at the smaller size.
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import tracing
+from chain.holdings import CONTRACT_COINS, decode_holdings, read_contract_address, read_deploy_block
+from chain.rpc import DEFAULT_RPC_URL, RpcClient, RpcError
+from portfolio.wallet_store import open_wallet_store
+
+# keccak256("HoldingsUpdated(address,uint256,uint256,uint256,uint256)")
+HOLDINGS_UPDATED_TOPIC = "0x0f2cb7a8da94de50bf0b87113997e7e23ec11440e9d1a311f90b1f8874cbc31f"
+DEFAULT_PAGE_BLOCKS = 2000
+
+IndexResult = namedtuple("IndexResult", ["from_block", "to_block", "logs", "wallets", "pages", "seconds"])
+
+
+def checkpoint_key(contract_address):
+    return f"chain:{contract_address.lower()}"
+
+
+def decode_log(log):
+    """HoldingsUpdated log -> (wallet address, holdings dict)"""
+    wallet = "0x" + log["topics"][1][-40:].lower()
+    data = log["data"][2:]
+    return wallet, decode_holdings(int(data[i:i + 64], 16) for i in range(0, 256, 64))
+
+
+class ChainIndexer:
+    """Follow one contract's HoldingsUpdated logs into a WalletStore"""
+
+    def __init__(self, rpc, store, contract_address, start_block=0,
+                 page_blocks=DEFAULT_PAGE_BLOCKS, confirmations=0):
+        self.rpc = rpc
+        self.store = store
+        self.contract_address = contract_address
+        self.key = checkpoint_key(contract_address)
+        self.start_block = start_block
+        self.page_blocks = page_blocks
+        self.confirmations = confirmations
+
+    @property
+    def checkpoint(self):
+        """Last block already applied (start_block - 1 before the first sync)"""
+        stored = self.store.get_meta(self.key)
+        return int(stored) if stored is not None else self.start_block - 1
+
+    def sync(self, on_page=None):
+        """Apply every log up to the confirmed head; returns an IndexResult.
+
+        on_page(from_block, to_block, logs) is called after every committed range.
+        """
+        start = time.perf_counter()
+        head = self.rpc.block_number() - self.confirmations
+        first = block = self.checkpoint + 1
+        page = limit = self.page_blocks
+        logs = pages = 0
+        wallets = set()
+        while block <= head:
+            end = min(head, block + page - 1)
+            try:
+                with tracing.span("get logs", from_block=block, to_block=end):
+                    entries = self.rpc.get_logs(self.contract_address, block, end, [HOLDINGS_UPDATED_TOPIC])
+            except RpcError:
+                if end == block:
+                    raise
+                page = limit = max(1, (end - block + 1) // 2)
+                continue
+
+            entries = sorted((log for log in entries if not log.get("removed")),
+                             key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+            latest = dict(decode_log(log) for log in entries)
+            # Logs only carry the contract's coins; any other registry coin keeps its holdings
+            self.store.upsert_many(latest.items(), meta={self.key: str(end)}, columns=CONTRACT_COINS)
+            wallets.update(latest)
+            logs += len(entries)
+            pages += 1
+            if on_page:
+                on_page(block, end, len(entries))
+            block = end + 1
+            page = min(limit, page * 2)
+        return IndexResult(first, max(head, first - 1), logs, len(wallets), pages, time.perf_counter() - start)
+
+
+def main(argv=None):
+    """Index PortfolioTracker holdings into data/wallets.sqlite"""
+    parser = argparse.ArgumentParser(description="Apply PortfolioTracker HoldingsUpdated logs to the wallet store")
+    parser.add_argument("--rpc-url", default=DEFAULT_RPC_URL, help="node JSON-RPC endpoint (or set CRYPTO_RPC_URL)")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--contract", help="contract address (default data/contract_address.txt)")
+    parser.add_argument("--from-block", type=int,
+                        help="first block on a fresh index (default data/contract_block.txt, else 0)")
+    parser.add_argument("--page-blocks", type=int, default=DEFAULT_PAGE_BLOCKS, help="blocks per eth_getLogs call")
+    parser.add_argument("--confirmations", type=int, default=0, help="stay this many blocks behind the head")
+    parser.add_argument("--follow", action="store_true", help="keep polling for new blocks")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between polls with --follow")
+    args = parser.parse_args(argv)
+
+    contract = args.contract or read_contract_address(args.data_dir)
+    if contract is None:
+        print(f"[ERROR] No contract address in {args.data_dir}/contract_address.txt, run scripts/deploy.py first")
+        raise SystemExit(1)
+    start_block = args.from_block if args.from_block is not None else read_deploy_block(args.data_dir)
+
+    store = open_wallet_store(args.data_dir)
+    rpc = RpcClient(args.rpc_url)
+    indexer = ChainIndexer(rpc, store, contract, start_block, args.page_blocks, args.confirmations)
+    try:
+        while True:
+            try:
+                result = indexer.sync()
+            except Exception as e:
+                print(f"[ERROR] Indexing failed at block {indexer.checkpoint + 1}: {e}")
+                raise SystemExit(1) from e
+            if not result.pages:
+                if not args.follow:
+                    print(f"[OK] Up to date at block {result.to_block}")
+            else:
+                print(f"[OK] Blocks {result.from_block}-{result.to_block}: {result.logs} logs, "
+                      f"{result.wallets} wallets updated in {result.seconds:.2f}s")
+            if not args.follow:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rpc.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
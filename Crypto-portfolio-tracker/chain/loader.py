@@ -0,0 +1,133 @@
+"""
+Bulk loading of wallet holdings into PortfolioTracker.
+
+Wallets go on-chain through setHoldingsBatch in chunks sized to a gas
+budget. The chunk size starts from a guess, and every receipt then updates
+the gas-per-wallet figure to the highest cost seen. New wallets cost several
+times as much as updates, so each chunk is also checked with eth_estimateGas
+and halved until it fits. Wallets whose on-chain holdings already match are
+skipped, which makes a rerun after a partial load cheap.
+
+`contract` is a Brownie contract object (or anything with the same call
+shape: contract.fn(*args), contract.fn(*args, {"from": ...}) and
+contract.fn.estimate_gas(*args, {"from": ...})).
+"""
+import time
+import warnings
+from collections import namedtuple
+from itertools import islice
+
+from chain.holdings import CONTRACT_COINS, encode_holdings, unsupported_coins
+
+# Gas of the transaction itself plus the batch call, before any wallet is written
+BASE_TX_GAS = 30_000
+# First guess per wallet: a new wallet fills 4 holdings slots, the index flag and an array slot
+NEW_WALLET_GAS = 150_000
+READ_BATCH = 500
+BLOCK_FRACTION = 0.5
+GAS_LIMIT_HEADROOM = 1.2
+
+LoadResult = namedtuple("LoadResult", ["wallets", "written", "skipped", "transactions", "gas_used", "seconds"])
+
+
+def default_gas_budget(block_gas_limit):
+    """Gas per batch transaction: half a block, so a load never fills whole blocks on a shared chain"""
+    return int(block_gas_limit * BLOCK_FRACTION)
+
+
+class GasBudgetChunker:
+    """Number of wallets that fit in a gas budget, learned from receipts"""
+
+    def __init__(self, gas_budget, wallet_gas=NEW_WALLET_GAS, base_gas=BASE_TX_GAS):
+        if gas_budget <= base_gas:
+            raise ValueError(f"Gas budget {gas_budget} does not cover the base cost of a transaction")
+        self.gas_budget = gas_budget
+        self.base_gas = base_gas
+        self.wallet_gas = wallet_gas
+        self.observed = False
+
+    @property
+    def size(self):
+        return max(1, int((self.gas_budget - self.base_gas) // self.wallet_gas))
+
+    def observe(self, wallets, gas_used):
+        """Fold in a receipt: the highest gas per wallet seen so far sizes the next chunks"""
+        per_wallet = max(1.0, (gas_used - self.base_gas) / wallets)
+        self.wallet_gas = max(self.wallet_gas, per_wallet) if self.observed else per_wallet
+        self.observed = True
+
+
+def changed_holdings(contract, wallet_items, read_batch=READ_BATCH):
+    """Yield (address, encoded holdings) for wallets whose on-chain holdings differ; counts skipped ones.
+
+    Returns the number of unchanged wallets via StopIteration.value (use `yield from`).
+    """
+    items = iter(wallet_items)
+    skipped = 0
+    while True:
+        batch = [(address, encode_holdings(holdings)) for address, holdings in islice(items, read_batch)]
+        if not batch:
+            return skipped
+        current = contract.getHoldingsBatch([address for address, _ in batch])
+        for (address, encoded), onchain in zip(batch, current):
+            if tuple(int(units) for units in onchain) == encoded:
+                skipped += 1
+            else:
+                yield address, encoded
+
+
+def load_holdings(contract, sender, wallet_items, gas_budget, skip_unchanged=True, on_batch=None, coins=None):
+    """Upsert every (address, holdings) pair through setHoldingsBatch; returns a LoadResult.
+
+    on_batch(wallets_in_batch, gas_used, seconds) is called after every transaction. Only
+    CONTRACT_COINS go on-chain; a warning names any other coin of `coins` (default: the registry).
+    """
+    dropped = unsupported_coins(coins)
+    if dropped:
+        warnings.warn(f"The contract only carries {', '.join(CONTRACT_COINS)}; "
+                      f"holdings of {', '.join(dropped)} are not loaded", stacklevel=2)
+    start = time.perf_counter()
+    chunker = GasBudgetChunker(gas_budget)
+    stats = {"written": 0, "transactions": 0, "gas_used": 0}
+    skipped = 0
+
+    def source():
+        nonlocal skipped
+        if skip_unchanged:
+            skipped = yield from changed_holdings(contract, wallet_items)
+        else:
+            for address, holdings in wallet_items:
+                yield address, encode_holdings(holdings)
+
+    pending = []
+    items = source()
+    while True:
+        pending.extend(islice(items, max(0, chunker.size - len(pending))))
+        if not pending:
+            break
+        chunk = pending[:chunker.size]
+        # The estimate is exact for the chunk as it stands; halve until it fits the budget
+        while True:
+            args = ([address for address, _ in chunk], [encoded for _, encoded in chunk])
+            estimate = contract.setHoldingsBatch.estimate_gas(*args, {"from": sender})
+            if estimate <= gas_budget:
+                break
+            if len(chunk) == 1:
+                # Sending it would only run out of gas and revert after spending the budget
+                raise ValueError(f"Writing wallet {chunk[0][0]} alone needs {estimate} gas, "
+                                 f"more than the gas budget of {gas_budget}")
+            chunk = chunk[:len(chunk) // 2]
+
+        sent = time.perf_counter()
+        tx = contract.setHoldingsBatch(*args, {"from": sender,
+                                               "gas_limit": min(gas_budget, int(estimate * GAS_LIMIT_HEADROOM))})
+        chunker.observe(len(chunk), tx.gas_used)
+        stats["written"] += len(chunk)
+        stats["transactions"] += 1
+        stats["gas_used"] += tx.gas_used
+        if on_batch:
+            on_batch(len(chunk), tx.gas_used, time.perf_counter() - sent)
+        pending = pending[len(chunk):]
+
+    return LoadResult(stats["written"] + skipped, stats["written"], skipped, stats["transactions"],
+                      stats["gas_used"], time.perf_counter() - start)
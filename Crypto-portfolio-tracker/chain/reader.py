@@ -0,0 +1,136 @@
+"""
+Batched, block-pinned reads of PortfolioTracker holdings over JSON-RPC.
+
+One eth_call to getHoldingsBatch returns `call_size` wallets, and
+`calls_per_request` of those calls travel in one JSON-RPC batch request, so
+a round trip covers call_size * calls_per_request wallets (10,000 by
+default: 100k wallets take ten requests, spread over `workers` pooled
+connections). Every read is pinned to one block, so all batches see the
+same state and the results can be cached: holdings at a given block never
+change. With call_size=1 the reader sends getHoldings(address) instead,
+which deployments from before getHoldingsBatch also have.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from chain.holdings import decode_holdings
+
+# First 4 bytes of keccak256 of each signature
+SELECTORS = {
+    "getHoldings": "1be52dc4",        # getHoldings(address)
+    "getHoldingsBatch": "90ae13b1",   # getHoldingsBatch(address[])
+    "walletCount": "29b57c69",        # walletCount()
+    "getWallets": "4ce9dde5",         # getWallets(uint256,uint256)
+}
+# 500 wallets is ~2,600 gas each in SLOADs, well under the eth_call gas caps of common nodes
+DEFAULT_CALL_SIZE = 500
+DEFAULT_CALLS_PER_REQUEST = 20
+DEFAULT_WORKERS = 4
+CACHED_BLOCKS = 2
+
+HoldingsRead = namedtuple("HoldingsRead", ["block", "holdings", "fetched", "cached", "round_trips", "seconds"])
+
+
+def _word(value):
+    return f"{value:064x}"
+
+
+def encode_call(name, *words, addresses=None):
+    """Calldata for `name` with static uint/address arguments, or one dynamic address[] argument"""
+    data = SELECTORS[name] + "".join(_word(int(w, 16) if isinstance(w, str) else w) for w in words)
+    if addresses is not None:
+        data += _word(32) + _word(len(addresses)) + "".join(_word(int(a, 16)) for a in addresses)
+    return "0x" + data
+
+
+def decode_words(result):
+    data = result[2:]
+    return [int(data[i:i + 64], 16) for i in range(0, len(data), 64)]
+
+
+def decode_array(result, width=1):
+    """A returned dynamic array of `width`-word elements -> list of tuples"""
+    words = decode_words(result)
+    count = words[1]
+    items = words[2:2 + count * width]
+    return [tuple(items[i:i + width]) for i in range(0, len(items), width)]
+
+
+class HoldingsReader:
+    """Read many wallets' holdings from the contract in few round trips, cached per block"""
+
+    def __init__(self, rpc, contract_address, call_size=DEFAULT_CALL_SIZE,
+                 calls_per_request=DEFAULT_CALLS_PER_REQUEST, workers=DEFAULT_WORKERS, cached_blocks=CACHED_BLOCKS):
+        self.rpc = rpc
+        self.contract_address = contract_address
+        self.call_size = call_size
+        self.calls_per_request = calls_per_request
+        self.workers = workers
+        self.cached_blocks = cached_blocks
+        # block -> {address: raw (btc, eth, sol, xrp) units}, most recent last
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _block_cache(self, block):
+        with self.lock:
+            entry = self.cache.setdefault(block, {})
+            self.cache.move_to_end(block)
+            while len(self.cache) > self.cached_blocks:
+                self.cache.popitem(last=False)
+            return entry
+
+    def _eth_call(self, data, block):
+        return ("eth_call", {"to": self.contract_address, "data": data}, hex(block))
+
+    def _run_batches(self, calls, block):
+        """Send the calls `calls_per_request` at a time on up to `workers` connections; results in order"""
+        groups = [calls[i:i + self.calls_per_request] for i in range(0, len(calls), self.calls_per_request)]
+        requests = [[self._eth_call(data, block) for data in group] for group in groups]
+        if len(requests) <= 1:
+            return [result for request in requests for result in self.rpc.batch(request)], len(requests)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(requests))) as pool:
+            replies = list(pool.map(self.rpc.batch, requests))
+        return [result for reply in replies for result in reply], len(requests)
+
+    def read(self, addresses, block=None):
+        """Holdings of every address at `block` (default: the current head); returns a HoldingsRead"""
+        start = time.perf_counter()
+        block = self.rpc.block_number() if block is None else block
+        cache = self._block_cache(block)
+        addresses = [address.lower() for address in addresses]
+        missing = list(dict.fromkeys(address for address in addresses if address not in cache))
+
+        chunks = [missing[i:i + self.call_size] for i in range(0, len(missing), self.call_size)]
+        if self.call_size == 1:
+            calls = [encode_call("getHoldings", chunk[0]) for chunk in chunks]
+            results, round_trips = self._run_batches(calls, block)
+            rows = [tuple(decode_words(result)[:4]) for result in results]
+        else:
+            calls = [encode_call("getHoldingsBatch", addresses=chunk) for chunk in chunks]
+            results, round_trips = self._run_batches(calls, block)
+            rows = [row for result in results for row in decode_array(result, width=4)]
+        cache.update(zip(missing, rows))
+
+        holdings = {address: decode_holdings(cache[address]) for address in addresses}
+        return HoldingsRead(block, holdings, len(missing), len(holdings) - len(missing), round_trips,
+                            time.perf_counter() - start)
+
+    def wallet_count(self, block=None):
+        block = self.rpc.block_number() if block is None else block
+        return decode_words(self.rpc.call(*self._eth_call(encode_call("walletCount"), block)))[0]
+
+    def wallet_addresses(self, block=None, page_size=None):
+        """Every tracked address at `block`, paged through getWallets in batched calls"""
+        block = self.rpc.block_number() if block is None else block
+        page_size = page_size or self.call_size * 4
+        total = self.wallet_count(block)
+        calls = [encode_call("getWallets", offset, page_size) for offset in range(0, total, page_size)]
+        results, _ = self._run_batches(calls, block)
+        return ["0x" + f"{item[0]:040x}" for result in results for item in decode_array(result)]
+
+    def read_all(self, block=None):
+        """Holdings of every tracked wallet, all read at the same block"""
+        block = self.rpc.block_number() if block is None else block
+        return self.read(self.wallet_addresses(block), block)
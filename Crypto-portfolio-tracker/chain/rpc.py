@@ -0,0 +1,89 @@
+"""
+Minimal Ethereum JSON-RPC client.
+
+Covers what the chain tools need (eth_blockNumber, eth_getLogs, batched
+eth_call) over one pooled requests.Session, so they run without web3 or
+Brownie against any node: the Ganache chain Brownie starts, anvil, or a
+hosted endpoint.
+"""
+import itertools
+import os
+
+DEFAULT_RPC_URL = os.environ.get("CRYPTO_RPC_URL", "http://127.0.0.1:8545")
+
+
+class RpcError(Exception):
+    """Raised when the node answers with a JSON-RPC error or a bad HTTP status"""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class RpcClient:
+    """JSON-RPC over HTTP with a shared connection pool"""
+
+    def __init__(self, url=DEFAULT_RPC_URL, timeout=30, pool_size=10):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, params):
+        return {"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": list(params)}
+
+    def _post(self, payload, label):
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        if not response.ok:
+            raise RpcError(f"{label}: HTTP {response.status_code}", response.status_code)
+        return response.json()
+
+    @staticmethod
+    def _result(method, reply):
+        if reply.get("error"):
+            raise RpcError(f"{method}: {reply['error'].get('message')}", reply["error"].get("code"))
+        return reply["result"]
+
+    def call(self, method, *params):
+        return self._result(method, self._post(self._request(method, params), method))
+
+    def batch(self, calls):
+        """Send [(method, *params), ...] as one JSON-RPC batch request; returns the results in call order"""
+        payload = [self._request(method, params) for method, *params in calls]
+        if not payload:
+            return []
+        body = self._post(payload, f"batch of {len(payload)}")
+        if isinstance(body, dict):
+            # The node rejected the batch as a whole
+            raise RpcError(f"batch of {len(payload)}: {(body.get('error') or {}).get('message')}",
+                           (body.get("error") or {}).get("code"))
+        replies = {reply.get("id"): reply for reply in body}
+        results = []
+        for request in payload:
+            reply = replies.get(request["id"])
+            if reply is None:
+                raise RpcError(f"{request['method']}: no reply in the batch response")
+            results.append(self._result(request["method"], reply))
+        return results
+
+    def block_number(self):
+        return int(self.call("eth_blockNumber"), 16)
+
+    def get_logs(self, address, from_block, to_block, topics=None):
+        return self.call("eth_getLogs", {"address": address, "fromBlock": hex(from_block),
+                                         "toBlock": hex(to_block), "topics": topics or []})
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
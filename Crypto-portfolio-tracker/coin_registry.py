@@ -0,0 +1,75 @@
+"""
+Coin registry: the one list of tracked coins that every stage reads.
+
+coins.csv (next to this file) has one row per coin: ticker symbol, CoinGecko
+id, and the holding range mock wallets draw from. Symbols are upper case in
+file names and arrays; wallet holdings are keyed by the lower-case symbol.
+Stages size their arrays and loops from this list, so adding a row is all it
+takes to track another coin off-chain. CRYPTO_COINS_FILE points every stage
+(Julia included) at a different registry, e.g. a 500-coin one for scaling runs.
+
+The on-chain path is the exception: PortfolioTracker's Holdings struct has
+fixed fields for chain.holdings.CONTRACT_COINS (BTC, ETH, SOL, XRP), so the
+loader, indexer, reader and --onchain valuation only see those four. The
+loader and --onchain valuation warn when the registry has other coins.
+"""
+import csv
+import os
+from collections import Counter, namedtuple
+
+ENV_VAR = "CRYPTO_COINS_FILE"
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "coins.csv")
+FIELDS = ["symbol", "coingecko_id", "holding_low", "holding_high"]
+
+# holding_low/holding_high are None when the registry leaves them blank
+Coin = namedtuple("Coin", FIELDS)
+
+_loaded = {}
+
+
+def registry_path():
+    return os.environ.get(ENV_VAR) or DEFAULT_PATH
+
+
+def _number(text):
+    return float(text) if text and text.strip() else None
+
+
+def load_coins(path=None):
+    """Every registered coin, in registry order (each file is read once per process)"""
+    path = path or registry_path()
+    if path not in _loaded:
+        with open(path, "r", newline="") as f:
+            coins = [Coin(row["symbol"].strip().upper(), row["coingecko_id"].strip(),
+                          _number(row.get("holding_low")), _number(row.get("holding_high")))
+                     for row in csv.DictReader(f) if (row.get("symbol") or "").strip()]
+        duplicates = [symbol for symbol, count in Counter(coin.symbol for coin in coins).items() if count > 1]
+        if duplicates:
+            raise ValueError(f"{path}: duplicate symbols {', '.join(duplicates)}")
+        _loaded[path] = coins
+    return list(_loaded[path])
+
+
+def symbols(path=None):
+    """["BTC", "ETH", ...]"""
+    return [coin.symbol for coin in load_coins(path)]
+
+
+def coingecko_ids(path=None):
+    """{"BTC": "bitcoin", ...}"""
+    return {coin.symbol: coin.coingecko_id for coin in load_coins(path)}
+
+
+def holding_ranges(path=None):
+    """{"btc": (low, high), ...} for coins whose range is set"""
+    return {coin.symbol.lower(): (coin.holding_low, coin.holding_high) for coin in load_coins(path)
+            if coin.holding_low is not None and coin.holding_high is not None}
+
+
+def write_registry(path, coins):
+    """Write Coin rows as a registry file"""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for coin in coins:
+            writer.writerow(["" if value is None else value for value in coin])
@@ -17,16 +17,32 @@ contract PortfolioTracker {
     address[] private walletAddresses;
     // Check if an address is already tracked
     mapping(address => bool) private isTracked;
+    // Account allowed to write holdings for other wallets (the deployer)
+    address public owner;
+
+    // Emitted on every write, so off-chain indexers can follow holdings from the logs
+    event HoldingsUpdated(address indexed wallet, uint256 btc, uint256 eth, uint256 sol, uint256 xrp);
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "PortfolioTracker: caller is not the owner");
+        _;
+    }
 
     // Set holdings for the caller's wallet (BTC, ETH, SOL, XRP)
     function setHoldings(uint256 _btc, uint256 _eth, uint256 _sol, uint256 _xrp) external {
-        // Add to wallet list if not already tracked
-        if (!isTracked[msg.sender]) {
-            walletAddresses.push(msg.sender);
-            isTracked[msg.sender] = true;
+        _setHoldings(msg.sender, Holdings(_btc, _eth, _sol, _xrp));
+    }
+
+    // Set holdings for many wallets in one transaction (owner only); _holdings[i] belongs to _wallets[i]
+    function setHoldingsBatch(address[] calldata _wallets, Holdings[] calldata _holdings) external onlyOwner {
+        require(_wallets.length == _holdings.length, "PortfolioTracker: length mismatch");
+        for (uint256 i = 0; i < _wallets.length; i++) {
+            _setHoldings(_wallets[i], _holdings[i]);
         }
-        // Update holdings
-        portfolios[msg.sender] = Holdings(_btc, _eth, _sol, _xrp);
     }
 
     // Get holdings for a specific wallet, returns (btc, eth, sol, xrp)
@@ -35,8 +51,45 @@ contract PortfolioTracker {
         return (h.btc, h.eth, h.sol, h.xrp);
     }
 
-    // Get all tracked wallet addresses
+    // Get holdings for many wallets in one call, in the order given (untracked wallets read as zeros)
+    function getHoldingsBatch(address[] calldata _wallets) external view returns (Holdings[] memory batch) {
+        batch = new Holdings[](_wallets.length);
+        for (uint256 i = 0; i < _wallets.length; i++) {
+            batch[i] = portfolios[_wallets[i]];
+        }
+    }
+
+    // Number of tracked wallets
+    function walletCount() external view returns (uint256) {
+        return walletAddresses.length;
+    }
+
+    // Get up to _limit tracked wallet addresses starting at index _offset, in the order they were added
+    function getWallets(uint256 _offset, uint256 _limit) external view returns (address[] memory page) {
+        uint256 total = walletAddresses.length;
+        if (_offset >= total) {
+            return new address[](0);
+        }
+        uint256 end = total - _offset < _limit ? total : _offset + _limit;
+        page = new address[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = walletAddresses[i];
+        }
+    }
+
+    // Get all tracked wallet addresses (unbounded: use getWallets for large sets)
     function getAllWallets() external view returns (address[] memory) {
         return walletAddresses;
     }
+
+    function _setHoldings(address _wallet, Holdings memory _holdings) private {
+        // Add to wallet list if not already tracked
+        if (!isTracked[_wallet]) {
+            walletAddresses.push(_wallet);
+            isTracked[_wallet] = true;
+        }
+        // Update holdings
+        portfolios[_wallet] = _holdings;
+        emit HoldingsUpdated(_wallet, _holdings.btc, _holdings.eth, _holdings.sol, _holdings.xrp);
+    }
 }
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def content_hash(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class FileCache:
+    """Parsed file contents kept in memory until the files change on disk.
+
+    Entries are keyed by the tuple of input paths and validated against each
+    file's (mtime, size). With hash_contents=True a changed signature is
+    double-checked against a content hash first, so a file rewritten with
+    identical bytes (e.g. a pipeline re-run) is not parsed again.
+    """
+
+    def __init__(self, hash_contents=False):
+        self.hash_contents = hash_contents
+        self.entries = {}  # paths -> (signatures, content hash, value)
+        self.stats = {"hits": 0, "misses": 0, "rehashed": 0}
+        self.lock = threading.Lock()
+
+    def signature(self, paths):
+        return tuple(file_signature(path) for path in paths)
+
+    def load(self, paths, loader, hash_contents=None):
+        """Return loader() for these paths, re-running it only if one of them changed.
+
+        hash_contents overrides the cache-wide setting, e.g. to skip hashing
+        large files whose loader is already cheap.
+        """
+        if hash_contents is None:
+            hash_contents = self.hash_contents
+        paths = tuple(paths)
+        signatures = self.signature(paths)
+        with self.lock:
+            entry = self.entries.get(paths)
+        if entry and entry[0] == signatures:
+            self._count("hits")
+            return entry[2]
+
+        digest = None
+        if hash_contents and None not in signatures:
+            digest = content_hash(paths)
+            if entry and entry[1] == digest:
+                with self.lock:
+                    self.entries[paths] = (signatures, digest, entry[2])
+                self._count("rehashed")
+                return entry[2]
+
+        value = loader()
+        with self.lock:
+            self.entries[paths] = (signatures, digest, value)
+        self._count("misses")
+        return value
+
+    def invalidate(self, paths=None):
+        with self.lock:
+            if paths is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(tuple(paths), None)
+
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+
+class LRUMemo:
+    """Bounded memo for derived results; least recently used keys are evicted first"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.values:
+                self.values.move_to_end(key)
+                return self.values[key]
+        value = compute()
+        with self.lock:
+            self.values[key] = value
+            self.values.move_to_end(key)
+            while len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
@@ -1,8 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import csv
 import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import tracing
+from coin_registry import symbols
+from api.price_store import PriceStore
+from api.spot_prices import read_spot_prices
+from portfolio.valuation import holdings_matrix, load_forecast_matrix, value_portfolios
+from portfolio.wallet_store import open_wallet_store
+from gui.tasks import TaskRunner
+from gui.wallet_selector import WalletSelector
+from gui.data_cache import FileCache, LRUMemo
+
+COINS = symbols()
 
 class CryptoPortfolioApp:
     def __init__(self, root):
@@ -10,39 +27,85 @@ class CryptoPortfolioApp:
         self.root.title("Crypto Portfolio Tracker")
         self.root.geometry("900x700")
         self.data_dir = "data"
-        self.wallets = {}
+        self.wallets = None
         self.current_prices = {}
-        self.load_wallets()
-        self.load_prices()
+        # Parsed files are reused until their mtime/size (then content hash) changes
+        self.file_cache = FileCache(hash_contents=True)
+        self.portfolio_memo = LRUMemo(maxsize=4096)
+        # All file I/O runs on worker threads; results come back via root.after polling
+        self.tasks = TaskRunner(root)
+        self.tasks.on_progress = self.show_progress
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         self.create_widgets()
+        self.refresh_data(initial=True)
+
+    def close(self):
+        self.tasks.shutdown()
+        self.root.destroy()
 
     def load_wallets(self):
-        try:
-            with open(os.path.join(self.data_dir, "wallet_balances.json"), 'r') as f:
-                self.wallets = json.load(f)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load wallets: {e}")
+        """Worker: open (or re-sync) the indexed wallet store"""
+        # Lookups go to the indexed store; nothing is loaded up front
+        if self.wallets is None:
+            self.wallets = open_wallet_store(self.data_dir)
+        else:
+            self.wallets.sync_from_json(os.path.join(self.data_dir, "wallet_balances.json"))
 
     def load_prices(self):
-        for coin in ["BTC", "ETH", "SOL", "XRP"]:
+        """Worker: latest price of every coin"""
+        prices = {}
+        spot_file = os.path.join(self.data_dir, "spot_prices.csv")
+        spot = {}
+        if os.path.exists(spot_file):
+            spot = self.file_cache.load([spot_file], lambda: read_spot_prices(spot_file))
+        store = PriceStore(self.data_dir)
+        for coin in COINS:
+            # Spot prices are the freshest; then the price store (one seek), the CSV only as a fallback
+            if coin in spot:
+                prices[coin] = spot[coin]
+                continue
+            if store.exists(coin):
+                prices[coin] = self.file_cache.load(store.paths(coin), lambda: store.latest_price(coin),
+                                                    hash_contents=False)
+                continue
             try:
-                with open(os.path.join(self.data_dir, f"{coin}_history.csv"), 'r') as f:
-                    rows = list(csv.DictReader(f))
-                    self.current_prices[coin] = float(rows[-1]['price']) if rows else 0.0
+                history_file = os.path.join(self.data_dir, f"{coin}_history.csv")
+                prices[coin] = self.file_cache.load([history_file], lambda: self.read_last_price(history_file))
             except:
-                self.current_prices[coin] = 0.0
+                prices[coin] = 0.0
+        return prices
+
+    def read_last_price(self, history_file):
+        with open(history_file, 'r') as f:
+            rows = list(csv.DictReader(f))
+            return float(rows[-1]['price']) if rows else 0.0
+
+    def search_wallets(self, prefix, after, limit):
+        """Worker: prefix search over the wallet store's address index"""
+        if self.wallets is None:
+            return []
+        return self.wallets.search(prefix, after, limit)
 
     def create_widgets(self):
         # Top section - Wallet Selection
         top_frame = tk.Frame(self.root, padx=10, pady=10)
         top_frame.pack(fill=tk.X)
         tk.Label(top_frame, text="Select Wallet:", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
-        self.wallet_combo = ttk.Combobox(top_frame, values=list(self.wallets.keys()), width=50)
-        self.wallet_combo.pack(side=tk.LEFT, padx=5)
-        if self.wallets:
-            self.wallet_combo.current(0)
+        self.wallet_selector = WalletSelector(top_frame, self.tasks, self.search_wallets,
+                                              on_select=self.load_portfolio, width=50)
+        self.wallet_selector.pack(side=tk.LEFT, padx=5)
         tk.Button(top_frame, text="Load Portfolio", command=self.load_portfolio).pack(side=tk.LEFT, padx=5)
         tk.Button(top_frame, text="Refresh Data", command=self.refresh_data).pack(side=tk.LEFT, padx=5)
+        # Status bar - progress of background loads, with cancel
+        status_frame = tk.Frame(self.root, padx=10)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_label = tk.Label(status_frame, text="Loading...", font=("Arial", 9), anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.cancel_button = tk.Button(status_frame, text="Cancel", state=tk.DISABLED,
+                                       command=lambda: self.tasks.cancel("refresh"))
+        self.cancel_button.pack(side=tk.RIGHT, padx=5)
+        self.progress = ttk.Progressbar(status_frame, length=200, mode="determinate", maximum=100)
+        self.progress.pack(side=tk.RIGHT, padx=5)
         # Middle section - Three panels
         middle_frame = tk.Frame(self.root, padx=10, pady=10)
         middle_frame.pack(fill=tk.BOTH, expand=True)
@@ -54,7 +117,7 @@ class CryptoPortfolioApp:
             frame = tk.LabelFrame(middle_frame, text=title, font=("Arial", 12, "bold"), padx=10, pady=10)
             frame.grid(row=0, column=col, sticky="nsew", padx=5)
             middle_frame.columnconfigure(col, weight=1)
-            for coin in ["BTC", "ETH", "SOL", "XRP"]:
+            for coin in COINS:
                 if col == 1:  # Live Prices
                     text = f"{coin}: ${self.current_prices.get(coin, 0.0):,.2f}"
                 else:
@@ -75,7 +138,6 @@ class CryptoPortfolioApp:
         forecast_frame.grid(row=0, column=0, sticky="nsew", padx=5)
         self.forecast_text = tk.Text(forecast_frame, height=10, font=("Arial", 10))
         self.forecast_text.pack(fill=tk.BOTH, expand=True)
-        self.load_forecast()
 
         # Portfolio Value Forecast
         portfolio_forecast_frame = tk.LabelFrame(bottom_frame, text="Portfolio Value Forecast (Next 7 Days)",
@@ -87,74 +149,143 @@ class CryptoPortfolioApp:
         bottom_frame.columnconfigure(0, weight=1)
         bottom_frame.columnconfigure(1, weight=1)
 
+    def show_progress(self, key, fraction, message):
+        """Tk thread: reflect background task progress in the status bar"""
+        self.status_label.config(text=message)
+        busy = self.tasks.busy("refresh")
+        self.cancel_button.config(state=tk.NORMAL if busy else tk.DISABLED)
+        self.progress["value"] = 0 if fraction is None else fraction * 100
+
+    def show_error(self, error):
+        messagebox.showerror("Error", f"Failed to load data: {error}")
+
     def load_portfolio(self):
-        selected = self.wallet_combo.get()
-        if not selected or selected not in self.wallets:
-            messagebox.showwarning("Warning", "Please select a valid wallet")
+        selected = self.wallet_selector.get()
+        prices = dict(self.current_prices)
+
+        def work(token, progress):
+            progress(0.0, f"Loading {selected}...")
+            if not selected or self.wallets is None or selected not in self.wallets:
+                return None
+            holdings = self.wallets[selected]
+            token.check()
+            return holdings, self.compute_portfolio_forecast(selected, holdings)
+
+        def done(result):
+            if result is None:
+                messagebox.showwarning("Warning", "Please select a valid wallet")
+                return
+            holdings, portfolio_values = result
+            total_value = 0.0
+            for coin in COINS:
+                amount = holdings.get(coin.lower(), 0.0)
+                price = prices.get(coin, 0.0)
+                value = amount * price
+                total_value += value
+                self.holdings_labels[coin].config(text=f"{coin}: {amount:.4f}")
+                self.value_labels[coin].config(text=f"{coin}: ${value:,.2f}")
+            self.total_label.config(text=f"Total: ${total_value:,.2f}")
+            self.show_portfolio_forecast(portfolio_values)
+
+        # Rapid clicks/wallet switches coalesce: only the latest selection is rendered
+        self.tasks.submit("portfolio", work, done, self.show_error)
+
+    def refresh_data(self, initial=False):
+        def work(token, progress):
+            progress(0.1, "Loading wallets...")
+            wallets_error = None
+            try:
+                with tracing.span("load wallets", "gui"):
+                    self.load_wallets()
+            except Exception as e:
+                wallets_error = e
+            token.check()
+            progress(0.5, "Loading prices...")
+            with tracing.span("load prices", "gui"):
+                prices = self.load_prices()
+            token.check()
+            progress(0.8, "Loading forecast...")
+            with tracing.span("read forecast", "gui"):
+                forecast = self.read_forecast()
+            return wallets_error, prices, forecast
+
+        def done(result):
+            wallets_error, prices, forecast = result
+            if wallets_error is not None:
+                messagebox.showerror("Error", f"Failed to load wallets: {wallets_error}")
+            self.wallet_selector.refresh()
+            self.current_prices = prices
+            for coin in COINS:
+                self.price_labels[coin].config(text=f"{coin}: ${self.current_prices.get(coin, 0.0):,.2f}")
+            self.show_forecast(forecast)
+            if not initial:
+                self.load_portfolio_forecast()
+                messagebox.showinfo("Success", "Data refreshed successfully!")
+
+        self.tasks.submit("refresh", work, done, self.show_error)
+        self.show_progress("refresh", 0.0, "Loading...")
+
+    def read_forecast(self):
+        """Worker: (day, price) rows of forecast_output.csv, or the exception that prevented reading it"""
+        forecast_file = os.path.join(self.data_dir, "forecast_output.csv")
+
+        def parse():
+            with open(forecast_file, 'r') as f:
+                return [(row['day'], float(row['predicted_price'])) for row in csv.DictReader(f)]
+
+        try:
+            return self.file_cache.load([forecast_file], parse)
+        except Exception as e:
+            return e
+
+    def show_forecast(self, forecast):
+        self.forecast_text.delete(1.0, tk.END)
+        if isinstance(forecast, Exception):
+            self.forecast_text.insert(tk.END, f"Forecast not available: {forecast}")
             return
-        holdings = self.wallets[selected]
-        total_value = 0.0
-        for coin in ["BTC", "ETH", "SOL", "XRP"]:
-            amount = holdings.get(coin.lower(), 0.0)
-            price = self.current_prices.get(coin, 0.0)
-            value = amount * price
-            total_value += value
-            self.holdings_labels[coin].config(text=f"{coin}: {amount:.4f}")
-            self.value_labels[coin].config(text=f"{coin}: ${value:,.2f}")
-        self.total_label.config(text=f"Total: ${total_value:,.2f}")
-        self.load_portfolio_forecast()
-
-    def refresh_data(self):
-        self.load_wallets()
-        self.load_prices()
-        self.load_forecast()
-        self.load_portfolio_forecast()
-        for coin in ["BTC", "ETH", "SOL", "XRP"]:
-            self.price_labels[coin].config(text=f"{coin}: ${self.current_prices.get(coin, 0.0):,.2f}")
-        messagebox.showinfo("Success", "Data refreshed successfully!")
-
-    def load_forecast(self):
+        for day, price in forecast:
+            self.forecast_text.insert(tk.END, f"Day {day}: ${price:,.2f}\n")
+
+    def compute_portfolio_forecast(self, address, holdings):
+        """Worker: value one wallet against the (coins x days) forecast matrix.
+
+        The matrix is parsed once per change of the forecast files and each
+        wallet's series is memoized against those files' signatures.
+        """
         try:
-            with open(os.path.join(self.data_dir, "forecast_output.csv"), 'r') as f:
-                self.forecast_text.delete(1.0, tk.END)
-                for row in csv.DictReader(f):
-                    self.forecast_text.insert(tk.END, f"Day {row['day']}: ${float(row['predicted_price']):,.2f}\n")
+            forecast_files = [os.path.join(self.data_dir, f"{coin}_forecast.csv") for coin in COINS]
+            # A fresh sentinel per parse tags memo entries with the matrix they came from
+            days, prices, version = self.file_cache.load(
+                forecast_files, lambda: (*load_forecast_matrix(self.data_dir, COINS), object()))
+
+            def compute():
+                _, holdings_row = holdings_matrix([(address, holdings)], COINS)
+                values = value_portfolios(holdings_row, prices)[0]
+                return list(zip(days.tolist(), values.tolist()))
+
+            key = (address, tuple(sorted(holdings.items())), version)
+            return self.portfolio_memo.get(key, compute)
         except Exception as e:
-            self.forecast_text.delete(1.0, tk.END)
-            self.forecast_text.insert(tk.END, f"Forecast not available: {e}")
+            return e
 
     def load_portfolio_forecast(self):
+        selected = self.wallet_selector.get()
+
+        def work(token, progress):
+            if not selected or self.wallets is None or selected not in self.wallets:
+                return None
+            return self.compute_portfolio_forecast(selected, self.wallets[selected])
+
+        self.tasks.submit("portfolio_forecast", work, self.show_portfolio_forecast, self.show_error)
+
+    def show_portfolio_forecast(self, portfolio_values):
         try:
-            # Get currently selected wallet
-            selected = self.wallet_combo.get()
-            if not selected or selected not in self.wallets:
+            if portfolio_values is None:
                 self.portfolio_forecast_text.delete(1.0, tk.END)
                 self.portfolio_forecast_text.insert(tk.END, "Please select a wallet first")
                 return
-
-            # Get holdings for selected wallet
-            holdings = self.wallets[selected]
-            holdings_dict = {
-                "BTC": holdings.get("btc", 0.0),
-                "ETH": holdings.get("eth", 0.0),
-                "SOL": holdings.get("sol", 0.0),
-                "XRP": holdings.get("xrp", 0.0)
-            }
-
-            # Load forecast data for each coin
-            coins = ["BTC", "ETH", "SOL", "XRP"]
-            forecasts = {}
-            for coin in coins:
-                forecast_file = os.path.join(self.data_dir, f"{coin}_forecast.csv")
-                with open(forecast_file, 'r') as f:
-                    forecasts[coin] = {int(row['day']): float(row['predicted_price'])
-                                      for row in csv.DictReader(f)}
-
-            # Calculate portfolio value for each day (1-7)
-            portfolio_values = []
-            for day in range(1, 8):
-                total_value = sum(holdings_dict[coin] * forecasts[coin][day] for coin in coins)
-                portfolio_values.append((day, total_value))
+            if isinstance(portfolio_values, Exception):
+                raise portfolio_values
 
             # Display results
             self.portfolio_forecast_text.delete(1.0, tk.END)
@@ -181,8 +312,9 @@ class CryptoPortfolioApp:
             self.portfolio_forecast_text.insert(tk.END, f"Portfolio forecast not available: {e}")
 
 def main():
-    root = tk.Tk()
-    app = CryptoPortfolioApp(root)
+    with tracing.span("create window", "gui"):
+        root = tk.Tk()
+        app = CryptoPortfolioApp(root)
     root.mainloop()
 
 if __name__ == "__main__":
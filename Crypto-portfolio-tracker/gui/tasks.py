@@ -0,0 +1,126 @@
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+class Cancelled(Exception):
+    """Raised inside a task once its token has been cancelled"""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Call between steps of a task; raises Cancelled if the task should stop"""
+        if self._event.is_set():
+            raise Cancelled()
+
+
+class TaskRunner:
+    """Run blocking work on a thread pool and deliver results on the Tk thread.
+
+    Workers never touch widgets: results, errors and progress updates go
+    through a queue that the Tk thread drains with root.after polling.
+    Requests are keyed; while a task with the same key is in flight, newer
+    requests are coalesced into a single pending rerun (the latest wins) and
+    the in-flight result, now stale, is dropped.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-io")
+        self.events = queue.Queue()
+        self.running = {}   # key -> CancelToken
+        self.pending = {}   # key -> (fn, on_done, on_error)
+        self.callbacks = {}  # CancelToken -> (on_done, on_error)
+        self.on_progress = None
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, key, fn, on_done, on_error=None):
+        """Run fn(token, progress) in the pool; on_done(result) / on_error(exc) run on the Tk thread"""
+        if key in self.running:
+            self.pending[key] = (fn, on_done, on_error)
+            return
+        token = CancelToken()
+        self.running[key] = token
+
+        def progress(fraction, message):
+            self.events.put(("progress", key, token, (fraction, message)))
+
+        def work():
+            try:
+                with tracing.span(f"task {key}", "gui"):
+                    result = fn(token, progress)
+                self.events.put(("done", key, token, result))
+            except Cancelled:
+                self.events.put(("cancelled", key, token, None))
+            except Exception as e:
+                self.events.put(("error", key, token, e))
+
+        self.callbacks[token] = (on_done, on_error)
+        self.pool.submit(work)
+
+    def cancel(self, key):
+        """Cancel the in-flight task for key and drop any pending rerun"""
+        self.pending.pop(key, None)
+        token = self.running.get(key)
+        if token:
+            token.cancel()
+
+    def busy(self, key=None):
+        return key in self.running if key else bool(self.running)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    kind, key, token, payload = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                # A failing callback is reported like any Tk callback error; the other events still go out
+                try:
+                    if kind == "progress":
+                        if self.on_progress and not token.cancelled:
+                            self.on_progress(key, *payload)
+                    else:
+                        self._finish(kind, key, token, payload)
+                except Exception:
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+    def _finish(self, kind, key, token, payload):
+        on_done, on_error = self.callbacks.pop(token)
+        if self.running.get(key) is token:
+            del self.running[key]
+        if key in self.pending:
+            # A newer request arrived while this one ran; its result supersedes this one
+            self.submit(key, *self.pending.pop(key))
+            return
+        if self.on_progress:
+            try:
+                self.on_progress(key, None, "Cancelled" if kind == "cancelled" else "Ready")
+            except Exception:
+                # The status line failing must not cost the task its result
+                self.root.report_callback_exception(*sys.exc_info())
+        if kind == "done":
+            on_done(payload)
+        elif kind == "error" and on_error:
+            on_error(payload)
+
+    def shutdown(self):
+        for token in self.running.values():
+            token.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
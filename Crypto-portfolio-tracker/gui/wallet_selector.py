@@ -0,0 +1,91 @@
+import tkinter as tk
+
+
+class WalletSelector(tk.Frame):
+    """Type-ahead wallet picker that never holds more than one page of addresses.
+
+    Each keystroke (debounced) runs a prefix search through the TaskRunner, so
+    the lookup happens off the Tk thread and only the latest query is rendered.
+    Results are paged with keyset cursors: `search(prefix, after, limit)` must
+    return addresses in order, starting after the `after` address.
+    """
+
+    PAGE_SIZE = 50
+    DEBOUNCE_MS = 120
+
+    def __init__(self, master, tasks, search, on_select=None, width=50):
+        super().__init__(master)
+        self.tasks = tasks
+        self.search = search
+        self.on_select = on_select
+        self.cursors = [None]  # `after` cursor of every page visited so far
+        self.has_next = False
+        self._debounce = None
+
+        self.query = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.query, width=width, font=("Arial", 10))
+        self.entry.grid(row=0, column=0, columnspan=3, sticky="ew")
+        self.listbox = tk.Listbox(self, height=5, width=width, font=("Courier", 9), exportselection=False)
+        self.listbox.grid(row=1, column=0, columnspan=3, sticky="ew", pady=2)
+        self.prev_button = tk.Button(self, text="<", width=3, command=self.prev_page, state=tk.DISABLED)
+        self.prev_button.grid(row=2, column=0, sticky="w")
+        self.page_label = tk.Label(self, text="", font=("Arial", 9))
+        self.page_label.grid(row=2, column=1)
+        self.next_button = tk.Button(self, text=">", width=3, command=self.next_page, state=tk.DISABLED)
+        self.next_button.grid(row=2, column=2, sticky="e")
+        self.columnconfigure(1, weight=1)
+
+        self.query.trace_add("write", lambda *_: self._schedule())
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.entry.bind("<Return>", lambda _: self.on_select and self.on_select())
+
+    def get(self):
+        """Selected address, or whatever was typed if nothing is selected"""
+        selection = self.listbox.curselection()
+        if selection:
+            return self.listbox.get(selection[0])
+        return self.query.get().strip().lower()
+
+    def refresh(self):
+        """Re-run the current query from the first page (e.g. after the wallet set changed)"""
+        self.cursors = [None]
+        self._load_page()
+
+    def next_page(self):
+        if self.has_next and self.listbox.size():
+            self.cursors.append(self.listbox.get(tk.END))
+            self._load_page()
+
+    def prev_page(self):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+            self._load_page()
+
+    def _schedule(self):
+        if self._debounce is not None:
+            self.after_cancel(self._debounce)
+        self._debounce = self.after(self.DEBOUNCE_MS, self.refresh)
+
+    def _load_page(self):
+        self._debounce = None
+        prefix, after, page = self.query.get(), self.cursors[-1], len(self.cursors)
+
+        def work(token, progress):
+            # One extra row tells us whether a next page exists without counting matches
+            return self.search(prefix, after, self.PAGE_SIZE + 1)
+
+        def done(addresses):
+            self.has_next = len(addresses) > self.PAGE_SIZE
+            self.listbox.delete(0, tk.END)
+            self.listbox.insert(tk.END, *addresses[:self.PAGE_SIZE])
+            shown = min(len(addresses), self.PAGE_SIZE)
+            first = (page - 1) * self.PAGE_SIZE
+            self.page_label.config(text=f"{first + 1}-{first + shown}" if shown else "No matching wallets")
+            self.prev_button.config(state=tk.NORMAL if page > 1 else tk.DISABLED)
+            self.next_button.config(state=tk.NORMAL if self.has_next else tk.DISABLED)
+
+        self.tasks.submit("wallet_search", work, done)
+
+    def _on_listbox_select(self, _event):
+        if self.listbox.curselection() and self.on_select:
+            self.on_select()
@@ -0,0 +1,101 @@
+"""
+Walk-forward (rolling-origin) backtesting of the lag-regression model.
+
+At every origin t the model is fitted on all prices up to t and forecasts
+t+1..t+horizon. Instead of refitting at each origin, which is O(n^2) over
+the history, a single recursive-least-squares pass (ml/online.py) yields the
+coefficients for every origin in O(n * lags^2). The multi-step rollouts for
+all origins then run together as array operations.
+"""
+import csv
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ml.features import LAGS
+from ml.forecasting import HORIZON, rollout_states
+from ml.online import design_matrix, rls_step, weighted_fit
+
+INITIAL_FRACTION = 0.5
+
+# One row of the error table: errors of every forecast made `horizon` steps ahead
+HorizonError = namedtuple("HorizonError", ["coin", "horizon", "origins", "mae", "rmse", "mape", "bias"])
+
+
+def walk_forward(prices, lags=LAGS, horizon=HORIZON, min_train=None, forgetting=1.0, step=1):
+    """Rolling-origin forecasts over a price history.
+
+    The first origin has min_train training rows (default: half the history);
+    every later row is folded in by RLS. Every `step`-th origin is evaluated.
+    Returns (origins, predictions, actuals): origin row indices into the lag
+    rows, and (origins x horizon) matrices with NaN actuals past the end of
+    the history.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    design, targets = design_matrix(prices, lags)
+    n = len(targets)
+    min_train = min_train or max(lags + 1, int(INITIAL_FRACTION * n))
+    if n - min_train < 1 or min_train < lags + 1:
+        raise ValueError(f"History of {len(prices)} prices is too short to backtest from {min_train} rows")
+
+    # Coefficients in force at each origin: fitted on rows [0, origin)
+    coefs = np.empty((n - min_train, lags + 1))
+    coef, cov = weighted_fit(design[:min_train], targets[:min_train], forgetting)
+    for i, row in enumerate(range(min_train, n)):
+        coefs[i] = coef
+        coef, cov, _ = rls_step(coef, cov, design[row], targets[row], forgetting)
+
+    origins = np.arange(min_train, n)[::step]
+    # An origin's lag1..lagk state is its own design row
+    predictions = rollout_states(design[origins, :lags], coefs[::step], horizon)
+
+    padded = np.concatenate([targets, np.full(horizon, np.nan)])
+    actuals = padded[origins[:, None] + np.arange(horizon)[None, :]]
+    return origins, predictions, actuals
+
+
+def horizon_errors(coin, predictions, actuals):
+    """Per-horizon MAE, RMSE, MAPE (%) and bias over every origin with a known outcome"""
+    rows = []
+    errors = predictions - actuals
+    for h in range(errors.shape[1]):
+        known = ~np.isnan(actuals[:, h])
+        e, a = errors[known, h], actuals[known, h]
+        if not len(e):
+            rows.append(HorizonError(coin, h + 1, 0, math.nan, math.nan, math.nan, math.nan))
+            continue
+        rows.append(HorizonError(coin, h + 1, int(len(e)), float(np.mean(np.abs(e))),
+                                 float(np.sqrt(np.mean(e ** 2))), float(np.mean(np.abs(e / a))) * 100,
+                                 float(np.mean(e))))
+    return rows
+
+
+def backtest_coin(data_dir, coin, lags=LAGS, horizon=HORIZON, min_train=None, forgetting=1.0, step=1):
+    """Backtest one coin from the price store; returns its HorizonError rows"""
+    from api.price_store import PriceStore
+
+    _, prices = PriceStore(data_dir).arrays(coin)
+    _, predictions, actuals = walk_forward(prices, lags, horizon, min_train, forgetting, step)
+    return horizon_errors(coin, predictions, actuals)
+
+
+def backtest(data_dir, coins, workers=None, **options):
+    """Backtest coins in parallel processes; returns {coin: [HorizonError, ...]} in coin order"""
+    workers = workers or min(len(coins), os.cpu_count() or 1)
+    if workers <= 1:
+        return {coin: backtest_coin(data_dir, coin, **options) for coin in coins}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {coin: pool.submit(backtest_coin, data_dir, coin, **options) for coin in coins}
+        return {coin: future.result() for coin, future in futures.items()}
+
+
+def write_error_table(path, results):
+    """Write every coin's per-horizon errors to one CSV"""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HorizonError._fields)
+        for rows in results.values():
+            writer.writerows(rows)
@@ -0,0 +1,28 @@
+# Binary array handoff with Python (see ml/exchange.py for the layout).
+# Arrays are flat little-endian files in the directory named by
+# CRYPTO_EXCHANGE_DIR; reads are memory-mapped, writes commit via the .meta file.
+using Mmap
+
+exchange_dir() = get(ENV, "CRYPTO_EXCHANGE_DIR", "")
+exchange_enabled() = !isempty(exchange_dir())
+
+# Intermediate CSVs are only written standalone or when debugging
+write_debug_csv() = !exchange_enabled() || get(ENV, "CRYPTO_DEBUG_CSV", "") == "1"
+
+exchange_has(name) = exchange_enabled() && isfile(joinpath(exchange_dir(), "$(name).meta"))
+
+function exchange_read(name)
+    base = joinpath(exchange_dir(), name)
+    code, dims... = split(read("$(base).meta", String))
+    T = code == "i8" ? Int64 : Float64
+    shape = Tuple(parse.(Int, dims))
+    return open(io -> Mmap.mmap(io, Array{T, length(shape)}, shape), "$(base).bin")
+end
+
+function exchange_write(name, array)
+    base = joinpath(exchange_dir(), name)
+    code, T = eltype(array) <: Integer ? ("i8", Int64) : ("f8", Float64)
+    open(io -> write(io, htol.(convert(Array{T}, array))), "$(base).bin", "w")
+    write("$(base).meta.tmp", join((code, size(array)...), " ") * "\n")
+    mv("$(base).meta.tmp", "$(base).meta"; force=true)
+end
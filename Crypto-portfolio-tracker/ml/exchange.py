@@ -0,0 +1,85 @@
+"""
+Binary array handoff between Python and the Julia ML scripts.
+
+An exchange is a directory (on /dev/shm when available, so it never touches
+disk) holding one flat little-endian file per array:
+  {name}.bin   raw values in column-major (Julia) order
+  {name}.meta  "<dtype> <dim1> <dim2> ..." with dtype f8 (Float64) or i8 (Int64)
+
+Both sides memory-map the .bin files, so arrays cross the language boundary
+without parsing or copying. The .meta file is written last and is the commit
+marker, the same way .ts is for the price store. Julia jobs find the
+directory through CRYPTO_EXCHANGE_DIR (see ml/exchange.jl).
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+ENV_VAR = "CRYPTO_EXCHANGE_DIR"
+DTYPES = {"f8": "<f8", "i8": "<i8"}
+
+
+def default_root():
+    """Shared-memory tmpfs when the platform has one, else the temp dir"""
+    return "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+class ArrayExchange:
+    """A scratch directory of named arrays shared with Julia jobs"""
+
+    def __init__(self, path=None):
+        self.owned = path is None
+        self.path = path or tempfile.mkdtemp(prefix="crypto-exchange-", dir=default_root())
+
+    @property
+    def env(self):
+        """Environment entries that point a Julia job at this exchange"""
+        return {ENV_VAR: self.path}
+
+    def _paths(self, name):
+        base = os.path.join(self.path, name)
+        return base + ".bin", base + ".meta"
+
+    def __contains__(self, name):
+        return os.path.exists(self._paths(name)[1])
+
+    def names(self):
+        return sorted(entry[:-5] for entry in os.listdir(self.path) if entry.endswith(".meta"))
+
+    def put(self, name, array):
+        """Write an int or float array (any rank) under name"""
+        array = np.asarray(array)
+        code = "i8" if np.issubdtype(array.dtype, np.integer) else "f8"
+        bin_path, meta_path = self._paths(name)
+        with open(bin_path, "wb") as f:
+            f.write(np.asfortranarray(array, dtype=DTYPES[code]).tobytes(order="F"))
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(" ".join([code] + [str(dim) for dim in array.shape]) + "\n")
+        os.replace(tmp_path, meta_path)
+
+    def get(self, name, mmap=True):
+        """Return the named array, memory-mapped read-only by default; KeyError if absent"""
+        bin_path, meta_path = self._paths(name)
+        try:
+            with open(meta_path) as f:
+                code, *dims = f.read().split()
+        except FileNotFoundError:
+            raise KeyError(name) from None
+        shape = tuple(int(dim) for dim in dims)
+        if mmap and all(shape):
+            return np.memmap(bin_path, dtype=DTYPES[code], mode="r", shape=shape, order="F")
+        return np.fromfile(bin_path, dtype=DTYPES[code]).reshape(shape, order="F")
+
+    def close(self):
+        """Remove the directory if this exchange created it"""
+        if self.owned:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,45 @@
+# Lag features as views over a price vector (see ml/features.py for the Python side).
+# Nothing is shifted or copied: column lagk of row t is prices[t - k], read in place,
+# so features can come straight from the memory-mapped price store.
+using CSV
+using DataFrames
+using Mmap
+
+# Number of lags; CRYPTO_LAGS overrides the default of 3
+lag_count() = parse(Int, get(ENV, "CRYPTO_LAGS", "3"))
+
+lag_names(lags) = [Symbol("lag$k") for k in 1:lags]
+
+# (timestamps, prices) handed over through the exchange, else memory-mapped
+# from data/prices; nothing when the coin has no binary series
+function load_price_series(data_dir, coin)
+    if exchange_has("$(coin)_prices")
+        return exchange_read("$(coin)_timestamps"), exchange_read("$(coin)_prices")
+    end
+    ts_file = joinpath(data_dir, "prices", "$(coin).ts")
+    px_file = joinpath(data_dir, "prices", "$(coin).px")
+    if isfile(ts_file) && isfile(px_file)
+        n = min(filesize(ts_file), filesize(px_file)) ÷ 8
+        return open(io -> Mmap.mmap(io, Vector{Int64}, n), ts_file),
+               open(io -> Mmap.mmap(io, Vector{Float64}, n), px_file)
+    end
+    return nothing
+end
+
+# data/{coin}_history.csv (date, price) sorted oldest first: the fallback when there is no binary series
+function load_history(data_dir, coin)
+    history_file = joinpath(data_dir, "$(coin)_history.csv")
+    isfile(history_file) || error("No price data for $coin: neither data/prices/$(coin).ts nor $history_file")
+    return sort!(CSV.read(history_file, DataFrame), :date)
+end
+
+# DataFrame with columns price, lag1..lagN for rows lags+1:end, all views of prices
+function lag_features(prices, lags=lag_count())
+    n = length(prices)
+    n > lags || error("Need more than $lags prices to build $lags lags, got $n")
+    columns = Pair{Symbol, AbstractVector{Float64}}[:price => view(prices, lags+1:n)]
+    for (k, name) in enumerate(lag_names(lags))
+        push!(columns, name => view(prices, lags+1-k:n-k))
+    end
+    return DataFrame(columns; copycols=false)
+end
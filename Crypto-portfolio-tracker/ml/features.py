@@ -0,0 +1,77 @@
+"""
+Lag features as windowed views over the price store.
+
+Row t of the feature matrix is [price[t], price[t-1], ..., price[t-lags]],
+i.e. the target followed by lag1..lagN. It is a strided view over the
+(memory-mapped) price column: nothing is shifted or copied, so building
+features costs no I/O or memory beyond the prices themselves. The
+*_preprocessed.csv layout is still available as an optional export.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+LAGS = 3
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def lag_view(prices, lags=LAGS):
+    """(n - lags) x (lags + 1) read-only view: column 0 is the price, column k is lag k"""
+    prices = np.asarray(prices)
+    if len(prices) <= lags:
+        raise ValueError(f"Need more than {lags} prices to build {lags} lags, got {len(prices)}")
+    return sliding_window_view(prices, lags + 1)[:, ::-1]
+
+
+def store_lag_view(store, coin, lags=LAGS):
+    """(timestamps, features) of a coin, both views over its memory-mapped store files"""
+    timestamps, prices = store.arrays(coin)
+    return timestamps[lags:], lag_view(prices, lags)
+
+
+def iter_lag_chunks(features, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (start_row, block) slices of a lag view; each block is still a view"""
+    for start in range(0, len(features), chunk_rows):
+        yield start, features[start:start + chunk_rows]
+
+
+def write_preprocessed_csv(path, timestamps, features, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream features to the date,price,lag1..lagN CSV layout; returns rows written"""
+    lags = features.shape[1] - 1
+    row_format = ",".join(["%r"] * (lags + 1))
+    with open(path, "w", newline="") as f:
+        f.write(",".join(["date", "price"] + [f"lag{k}" for k in range(1, lags + 1)]) + "\n")
+        for start, block in iter_lag_chunks(features, chunk_rows):
+            dates = timestamps[start:start + len(block)].tolist()
+            f.write("".join(
+                f"{datetime.fromtimestamp(timestamp / 1000).strftime(DATE_FORMAT)},{row_format % tuple(row)}\n"
+                for timestamp, row in zip(dates, block.tolist())))
+    return len(features)
+
+
+def main(argv=None):
+    """Export lag features from the price store as *_preprocessed.csv"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from api.price_store import PriceStore
+
+    parser = argparse.ArgumentParser(description="Write lag features from the price store to CSV")
+    parser.add_argument("coins", nargs="+", help="coin symbols, e.g. BTC ETH")
+    parser.add_argument("--lags", type=int, default=LAGS)
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    store = PriceStore(args.data_dir)
+    for coin in args.coins:
+        timestamps, features = store_lag_view(store, coin, args.lags)
+        output_file = os.path.join(args.data_dir, f"{coin}_preprocessed.csv")
+        count = write_preprocessed_csv(output_file, timestamps, features)
+        print(f"[OK] Wrote {count} rows of {coin} lag features ({args.lags} lags) to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
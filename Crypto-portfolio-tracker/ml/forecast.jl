@@ -4,6 +4,10 @@ using MLJ
 using MLJLinearModels
 using Statistics
 
+include(joinpath(@__DIR__, "exchange.jl"))
+include(joinpath(@__DIR__, "features.jl"))
+include(joinpath(@__DIR__, "trace.jl"))
+
 # Get script directory and build absolute paths
 script_dir = @__DIR__
 project_dir = dirname(script_dir)
@@ -12,30 +16,47 @@ data_dir = joinpath(project_dir, "data")
 # Load LinearRegressor model once
 LinearRegressor = @load LinearRegressor pkg=MLJLinearModels
 
-# List of coins to forecast
-coins = ["BTC", "ETH", "SOL", "XRP"]
+# List of coins to forecast; CRYPTO_COINS="BTC,ETH" restricts a run (one job per coin in the worker pool)
+# Default: every coin in the registry (coins.csv, or CRYPTO_COINS_FILE)
+registry = get(ENV, "CRYPTO_COINS_FILE", joinpath(project_dir, "coins.csv"))
+coins = haskey(ENV, "CRYPTO_COINS") ? String.(split(ENV["CRYPTO_COINS"], ",")) : String.(CSV.File(registry).symbol)
 
 # Process each coin
 for coin in coins
     println("\nForecasting $coin...")
+    coin_span = trace_start()
 
-    # Load preprocessed data
-    input_file = joinpath(data_dir, "$(coin)_preprocessed.csv")
-    df = CSV.read(input_file, DataFrame)
+    # Lag features: from a preceding preprocess stage (exchange), else built as
+    # views straight over the price series, else over the history CSV. The
+    # preprocessed CSV is never read: it is only written on request (--csv)
+    # and may be left over from an older run.
+    if exchange_has("$(coin)_features")
+        features = exchange_read("$(coin)_features")
+        lags = size(features, 2) - 1
+        df = DataFrame([name => view(features, :, i) for (i, name) in enumerate([:price; lag_names(lags)])];
+                       copycols=false)
+    elseif (series = load_price_series(data_dir, coin)) !== nothing
+        lags = lag_count()
+        df = lag_features(series[2], lags)
+    else
+        lags = lag_count()
+        df = lag_features(load_history(data_dir, coin).price, lags)
+    end
 
     # Split into features (X) and target (y)
-    X = select(df, [:lag1, :lag2, :lag3])
+    X = select(df, lag_names(lags); copycols=false)
     y = df.price
 
     # Split into train (80%) and test (20%)
     n = nrow(df)
     train_size = floor(Int, 0.8 * n)
-    X_train = X[1:train_size, :]
-    y_train = y[1:train_size]
-    X_test = X[train_size+1:end, :]
-    y_test = y[train_size+1:end]
+    X_train = view(X, 1:train_size, :)
+    y_train = view(y, 1:train_size)
+    X_test = view(X, train_size+1:n, :)
+    y_test = view(y, train_size+1:n)
 
     # Create and train the model
+    step_span = trace_start()
     model = LinearRegressor()
     mach = machine(model, X_train, y_train)
     fit!(mach, verbosity=0)
@@ -44,17 +65,20 @@ for coin in coins
     y_pred = predict(mach, X_test)
     mae = mean(abs.(y_pred .- y_test))
     println("[OK] Model trained with MAE: $mae")
+    trace_stop(step_span, "fit"; coin=coin, rows=n, lags=lags)
 
-    # Forecast next 7 days
-    last_prices = df.price[end-2:end]
+    # Forecast next 7 days; window holds lag1..lagN, newest first
+    step_span = trace_start()
+    window = [df.price[end - k + 1] for k in 1:lags]
     forecasts = Float64[]
 
     for day in 1:7
-        features = DataFrame(lag1=last_prices[3], lag2=last_prices[2], lag3=last_prices[1])
+        features = DataFrame([name => [window[k]] for (k, name) in enumerate(lag_names(lags))])
         pred = predict(mach, features)[1]
         push!(forecasts, pred)
-        last_prices = [last_prices[2], last_prices[3], pred]
+        window = [pred; window[1:end-1]]
     end
+    trace_stop(step_span, "rollout"; coin=coin)
 
     # Save forecast to CSV
     output_file = joinpath(data_dir, "$(coin)_forecast.csv")
@@ -62,6 +86,13 @@ for coin in coins
     CSV.write(output_file, forecast_df)
 
     println("[OK] 7-day forecast saved to $(coin)_forecast.csv")
+
+    # Return the forecast as arrays rather than through stdout
+    if exchange_enabled()
+        exchange_write("$(coin)_forecast", forecasts)
+        exchange_write("$(coin)_mae", [mae])
+    end
+    trace_stop(coin_span, "forecast.jl"; coin=coin)
 end
 
 println("\nAll forecasts generated successfully!")
@@ -0,0 +1,220 @@
+"""
+Forecasting backends.
+
+Every backend fits one lag-regression model per coin and rolls it forward
+`horizon` steps, the model ml/forecast.jl implements:
+  price[t] = b1*price[t-1] + ... + bk*price[t-k] + b0
+trained on the first 80% of rows, with MAE reported on the rest.
+
+NumpyBackend solves all coins at once in process, as one batched
+least-squares problem, so it needs no Julia toolchain. OnlineBackend keeps
+recursive-least-squares state per coin and only folds in new prices.
+JuliaBackend runs the Julia scripts on a warm executor.
+"""
+import csv
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import tracing
+from coin_registry import symbols
+from ml.features import LAGS, lag_view
+
+HORIZON = 7
+TRAIN_FRACTION = 0.8
+
+Forecast = namedtuple("Forecast", ["predictions", "mae"])
+
+
+def load_series(data_dir="data", coins=None):
+    """{coin: (timestamps, prices)} from the columnar price store"""
+    from api.price_store import PriceStore
+
+    store = PriceStore(data_dir)
+    coins = coins or symbols()
+    return {coin: store.arrays(coin) for coin in coins}
+
+
+def write_forecast_csv(data_dir, coin, predictions):
+    """Write {coin}_forecast.csv (day,predicted_price) the way forecast.jl does"""
+    with open(os.path.join(data_dir, f"{coin}_forecast.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["day", "predicted_price"])
+        for day, price in enumerate(predictions.tolist(), start=1):
+            writer.writerow([day, repr(price)])
+
+
+def rollout(prices, coef, horizon=HORIZON):
+    """Recursive multi-step forecast for every coin at once.
+
+    prices: per-coin histories (only the last `lags` values are used);
+    coef: (coins, lags + 1) lag coefficients followed by the intercept.
+    """
+    k = coef.shape[1] - 1
+    # state holds lag1..lagk, newest first
+    state = np.stack([np.asarray(p[-1:-k - 1:-1], dtype=np.float64) for p in prices])
+    return rollout_states(state, coef, horizon)
+
+
+def rollout_states(state, coef, horizon=HORIZON):
+    """Recursive forecast from (rows, lags) lag1..lagk states, one coefficient row per state"""
+    k = coef.shape[1] - 1
+    predictions = np.empty((len(state), horizon))
+    for step in range(horizon):
+        predictions[:, step] = np.einsum("ck,ck->c", state, coef[:, :k]) + coef[:, k]
+        state = np.concatenate([predictions[:, step:step + 1], state[:, :-1]], axis=1)
+    return predictions
+
+
+class ForecastBackend:
+    """Fit a model per coin and forecast `horizon` steps ahead"""
+
+    name = None
+
+    def forecast(self, series, horizon=HORIZON):
+        """{coin: (timestamps, prices)} -> {coin: Forecast}"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release anything the backend holds on to"""
+
+
+class NumpyBackend(ForecastBackend):
+    """All coins fitted as one batched least-squares problem, in process.
+
+    Series of different lengths are zero-padded to a common row count; zero
+    rows add nothing to the normal equations, so each coin's fit is exact.
+    """
+
+    name = "numpy"
+
+    def __init__(self, lags=LAGS, train_fraction=TRAIN_FRACTION):
+        self.lags = lags
+        self.train_fraction = train_fraction
+
+    def forecast(self, series, horizon=HORIZON):
+        coins = list(series)
+        prices = [np.asarray(series[coin][1], dtype=np.float64) for coin in coins]
+        short = [coin for coin, p in zip(coins, prices) if len(p) <= self.lags + 1]
+        if short:
+            raise ValueError(f"Not enough history to fit {self.lags} lags: {', '.join(short)}")
+
+        k = self.lags
+        rows = np.array([len(p) - k for p in prices])
+        train_rows = np.floor(self.train_fraction * rows).astype(np.int64)
+
+        # (coins, rows, lags + intercept) design and (coins, rows) targets
+        design = np.zeros((len(coins), rows.max(), k + 1))
+        targets = np.zeros((len(coins), rows.max()))
+        for i, p in enumerate(prices):
+            features = lag_view(p, k)
+            design[i, :rows[i], :k] = features[:, 1:]
+            design[i, :rows[i], k] = 1.0
+            targets[i, :rows[i]] = features[:, 0]
+
+        index = np.arange(rows.max())
+        train = index[None, :] < train_rows[:, None]
+        test = (index[None, :] < rows[:, None]) & ~train
+
+        # Batched QR solve over the training rows only
+        q, r = np.linalg.qr(design * train[:, :, None])
+        coef = np.linalg.solve(r, np.einsum("cnk,cn->ck", q, targets * train)[:, :, None])[:, :, 0]
+
+        fitted = np.einsum("cnk,ck->cn", design, coef)
+        mae = (np.abs(fitted - targets) * test).sum(axis=1) / np.maximum(test.sum(axis=1), 1)
+
+        predictions = rollout(prices, coef, horizon)
+        return {coin: Forecast(predictions[i], float(mae[i])) for i, coin in enumerate(coins)}
+
+
+class OnlineBackend(ForecastBackend):
+    """Recursive least squares with persisted per-coin state (ml/online.py).
+
+    Each call folds in only the prices newer than the stored state, so a
+    refresh after a price tick costs O(new rows x lags^2) instead of a refit.
+    The reported MAE is the running one-step-ahead error.
+    """
+
+    name = "online"
+
+    def __init__(self, lags=LAGS, forgetting=1.0, path="data/model_state.sqlite"):
+        from ml.online import ModelStateStore
+
+        self.lags = lags
+        self.forgetting = forgetting
+        self.store = ModelStateStore(path)
+        self.modes = {}  # coin -> "fit" | "update" | "unchanged" for the last call
+
+    def forecast(self, series, horizon=HORIZON):
+        from ml.online import refresh_state, state_mae
+
+        states = {}
+        for coin, (timestamps, prices) in series.items():
+            with tracing.span("refresh model", coin=coin) as span_args:
+                state, mode = refresh_state(self.store.get(coin), timestamps, prices, self.lags, self.forgetting)
+                # Set before the block ends: the span is recorded on exit
+                if span_args is not None:
+                    span_args["mode"] = mode
+                if mode != "unchanged":
+                    self.store.put(coin, state)
+            states[coin] = state
+            self.modes[coin] = mode
+
+        coins = list(series)
+        predictions = rollout([series[coin][1] for coin in coins],
+                              np.stack([states[coin].coef for coin in coins]), horizon)
+        return {coin: Forecast(predictions[i], state_mae(states[coin])) for i, coin in enumerate(coins)}
+
+    def close(self):
+        self.store.close()
+
+
+class JuliaBackend(ForecastBackend):
+    """ml/forecast.jl on a warm Julia executor (always 7 days)"""
+
+    name = "julia"
+
+    def __init__(self, executor=None, lags=LAGS, timeout=600):
+        if executor is None:
+            from JuliaExecutor import connect_daemon
+            executor = connect_daemon()
+            if executor is None:
+                raise RuntimeError("Julia executor unavailable")
+        self.executor = executor
+        self.lags = lags
+        self.timeout = timeout
+
+    def forecast(self, series, horizon=HORIZON):
+        from ml.exchange import ArrayExchange
+
+        if horizon != HORIZON:
+            raise ValueError(f"forecast.jl always forecasts {HORIZON} days")
+        ml_dir = os.path.dirname(os.path.abspath(__file__))
+        with ArrayExchange() as exchange:
+            for coin, (timestamps, prices) in series.items():
+                exchange.put(f"{coin}_timestamps", timestamps)
+                exchange.put(f"{coin}_prices", prices)
+            # forecast.jl builds its lag features straight from the handed-over prices
+            env = {**exchange.env, "CRYPTO_LAGS": str(self.lags)}
+            if tracing.enabled():
+                env[tracing.ENV_VAR] = os.environ[tracing.ENV_VAR]
+            jobs = [(os.path.join(ml_dir, "forecast.jl"), {**env, "CRYPTO_COINS": coin}) for coin in series]
+            for coin, result in zip(series, self.executor.run_all(jobs, timeout=self.timeout)):
+                if not result.get("success"):
+                    raise RuntimeError(f"forecast.jl failed for {coin}: {result.get('error')}")
+            return {coin: Forecast(np.array(exchange.get(f"{coin}_forecast")),
+                                   float(exchange.get(f"{coin}_mae")[0]))
+                    for coin in series}
+
+    def close(self):
+        self.executor.close()
+
+
+BACKENDS = {backend.name: backend for backend in (NumpyBackend, OnlineBackend, JuliaBackend)}
+
+
+def get_backend(name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown forecasting backend: {name}")
+    return BACKENDS[name](**kwargs)
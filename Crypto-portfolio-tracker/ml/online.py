@@ -0,0 +1,189 @@
+"""
+Online updates of the lag-regression model via recursive least squares.
+
+Instead of refitting on the whole history, each coin keeps its coefficients
+and the inverse information matrix P = (X' W X)^-1, and folds in every new
+price in O(lags^2). With forgetting factor 1 the state after any number of
+updates equals a full least-squares fit; below 1, past observations are
+down-weighted geometrically so the model tracks regime changes.
+
+The error reported for a coin is prequential: every observation is scored
+one step ahead, before the model is updated with it.
+
+A trailing off-grid price (the current price a fetch ends with) is never
+folded in: the next sync replaces it, so the state is keyed on the last
+daily bar, which stays put.
+"""
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from api.price_store import is_daily_bar
+from ml.features import LAGS, lag_view
+
+TRAIN_FRACTION = 0.8
+
+ModelState = namedtuple("ModelState", [
+    "coef",            # (lags + 1,) lag coefficients followed by the intercept
+    "cov",             # (lags + 1, lags + 1) P matrix
+    "lags",
+    "forgetting",
+    "last_timestamp",  # epoch ms of the newest observation folded in
+    "observations",
+    "error_sum",       # sum of absolute one-step-ahead errors
+    "error_count",
+])
+
+
+def state_mae(state):
+    return state.error_sum / state.error_count if state.error_count else float("nan")
+
+
+def design_matrix(prices, lags):
+    """Lag rows with an intercept column, and their targets"""
+    features = lag_view(prices, lags)
+    return np.column_stack([features[:, 1:], np.ones(len(features))]), features[:, 0]
+
+
+def rls_step(coef, cov, x, y, forgetting=1.0):
+    """Fold one observation into (coef, cov); returns (coef, cov, one-step-ahead error)"""
+    error = y - x @ coef
+    px = cov @ x
+    gain = px / (forgetting + x @ px)
+    coef = coef + gain * error
+    cov = (cov - np.outer(gain, px)) / forgetting
+    return coef, (cov + cov.T) / 2, error
+
+
+def rls_updates(coef, cov, design, targets, forgetting=1.0):
+    """Fold a block of observations in order; returns (coef, cov, absolute errors)"""
+    errors = np.empty(len(targets))
+    for i in range(len(targets)):
+        coef, cov, errors[i] = rls_step(coef, cov, design[i], targets[i], forgetting)
+    return coef, cov, np.abs(errors)
+
+
+def weighted_fit(design, targets, forgetting=1.0):
+    """Batch least squares with weights forgetting^age; returns (coef, cov) ready for RLS updates"""
+    weights = np.sqrt(forgetting ** np.arange(len(targets) - 1, -1, -1, dtype=np.float64))
+    q, r = np.linalg.qr(design * weights[:, None])
+    coef = np.linalg.solve(r, q.T @ (targets * weights))
+    r_inv = np.linalg.inv(r)
+    return coef, r_inv @ r_inv.T
+
+
+def settled(timestamps, prices):
+    """The series without a trailing off-grid "now" price"""
+    if len(timestamps) and not is_daily_bar(int(timestamps[-1])):
+        return timestamps[:-1], prices[:-1]
+    return timestamps, prices
+
+
+def fit_state(timestamps, prices, lags=LAGS, forgetting=1.0, train_fraction=TRAIN_FRACTION):
+    """Full fit: weighted least squares on the first rows, then RLS over the rest.
+
+    Starting from a batch fit of the first train_fraction of rows and updating
+    through the remainder gives the same coefficients as fitting everything,
+    plus a prequential error over the held-back rows.
+    """
+    timestamps, prices = settled(timestamps, np.asarray(prices, dtype=np.float64))
+    design, targets = design_matrix(prices, lags)
+    n = len(targets)
+    if n < lags + 1:
+        raise ValueError(f"Not enough history to fit {lags} lags: {len(prices)} prices")
+    train = max(lags + 1, int(np.floor(train_fraction * n)))
+
+    coef, cov = weighted_fit(design[:train], targets[:train], forgetting)
+    coef, cov, errors = rls_updates(coef, cov, design[train:], targets[train:], forgetting)
+    return ModelState(coef, cov, lags, forgetting, int(timestamps[-1]), n,
+                      float(errors.sum()), len(errors))
+
+
+def update_state(state, timestamps, prices):
+    """Fold in the rows newer than state.last_timestamp; None if the history no longer lines up"""
+    timestamps, prices = settled(np.asarray(timestamps), prices)
+    start = int(np.searchsorted(timestamps, state.last_timestamp, side="left"))
+    if start >= len(timestamps) or timestamps[start] != state.last_timestamp:
+        return None
+    start += 1
+    if start == len(timestamps):
+        return state
+
+    # Lag rows for the new observations need the `lags` prices before them
+    window = np.asarray(prices[start - state.lags:], dtype=np.float64)
+    design, targets = design_matrix(window, state.lags)
+    coef, cov, errors = rls_updates(state.coef, state.cov, design, targets, state.forgetting)
+    return state._replace(coef=coef, cov=cov, last_timestamp=int(timestamps[-1]),
+                          observations=state.observations + len(targets),
+                          error_sum=state.error_sum + float(errors.sum()),
+                          error_count=state.error_count + len(errors))
+
+
+def refresh_state(state, timestamps, prices, lags=LAGS, forgetting=1.0):
+    """Bring a coin's state up to date; returns (state, "fit" | "update" | "unchanged")"""
+    if state is not None and state.lags == lags and state.forgetting == forgetting:
+        updated = update_state(state, timestamps, prices)
+        if updated is not None:
+            return updated, "unchanged" if updated is state else "update"
+    # No state yet, different settings, or the history was rewritten (e.g. a --full fetch)
+    return fit_state(timestamps, prices, lags, forgetting), "fit"
+
+
+class ModelStateStore:
+    """Per-coin RLS state in a single SQLite file (arrays stored as little-endian float64 blobs)"""
+
+    def __init__(self, path="data/model_state.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS models (
+                coin TEXT PRIMARY KEY,
+                lags INTEGER NOT NULL,
+                forgetting REAL NOT NULL,
+                last_timestamp INTEGER NOT NULL,
+                observations INTEGER NOT NULL,
+                error_sum REAL NOT NULL,
+                error_count INTEGER NOT NULL,
+                coef BLOB NOT NULL,
+                cov BLOB NOT NULL
+            )""")
+        self.db.commit()
+
+    def get(self, coin):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT lags, forgetting, last_timestamp, observations, error_sum, error_count, coef, cov "
+                "FROM models WHERE coin = ?", (coin,)).fetchone()
+        if row is None:
+            return None
+        lags, forgetting, last_timestamp, observations, error_sum, error_count, coef, cov = row
+        return ModelState(np.frombuffer(coef, dtype="<f8").copy(),
+                          np.frombuffer(cov, dtype="<f8").reshape(lags + 1, lags + 1).copy(),
+                          lags, forgetting, last_timestamp, observations, error_sum, error_count)
+
+    def put(self, coin, state):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (coin, state.lags, state.forgetting, state.last_timestamp, state.observations,
+                 state.error_sum, state.error_count,
+                 np.asarray(state.coef, dtype="<f8").tobytes(), np.asarray(state.cov, dtype="<f8").tobytes()))
+            self.db.commit()
+
+    def delete(self, coin):
+        with self.lock:
+            self.db.execute("DELETE FROM models WHERE coin = ?", (coin,))
+            self.db.commit()
+
+    def coins(self):
+        with self.lock:
+            return [coin for (coin,) in self.db.execute("SELECT coin FROM models ORDER BY coin")]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,44 +1,64 @@
 using CSV
 using DataFrames
 using Statistics
+using Dates
+
+include(joinpath(@__DIR__, "exchange.jl"))
+include(joinpath(@__DIR__, "features.jl"))
+include(joinpath(@__DIR__, "trace.jl"))
 
 # Get script directory and build absolute paths
 script_dir = @__DIR__
 project_dir = dirname(script_dir)
 data_dir = joinpath(project_dir, "data")
 
-# List of coins to process
-coins = ["BTC", "ETH", "SOL", "XRP"]
+# List of coins to process; CRYPTO_COINS="BTC,ETH" restricts a run (one job per coin in the worker pool)
+# Default: every coin in the registry (coins.csv, or CRYPTO_COINS_FILE)
+registry = get(ENV, "CRYPTO_COINS_FILE", joinpath(project_dir, "coins.csv"))
+coins = haskey(ENV, "CRYPTO_COINS") ? String.(split(ENV["CRYPTO_COINS"], ",")) : String.(CSV.File(registry).symbol)
 
 # Process each coin
 for coin in coins
     println("Processing $coin...")
+    coin_span = trace_start()
 
-    # Input and output file paths
-    input_file = joinpath(data_dir, "$(coin)_history.csv")
+    # Output file path
     output_file = joinpath(data_dir, "$(coin)_preprocessed.csv")
 
-    # Load historical data
-    df = CSV.read(input_file, DataFrame)
-
-    # Sort by date (oldest first)
-    sort!(df, :date)
-
-    # Create lagged features
-    df.lag1 = [missing; df.price[1:end-1]]
-    df.lag2 = [missing; missing; df.price[1:end-2]]
-    df.lag3 = [missing; missing; missing; df.price[1:end-3]]
+    # Load historical data: arrays handed over by Python, else the columnar
+    # price store (memory-mapped); both are already sorted by epoch-ms
+    # timestamp, so only the CSV fallback needs a sort
+    series = load_price_series(data_dir, coin)
+    if series !== nothing
+        timestamps, prices = series
+    else
+        history = load_history(data_dir, coin)
+        timestamps, prices = nothing, history.price
+    end
 
-    # Drop rows with missing values (first 3 rows)
-    df_clean = dropmissing(df)
+    # Lagged features as views over the price column (first `lags` rows have no full window)
+    lags = lag_count()
+    df_clean = lag_features(prices, lags)
+    n_rows = nrow(df_clean)
+    println("[OK] Preprocessed $n_rows rows of $coin data ($lags lags)")
 
-    # Save preprocessed data
-    CSV.write(output_file, df_clean)
+    # Hand the (rows x [price lag1..lagN]) matrix to the next stage in memory
+    if exchange_enabled()
+        exchange_write("$(coin)_features", Matrix{Float64}(df_clean))
+        if timestamps !== nothing
+            exchange_write("$(coin)_feature_timestamps", timestamps[lags+1:end])
+        end
+        println("[OK] Features of $coin passed through the exchange")
+    end
 
-    # Print confirmation
-    n_rows = nrow(df_clean)
-    println("[OK] Preprocessed $n_rows rows of $coin data")
-    println("[OK] Saved to $(coin)_preprocessed.csv")
+    # The preprocessed CSV is a debug artifact when running under the pipeline
+    if write_debug_csv()
+        dates = timestamps === nothing ? history.date[lags+1:end] :
+            Dates.format.(unix2datetime.(timestamps[lags+1:end] ./ 1000), "yyyy-mm-dd HH:MM:SS")
+        CSV.write(output_file, hcat(DataFrame(date=dates), df_clean; copycols=false))
+        println("[OK] Saved to $(coin)_preprocessed.csv")
+    end
+    trace_stop(coin_span, "preprocess.jl"; coin=coin, rows=n_rows)
     println()
 end
 
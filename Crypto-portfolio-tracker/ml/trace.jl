@@ -0,0 +1,40 @@
+# Span tracing in the format of tracing.py. When CRYPTO_TRACE_DIR is set, every
+# span is appended as a Chrome-trace event to {CRYPTO_TRACE_DIR}/julia-{pid}.jsonl;
+# otherwise trace_start returns nothing and trace_stop does nothing.
+
+trace_dir() = get(ENV, "CRYPTO_TRACE_DIR", "")
+trace_enabled() = !isempty(trace_dir())
+
+# Process CPU time; CLOCKS_PER_SEC is 10^6 on POSIX
+cpu_seconds() = ccall(:clock, Clong, ()) / 1_000_000
+
+json_value(v::AbstractString) = "\"" * replace(v, "\\" => "\\\\", "\"" => "\\\"") * "\""
+json_value(v::Real) = isfinite(v) ? string(v) : "null"
+json_value(v) = json_value(string(v))
+json_object(pairs) = "{" * join(("$(json_value(string(k))):$(json_value(v))" for (k, v) in pairs), ",") * "}"
+
+function trace_record(name, start, seconds, cpu; category="julia", args...)
+    mkpath(trace_dir())
+    path = joinpath(trace_dir(), "julia-$(getpid()).jsonl")
+    fresh = !isfile(path)
+    open(path, "a") do io
+        if fresh
+            println(io, "{\"ph\":\"M\",\"name\":\"process_name\",\"pid\":$(getpid()),\"tid\":0,",
+                    "\"args\":{\"name\":\"julia worker\"}}")
+        end
+        fields = [:peak_rss_mb => Sys.maxrss() / 2^20, :cpu_ms => cpu * 1000, args...]
+        println(io, "{\"ph\":\"X\",\"name\":$(json_value(name)),\"cat\":$(json_value(category)),",
+                "\"pid\":$(getpid()),\"tid\":$(Threads.threadid()),",
+                "\"ts\":$(round(Int, start * 1e6)),\"dur\":$(round(Int, seconds * 1e6)),",
+                "\"args\":$(json_object(fields))}")
+    end
+end
+
+# t = trace_start(); ...; trace_stop(t, "fit"; coin="BTC") records the block in between
+trace_start() = trace_enabled() ? (time(), time_ns(), cpu_seconds()) : nothing
+
+function trace_stop(t, name; category="julia", args...)
+    t === nothing && return
+    start, wall, cpu = t
+    trace_record(name, start, (time_ns() - wall) / 1e9, cpu_seconds() - cpu; category=category, args...)
+end
@@ -0,0 +1,222 @@
+"""
+Content-addressed DAG runner.
+
+Each stage declares the files it reads and writes. Before a stage runs, its
+key is computed from its command and the content hashes of its inputs; if
+the key matches the last successful run and the outputs are still as that
+run left them, the stage is skipped. Content hashes are cached by
+(mtime, size), so an unchanged tree is checked without reading any file.
+Stages whose dependencies are done run concurrently on a thread pool. With
+in_process=True, Python script stages run as module.main(args) inside this
+process (see pipeline/inprocess.py) instead of in a fresh interpreter.
+"""
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import tracing
+from pipeline import inprocess
+
+STATE_VERSION = 1
+
+Stage = namedtuple("Stage", [
+    "name",
+    "command",   # argv list, run without a shell
+    "inputs",    # paths or glob patterns, relative to the pipeline root
+    "outputs",   # paths the stage writes
+    "deps",      # names of the stages that must finish first
+    "max_age",   # seconds before a cached result goes stale regardless of inputs (None = never)
+])
+
+StageResult = namedtuple("StageResult", ["name", "status", "seconds", "output"])
+
+
+def stage(name, command, inputs=(), outputs=(), deps=(), max_age=None):
+    return Stage(name, list(command), tuple(inputs), tuple(outputs), tuple(deps), max_age)
+
+
+class Pipeline:
+    """Run a set of stages in dependency order, skipping the ones that are up to date"""
+
+    def __init__(self, stages, root=".", state_path="data/pipeline_state.json", max_workers=4, in_process=False):
+        self.root = os.path.abspath(root)
+        self.state_path = os.path.join(self.root, state_path)
+        self.max_workers = max_workers
+        self.in_process = in_process
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            for dep in s.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {s.name} depends on unknown stage {dep}")
+        self.lock = threading.Lock()
+        self.state = self._load_state()
+
+    # --- state -----------------------------------------------------------
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+        return {"version": STATE_VERSION, "files": {}, "stages": {}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with self.lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    # --- hashing ---------------------------------------------------------
+
+    def _expand(self, patterns):
+        paths = set()
+        for pattern in patterns:
+            full = os.path.join(self.root, pattern)
+            matches = glob.glob(full) if glob.has_magic(pattern) else [full]
+            paths.update(os.path.relpath(path, self.root) for path in matches)
+        return sorted(paths)
+
+    def file_hash(self, path):
+        """sha256 of a file, reusing the cached digest while its (mtime, size) is unchanged"""
+        try:
+            stat = os.stat(os.path.join(self.root, path))
+        except FileNotFoundError:
+            return None
+        signature = [stat.st_mtime_ns, stat.st_size]
+        with self.lock:
+            cached = self.state["files"].get(path)
+        if cached and cached[:2] == signature:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(os.path.join(self.root, path), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self.lock:
+            self.state["files"][path] = signature + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def stage_key(self, s):
+        digest = hashlib.sha256(json.dumps([s.name, s.command]).encode())
+        for path in self._expand(s.inputs):
+            digest.update(f"{path}\0{self.file_hash(path)}\n".encode())
+        return digest.hexdigest()
+
+    def _outputs_intact(self, s, record):
+        return all(self.file_hash(path) == record["outputs"].get(path) for path in s.outputs)
+
+    def up_to_date(self, s, key):
+        record = self.state["stages"].get(s.name)
+        if not record or record["key"] != key:
+            return False
+        if s.max_age is not None and time.time() - record["finished"] > s.max_age:
+            return False
+        return self._outputs_intact(s, record)
+
+    # --- selection -------------------------------------------------------
+
+    def resolve(self, names):
+        """Check that every name is a stage"""
+        unknown = [name for name in names if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stage: {', '.join(unknown)}")
+        return list(names)
+
+    # --- execution -------------------------------------------------------
+
+    def _run_stage(self, s, force):
+        with tracing.span(s.name, "stage") as span_args:
+            result = self._execute_stage(s, force)
+            if span_args is not None:
+                span_args["status"] = result.status
+        return result
+
+    def _execute_stage(self, s, force):
+        start = time.perf_counter()
+        with tracing.span("hash inputs", "stage", stage=s.name):
+            key = self.stage_key(s)
+        if not force and self.up_to_date(s, key):
+            return StageResult(s.name, "skipped", time.perf_counter() - start, "")
+        # Scripts resolve data/ against the working directory, which a thread cannot change on its own
+        in_root = os.path.realpath(os.getcwd()) == os.path.realpath(self.root)
+        script = inprocess.script_module(s.command) if self.in_process and in_root else None
+        if script:
+            returncode, output = inprocess.run_script(*script)
+        else:
+            try:
+                process = subprocess.run(s.command, cwd=self.root, capture_output=True, text=True)
+            except OSError as e:
+                return StageResult(s.name, "failed", time.perf_counter() - start, f"{e}\n")
+            returncode = process.returncode
+            output = process.stdout + (f"STDERR: {process.stderr}" if process.stderr else "")
+        if returncode != 0:
+            return StageResult(s.name, "failed", time.perf_counter() - start, output)
+        missing = [path for path in s.outputs if not os.path.exists(os.path.join(self.root, path))]
+        if missing:
+            output += f"Stage finished without writing {', '.join(missing)}\n"
+            return StageResult(s.name, "failed", time.perf_counter() - start, output)
+        record = {"key": key, "finished": time.time(),
+                  "outputs": {path: self.file_hash(path) for path in s.outputs}}
+        with self.lock:
+            self.state["stages"][s.name] = record
+        return StageResult(s.name, "ran", time.perf_counter() - start, output)
+
+    def run(self, only=None, force=None, on_result=None):
+        """Run the selected stages (default: all); returns {name: StageResult}.
+
+        only: stage names to run; their dependencies are assumed done.
+        force: names to rerun even if up to date (an empty list forces everything).
+        """
+        selected = set(self.resolve(only)) if only else set(self.stages)
+        forced = set(self.stages) if force == [] else set(self.resolve(force or []))
+        results = {}
+        pending = {name: {dep for dep in self.stages[name].deps if dep in selected}
+                   for name in selected}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as pool:
+            while pending or running:
+                for name in [n for n, deps in pending.items() if not deps]:
+                    del pending[name]
+                    running[pool.submit(self._run_stage, self.stages[name], name in forced)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    results[name] = result
+                    if on_result:
+                        on_result(result)
+                    for other, deps in list(pending.items()):
+                        if name not in deps:
+                            continue
+                        if result.status == "failed":
+                            # Everything downstream of a failure is blocked
+                            self._block(other, pending, results, on_result)
+                        else:
+                            deps.discard(name)
+
+        self._save_state()
+        return results
+
+    def _block(self, name, pending, results, on_result):
+        if name not in pending:
+            return
+        del pending[name]
+        results[name] = StageResult(name, "blocked", 0.0, "")
+        if on_result:
+            on_result(results[name])
+        for other, deps in list(pending.items()):
+            if name in deps:
+                self._block(other, pending, results, on_result)
@@ -0,0 +1,96 @@
+"""
+In-process stage execution.
+
+A stage whose command is `python path/to/script.py args...` can run as
+`module.main(args)` inside the launcher instead of in a fresh interpreter.
+There is no interpreter startup, and modules shared between stages (numpy,
+the price store, tracing) are imported once. A stage's module is imported
+the first time that stage actually runs, so skipped stages import nothing;
+every such import is timed (IMPORT_TIMES, plus an "import" trace span).
+What the stage prints from its own thread is captured per thread, like
+subprocess output.
+"""
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+
+import tracing
+
+# module -> seconds its first import took, including any modules it was first to pull in
+IMPORT_TIMES = {}
+
+_import_lock = threading.Lock()
+_local = threading.local()
+
+
+class ThreadOutput:
+    """sys.stdout/sys.stderr stand-in: writes go to the current thread's capture buffer, if it has one"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        buffer = getattr(_local, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        if getattr(_local, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _install():
+    if not isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = ThreadOutput(sys.stdout)
+    if not isinstance(sys.stderr, ThreadOutput):
+        sys.stderr = ThreadOutput(sys.stderr)
+
+
+def script_module(command):
+    """[python, "scripts/x.py", *args] -> ("scripts.x", args); None if not a Python script in the project"""
+    if len(command) < 2 or command[0] != sys.executable or not command[1].endswith(".py"):
+        return None
+    path = os.path.normpath(command[1])
+    if os.path.isabs(path) or path.startswith(".."):
+        return None
+    return path[:-3].replace(os.sep, "."), list(command[2:])
+
+
+def import_module(name):
+    """Import `name` once, timing the first import"""
+    with _import_lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        start_wall = time.time()
+        rss_start = tracing.peak_rss_mb() if tracing.enabled() else None
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start
+        tracing.record(f"import {name}", start_wall, IMPORT_TIMES[name], category="import", rss_start_mb=rss_start)
+        return module
+
+
+def run_script(module, argv):
+    """Call module.main(argv) with this thread's output captured; returns (returncode, output)"""
+    _install()
+    buffer = io.StringIO()
+    _local.buffer = buffer
+    try:
+        import_module(module).main(argv)
+        returncode = 0
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            buffer.write(e.code + "\n")
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        buffer.write(traceback.format_exc())
+        returncode = 1
+    finally:
+        _local.buffer = None
+    return returncode, buffer.getvalue()
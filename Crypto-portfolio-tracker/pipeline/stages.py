@@ -0,0 +1,65 @@
+"""The application's pipeline: which script runs, what it reads and what it writes"""
+import sys
+
+from coin_registry import registry_path, symbols
+from pipeline.dag import stage
+
+# Prices are re-synced once the cached market_chart responses expire (see api/config.py)
+PRICE_MAX_AGE = 3600
+# Spot prices are re-fetched once they are five minutes old
+SPOT_MAX_AGE = 300
+
+FETCH_CODE = ["api/fetch_prices.py", "api/fetch_engine.py", "api/response_cache.py",
+              "api/price_store.py", "api/config.py"]
+SPOT_CODE = ["api/spot_prices.py"] + FETCH_CODE
+FORECAST_CODE = ["scripts/run_julia_ml.py", "JuliaExecutor.py", "ml/*.jl", "ml/*.py"]
+
+
+def build_stages(python=sys.executable, backend="julia", wallet_count=5):
+    # Every stage is sized by the coin registry, so editing it reruns them all
+    coins = symbols()
+    registry = [registry_path(), "coin_registry.py"]
+
+    wallets = stage(
+        "wallets",
+        [python, "scripts/generate_mock_wallets.py", "--count", str(wallet_count)],
+        inputs=["scripts/generate_mock_wallets.py"] + registry,
+        outputs=["data/wallet_balances.json"])
+
+    # Every coin's history in one run, alongside wallet generation. The coins share
+    # one FetchEngine, so RATE_LIMIT_PER_MINUTE holds across them and a single
+    # process writes the response cache.
+    fetch = stage(
+        "fetch",
+        [python, "api/fetch_prices.py"],
+        inputs=FETCH_CODE + registry,
+        outputs=[path for coin in coins
+                 for path in (f"data/{coin}_history.csv", f"data/prices/{coin}.ts", f"data/prices/{coin}.px")],
+        max_age=PRICE_MAX_AGE)
+
+    # Latest price of every coin in a few batched requests. It goes after the
+    # history fetch so the two never run their rate limiters side by side.
+    spot = stage(
+        "spot",
+        [python, "api/spot_prices.py"],
+        inputs=SPOT_CODE + registry,
+        outputs=["data/spot_prices.csv"],
+        deps=["fetch"],
+        max_age=SPOT_MAX_AGE)
+
+    forecast = stage(
+        "forecast",
+        [python, "scripts/run_julia_ml.py", "--skip-portfolio", "--backend", backend],
+        inputs=FORECAST_CODE + registry + [f"data/prices/{coin}.{ext}" for coin in coins for ext in ("ts", "px")],
+        outputs=[f"data/{coin}_forecast.csv" for coin in coins],
+        deps=["fetch"])
+
+    portfolio = stage(
+        "portfolio",
+        [python, "scripts/calculate_portfolio_forecast.py"],
+        inputs=["scripts/calculate_portfolio_forecast.py", "portfolio/*.py", "data/wallet_balances.json"]
+               + registry + [f"data/{coin}_forecast.csv" for coin in coins],
+        outputs=["data/portfolio_forecast.csv"],
+        deps=["wallets", "forecast"])
+
+    return [wallets, fetch, spot, forecast, portfolio]
@@ -0,0 +1,78 @@
+import csv
+import os
+from itertools import islice
+
+import numpy as np
+
+from coin_registry import symbols
+
+COINS = symbols()
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def holdings_matrix(wallet_items, coins=COINS):
+    """Build a (wallets x coins) float64 matrix from (address, holdings) pairs.
+
+    Holdings dicts use lower-case coin keys ("btc", ...); missing coins count as 0.
+    """
+    addresses = []
+    rows = []
+    keys = [coin.lower() for coin in coins]
+    for address, holdings in wallet_items:
+        addresses.append(address)
+        rows.append([holdings.get(key, 0.0) for key in keys])
+    matrix = np.array(rows, dtype=np.float64).reshape(len(rows), len(coins))
+    return addresses, matrix
+
+
+def load_forecast_matrix(data_dir="data", coins=COINS):
+    """Read every {coin}_forecast.csv into a (coins x days) matrix; returns (days, matrix)"""
+    columns = []
+    days = None
+    for coin in coins:
+        with open(os.path.join(data_dir, f"{coin}_forecast.csv"), "r") as f:
+            rows = sorted((int(row["day"]), float(row["predicted_price"])) for row in csv.DictReader(f))
+        coin_days = [day for day, _ in rows]
+        if days is None:
+            days = coin_days
+        elif coin_days != days:
+            raise ValueError(f"{coin}_forecast.csv covers days {coin_days}, expected {days}")
+        columns.append([price for _, price in rows])
+    return np.array(days, dtype=np.int64), np.array(columns, dtype=np.float64).reshape(len(coins), -1)
+
+
+def value_portfolios(holdings, prices):
+    """(wallets x coins) @ (coins x days) -> (wallets x days) portfolio values"""
+    return holdings @ prices
+
+
+def iter_wallet_chunks(wallet_items, coins=COINS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (addresses, holdings matrix) chunks so huge wallet sets never sit in memory at once"""
+    items = iter(wallet_items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield holdings_matrix(chunk, coins)
+
+
+def format_value_rows(addresses, values):
+    """CSV text (no header) with one row per wallet: address followed by each day's value"""
+    row_format = ",".join(["%.6f"] * values.shape[1])
+    return "".join(f"{address},{row_format % tuple(row)}\n"
+                   for address, row in zip(addresses, values.tolist()))
+
+
+def write_portfolio_forecast(output_file, wallet_items, prices, days, coins=COINS,
+                             chunk_size=DEFAULT_CHUNK_SIZE):
+    """Value every wallet for every forecast day and write wallet,day_1..day_N rows.
+
+    Returns the number of wallets written.
+    """
+    count = 0
+    with open(output_file, "w", newline="") as f:
+        f.write(",".join(["wallet"] + [f"day_{day}" for day in days]) + "\n")
+        for addresses, holdings in iter_wallet_chunks(wallet_items, coins, chunk_size):
+            f.write(format_value_rows(addresses, value_portfolios(holdings, prices)))
+            count += len(addresses)
+    return count
@@ -0,0 +1,292 @@
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+from itertools import islice
+
+from coin_registry import symbols
+
+COINS = symbols()
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def iter_json_wallets(path, chunk_size=1 << 20):
+    """Stream (address, holdings) pairs out of a {address: holdings} JSON file.
+
+    Members are decoded one at a time from a rolling buffer, so the whole
+    document is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return not eof
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A number at the very end of the buffer may still be incomplete
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        skip(" \t\r\n")
+        if pos >= len(buffer) or buffer[pos] != "{":
+            raise ValueError(f"{path} is not a JSON object")
+        pos += 1
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buffer):
+                raise ValueError(f"Unexpected end of {path}")
+            if buffer[pos] == "}":
+                return
+            address = decode()
+            skip(" \t\r\n:")
+            yield address, decode()
+
+
+def iter_ndjson_wallets(paths):
+    """Stream (address, holdings) pairs out of NDJSON shards written by generate_mock_wallets"""
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.pop("address"), record
+
+
+def quote_identifier(name):
+    """SQL identifier for a column: registry symbols may start with a digit ("1inch") or be keywords ("all")"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class WalletStore:
+    """Wallet holdings in an SQLite table keyed by address.
+
+    The table is a WITHOUT ROWID B-tree on the address, so lookups are
+    O(log n) and keyset pagination never scans skipped rows. Holdings are one
+    REAL column per coin (lower-case symbol).
+    """
+
+    def __init__(self, path="data/wallets.sqlite", coins=COINS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS wallets (address TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(wallets)")}
+        for coin in coins:
+            if coin.lower() not in existing:
+                self.db.execute(f"ALTER TABLE wallets ADD COLUMN {quote_identifier(coin.lower())} "
+                                "REAL NOT NULL DEFAULT 0")
+        self.db.commit()
+        self.coins = [row[1] for row in self.db.execute("PRAGMA table_info(wallets)")][1:]
+        self._columns = ", ".join(quote_identifier(column) for column in ["address"] + self.coins)
+
+    def _to_holdings(self, row):
+        return dict(zip(self.coins, row[1:]))
+
+    def get(self, address, default=None):
+        with self.lock:
+            row = self.db.execute(f"SELECT {self._columns} FROM wallets WHERE address = ?",
+                                  (address,)).fetchone()
+        return self._to_holdings(row) if row else default
+
+    def __getitem__(self, address):
+        holdings = self.get(address)
+        if holdings is None:
+            raise KeyError(address)
+        return holdings
+
+    def __contains__(self, address):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM wallets WHERE address = ?",
+                                   (address,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM wallets").fetchone()[0]
+
+    def __bool__(self):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM wallets LIMIT 1").fetchone() is not None
+
+    def page(self, after=None, limit=1000):
+        """Up to `limit` (address, holdings) pairs with address > after, in address order"""
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT {self._columns} FROM wallets WHERE address > ? ORDER BY address LIMIT ?",
+                (after or "", limit)).fetchall()
+        return [(row[0], self._to_holdings(row)) for row in rows]
+
+    def addresses(self, after=None, limit=1000):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT address FROM wallets WHERE address > ? ORDER BY address LIMIT ?",
+                (after or "", limit)).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, prefix, after=None, limit=50):
+        """Addresses starting with prefix (case-insensitive), in order, after the `after` cursor.
+
+        Runs as a range scan on the address B-tree: O(log n + limit) per call.
+        """
+        prefix = prefix.strip().lower()
+        # "0" and "0x" are already the start of every address; only bare hex gets the 0x
+        if not "0x".startswith(prefix) and not prefix.startswith("0x"):
+            prefix = "0x" + prefix
+        if after is not None and after >= prefix:
+            sql, params = "address > ?", [after]
+        else:
+            sql, params = "address >= ?", [prefix]
+        if prefix:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            sql += " AND address < ?"
+            params.append(upper)
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT address FROM wallets WHERE {sql} ORDER BY address LIMIT ?",
+                (*params, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    def items(self, batch_size=DEFAULT_BATCH_SIZE):
+        """Iterate every (address, holdings) pair, one page in memory at a time"""
+        after = None
+        while True:
+            rows = self.page(after, batch_size)
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1][0]
+
+    def upsert_many(self, wallet_items, batch_size=DEFAULT_BATCH_SIZE, meta=None, columns=None):
+        """Insert or replace (address, holdings) pairs in batches; returns rows written.
+
+        With `columns`, only those coins are written: existing wallets keep their other
+        holdings, and new ones start at 0 for them. `meta` key/value pairs are committed
+        in the same transaction as the rows.
+        """
+        if columns is None:
+            coins = self.coins
+            placeholders = ", ".join("?" * (len(coins) + 1))
+            sql = f"INSERT OR REPLACE INTO wallets ({self._columns}) VALUES ({placeholders})"
+        else:
+            coins = [coin for coin in self.coins if coin in columns]
+            placeholders = ", ".join("?" * (len(coins) + 1))
+            names = [quote_identifier(column) for column in ["address"] + coins]
+            updates = ", ".join(f"{name} = excluded.{name}" for name in names[1:]) if coins else None
+            sql = (f"INSERT INTO wallets ({', '.join(names)}) VALUES ({placeholders}) "
+                   f"ON CONFLICT(address) DO {f'UPDATE SET {updates}' if updates else 'NOTHING'}")
+        items = iter(wallet_items)
+        count = 0
+        with self.lock:
+            while True:
+                batch = [(address, *(holdings.get(coin, 0.0) for coin in coins))
+                         for address, holdings in islice(items, batch_size)]
+                if not batch:
+                    break
+                self.db.executemany(sql, batch)
+                count += len(batch)
+            if meta:
+                self.db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", list(meta.items()))
+            self.db.commit()
+        return count
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def is_chain_indexed(self):
+        """True once chain/indexer.py has checkpointed a contract into this store"""
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM meta WHERE key LIKE 'chain:%' LIMIT 1").fetchone() is not None
+
+    def replace_all(self, wallet_items, source=None):
+        """Swap the whole wallet set for wallet_items; `source` is remembered for sync_from_json.
+
+        Meta entries describe the old set (e.g. chain indexer checkpoints), so they are dropped:
+        an explicit import hands the store back to the file, and the indexer rescans on top of it.
+        """
+        with self.lock:
+            self.db.execute("DELETE FROM wallets")
+            self.db.execute("DELETE FROM meta")
+        return self.upsert_many(wallet_items, meta={"source": source} if source is not None else None)
+
+    def sync_from_json(self, json_path):
+        """Re-import json_path if it changed since the last import; returns rows imported (0 if current).
+
+        The JSON file and the chain are exclusive sources: once the indexer maintains the store,
+        the file is no longer imported, so a regenerated file neither overwrites on-chain holdings
+        nor resets the indexer's checkpoint.
+        """
+        if not os.path.exists(json_path) or self.is_chain_indexed():
+            return 0
+        stat = os.stat(json_path)
+        signature = f"{os.path.abspath(json_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        if self.get_meta("source") == signature:
+            return 0
+        return self.replace_all(iter_json_wallets(json_path), source=signature)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def open_wallet_store(data_dir="data", coins=COINS):
+    """Open data/wallets.sqlite, re-importing data/wallet_balances.json first if it changed"""
+    store = WalletStore(os.path.join(data_dir, "wallets.sqlite"), coins)
+    store.sync_from_json(os.path.join(data_dir, "wallet_balances.json"))
+    return store
+
+
+def main(argv=None):
+    """Import wallet files into the wallet store"""
+    parser = argparse.ArgumentParser(description="Import wallets into data/wallets.sqlite")
+    parser.add_argument("source", help="wallet_balances.json, or a directory of NDJSON shards")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--append", action="store_true", help="upsert instead of replacing all wallets")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.source):
+        wallet_items = iter_ndjson_wallets(sorted(glob.glob(os.path.join(args.source, "*.ndjson"))))
+    else:
+        wallet_items = iter_json_wallets(args.source)
+    store = WalletStore(os.path.join(args.data_dir, "wallets.sqlite"))
+    try:
+        if args.append:
+            count = store.upsert_many(wallet_items)
+        else:
+            count = store.replace_all(wallet_items)
+        print(f"[OK] Imported {count} wallets into {store.path}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
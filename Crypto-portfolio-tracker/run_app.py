@@ -1,49 +1,131 @@
 """
 Crypto Portfolio Tracker - Main Application
 """
+import argparse
+import os
 import subprocess
 import sys
+import time
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent
+sys.path.insert(0, str(PROJECT_ROOT))
 
-def run_step(name, command):
-    """Run a pipeline step"""
-    print(f"\n{'='*60}")
-    print(f"{name}")
-    print('='*60)
-    
-    result = subprocess.run(command, shell=True)
-    if result.returncode != 0:
-        print(f"⚠ {name} failed but continuing...")
-    else:
-        print(f"✓ {name} completed")
-    
-    return result.returncode == 0
+import tracing
+from pipeline.dag import Pipeline
+from pipeline.inprocess import IMPORT_TIMES, import_module
+from pipeline.stages import build_stages
+
+STATUS_MARKS = {"ran": "✓", "skipped": "=", "failed": "⚠", "blocked": "⚠"}
+
+def print_result(result):
+    """Print a stage's outcome (and its output, if it ran)"""
+    if result.status in ("ran", "failed"):
+        print(f"\n{'='*60}")
+        print(result.name)
+        print('='*60)
+        if result.output:
+            print(result.output.rstrip())
+    detail = {"ran": "completed", "skipped": "up to date, skipped", "failed": "failed",
+              "blocked": "skipped: an upstream stage failed"}[result.status]
+    print(f"{STATUS_MARKS[result.status]} {result.name} {detail} ({result.seconds:.2f}s)")
+
+def start_trace(directory):
+    """Turn tracing on for this process and every stage it starts; old events in directory are dropped"""
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    for entry in os.listdir(directory):
+        if entry.endswith(".jsonl"):
+            os.unlink(os.path.join(directory, entry))
+    os.environ[tracing.ENV_VAR] = directory
+    return directory
+
+def finish_trace(directory, top=10):
+    """Merge every process's events and print the slowest spans"""
+    summary = tracing.merge(directory)
+    print(f"\nTrace: {os.path.join(directory, 'trace.json')} (open in chrome://tracing or ui.perfetto.dev)")
+    # In-process stages share one process peak; "+MB" is how far each span raised it
+    print(f"{'span':<32}{'count':>6}{'wall ms':>11}{'cpu ms':>11}{'+MB':>8}{'proc peak MB':>14}")
+    for row in summary[:top]:
+        print(f"{row['name'][:31]:<32}{row['count']:>6}{row['wall_ms']:>11.1f}{row['cpu_ms']:>11.1f}"
+              f"{row.get('rss_growth_mb', 0.0):>8.1f}{row['peak_rss_mb']:>14.1f}")
+
+def print_import_times():
+    """First-import time of every stage module (and what it was first to pull in), slowest first"""
+    print(f"\n{'import':<36}{'ms':>9}")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        print(f"{name:<36}{seconds * 1000:>9.1f}")
+
+def launch_gui(in_process):
+    if not in_process:
+        subprocess.run([sys.executable, "gui/main.py"], cwd=PROJECT_ROOT)
+        return
+    import_module("gui.main").main()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the tracker pipeline, then launch the GUI")
+    parser.add_argument("--only", nargs="+", metavar="STAGE",
+                        help="run only these stages (e.g. fetch, forecast)")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="rerun these stages even if up to date (no names: every stage)")
+    parser.add_argument("--backend", choices=["julia", "numpy", "online"], default="julia",
+                        help="forecasting backend (see scripts/run_julia_ml.py)")
+    parser.add_argument("--wallets", type=int, default=5, help="number of mock wallets to generate")
+    parser.add_argument("--workers", type=int, default=4, help="stages run concurrently")
+    parser.add_argument("--list", action="store_true", help="list the stages and exit")
+    parser.add_argument("--no-gui", action="store_true", help="do not launch the GUI afterwards")
+    parser.add_argument("--trace", nargs="?", const="data/trace", metavar="DIR",
+                        help="record wall/CPU time and peak memory of every stage and step into DIR "
+                             "(default data/trace): trace.json for a trace viewer plus summary.json. "
+                             "Up-to-date stages are still skipped; add --force to trace them")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="run every stage and the GUI in its own Python interpreter instead of in this one")
+    parser.add_argument("--import-times", action="store_true",
+                        help="print how long each stage module took to import")
+    args = parser.parse_args(argv)
+
+    in_process = not args.subprocess
+    pipeline = Pipeline(build_stages(sys.executable, args.backend, args.wallets),
+                        root=PROJECT_ROOT, max_workers=args.workers, in_process=in_process)
+    if args.list:
+        for stage in pipeline.stages.values():
+            deps = f" (after {', '.join(stage.deps)})" if stage.deps else ""
+            print(f"{stage.name}{deps}")
+        return
 
-def main():
     print("="*60)
     print("CRYPTO PORTFOLIO TRACKER")
     print("="*60)
-    
-    steps = [
-        ("1. Generate Mock Wallets", f"{sys.executable} scripts/generate_mock_wallets.py"),
-        ("2. Fetch Crypto Prices", f"{sys.executable} api/fetch_prices.py"),
-        ("3. Run Julia ML Pipeline", f"{sys.executable} scripts/run_julia_ml.py"),
-        ("4. Launch GUI", f"{sys.executable} gui/main.py"),
-    ]
-    
-    for name, command in steps:
-        success = run_step(name, command)
-        if not success and "GUI" not in name:
-            response = input("\nContinue anyway? (y/n): ")
-            if response.lower() != 'y':
-                print("Pipeline stopped.")
-                return
-    
+
+    if in_process:
+        # Stages run in this process and resolve data/ against its working directory
+        os.chdir(PROJECT_ROOT)
+    trace_dir = start_trace(PROJECT_ROOT / args.trace) if args.trace else None
+    start = time.perf_counter()
+    try:
+        with tracing.span("pipeline", "stage"):
+            results = pipeline.run(only=args.only, force=args.force, on_result=print_result)
+    except ValueError as e:
+        parser.error(str(e))
+    counts = {status: sum(r.status == status for r in results.values()) for status in STATUS_MARKS}
+
     print("\n" + "="*60)
-    print("✓ APPLICATION COMPLETE")
+    summary = ", ".join(f"{count} {status}" for status, count in counts.items() if count)
+    if counts["failed"] or counts["blocked"]:
+        print(f"⚠ PIPELINE FINISHED WITH ERRORS ({summary}) in {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"✓ PIPELINE COMPLETE ({summary}) in {time.perf_counter() - start:.2f}s")
     print("="*60)
 
+    if not args.no_gui:
+        print("\nLaunching GUI...")
+        launch_gui(in_process)
+    if args.import_times and IMPORT_TIMES:
+        print_import_times()
+    if trace_dir:
+        finish_trace(trace_dir)
+    if counts["failed"] or counts["blocked"]:
+        raise SystemExit(1)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
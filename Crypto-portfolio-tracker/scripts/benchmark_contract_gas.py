@@ -0,0 +1,124 @@
+from brownie import PortfolioTracker, accounts, network, web3
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from chain.holdings import CONTRACT_COINS, encode_holdings
+from chain.loader import default_gas_budget, load_holdings
+from scripts.generate_mock_wallets import iter_wallet_batches
+
+BATCH_SIZES = [1, 10, 50, 100, 200, 500]
+READ_SIZES = [100, 500, 1000]
+
+def synthetic_wallets(count, seed):
+    """[(address, {"btc": ..., ...})] from the mock wallet generator"""
+    wallets = []
+    for addresses, holdings in iter_wallet_batches(count, seed=seed, coins=CONTRACT_COINS):
+        wallets.extend((address, dict(zip(CONTRACT_COINS, row))) for address, row in zip(addresses, holdings.tolist()))
+    return wallets
+
+def row(call, mode, wallets, gas, seconds):
+    return {"call": call, "mode": mode, "wallets": wallets, "gas": gas,
+            "gas_per_wallet": gas / wallets if gas is not None else None,
+            "seconds": seconds, "wallets_per_second": wallets / seconds if seconds else None}
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def bench_single(tracker, rows):
+    """setHoldings: one transaction per wallet, each dev account writing its own holdings"""
+    senders = accounts[1:]
+    values = synthetic_wallets(2 * len(senders), seed=1)
+    for mode, batch in (("insert", values[:len(senders)]), ("update", values[len(senders):])):
+        gas, seconds = 0, 0.0
+        for account, (_, holdings) in zip(senders, batch):
+            tx, elapsed = timed(tracker.setHoldings, *encode_holdings(holdings), {'from': account})
+            gas += tx.gas_used
+            seconds += elapsed
+        rows.append(row("setHoldings", mode, len(senders), gas, seconds))
+
+def bench_batches(tracker, owner, wallets, block_gas, rows):
+    """setHoldingsBatch at growing batch sizes: fresh wallets, then new values for the same wallets"""
+    fresh, changed = wallets
+    cursor = 0
+    for size in BATCH_SIZES:
+        chunk = fresh[cursor:cursor + size]
+        addresses = [address for address, _ in chunk]
+        holdings = [encode_holdings(h) for _, h in chunk]
+        if tracker.setHoldingsBatch.estimate_gas(addresses, holdings, {'from': owner}) > block_gas:
+            print(f"  batch of {size} new wallets exceeds the block gas limit, stopping")
+            break
+        tx, seconds = timed(tracker.setHoldingsBatch, addresses, holdings, {'from': owner})
+        rows.append(row("setHoldingsBatch", "insert", size, tx.gas_used, seconds))
+
+        updates = [encode_holdings(h) for _, h in changed[cursor:cursor + size]]
+        tx, seconds = timed(tracker.setHoldingsBatch, addresses, updates, {'from': owner})
+        rows.append(row("setHoldingsBatch", "update", size, tx.gas_used, seconds))
+        cursor += size
+    return cursor
+
+def bench_reads(tracker, rows):
+    """getWallets pages and getHoldingsBatch: latency per call and the gas an eth_call would burn"""
+    total = tracker.walletCount()
+    for size in READ_SIZES:
+        if size > total:
+            break
+        page, seconds = timed(tracker.getWallets, 0, size)
+        rows.append(row("getWallets", "read", size, tracker.getWallets.estimate_gas(0, size), seconds))
+        _, seconds = timed(tracker.getHoldingsBatch, list(page))
+        rows.append(row("getHoldingsBatch", "read", size, tracker.getHoldingsBatch.estimate_gas(list(page)), seconds))
+
+def print_rows(rows):
+    print(f"\n{'call':<20}{'mode':<8}{'wallets':>8}{'gas':>12}{'gas/wallet':>12}{'ms':>10}{'wallets/s':>11}")
+    for r in rows:
+        gas = f"{r['gas']}" if r["gas"] is not None else "-"
+        per_wallet = f"{r['gas_per_wallet']:.0f}" if r["gas_per_wallet"] is not None else "-"
+        rate = f"{r['wallets_per_second']:.0f}" if r["wallets_per_second"] else "-"
+        print(f"{r['call']:<20}{r['mode']:<8}{r['wallets']:>8}{gas:>12}{per_wallet:>12}"
+              f"{r['seconds'] * 1000:>10.1f}{rate:>11}")
+
+def main(wallets=2000, output="data/benchmarks/contract_gas.json"):
+    """Deploy a fresh PortfolioTracker and measure gas and throughput of single, batched and bulk writes
+
+    brownie run scripts/benchmark_contract_gas.py main [wallets] [output]
+    """
+    try:
+        wallets = int(wallets)
+        owner = accounts[0]
+        tracker = PortfolioTracker.deploy({'from': owner})
+        block_gas = web3.eth.get_block("latest").gasLimit
+        print(f"Benchmarking on {network.show_active()} (block gas limit {block_gas}), {wallets} wallets")
+
+        fresh = synthetic_wallets(wallets, seed=2)
+        changed = synthetic_wallets(wallets, seed=3)
+        rows = []
+        bench_single(tracker, rows)
+        used = bench_batches(tracker, owner, (fresh, changed), block_gas, rows)
+
+        # The bulk loader on the rest: chunks sized by gas budget, one RPC round trip per chunk
+        rest = fresh[used:]
+        if rest:
+            result = load_holdings(tracker, owner, rest, default_gas_budget(block_gas), skip_unchanged=False)
+            rows.append(row("load_holdings", "insert", result.written, result.gas_used, result.seconds))
+            result = load_holdings(tracker, owner, rest, default_gas_budget(block_gas))
+            rows.append(row("load_holdings", "unchanged", result.skipped, result.gas_used, result.seconds))
+
+        bench_reads(tracker, rows)
+        print_rows(rows)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump({"network": network.show_active(), "block_gas_limit": block_gas, "rows": rows}, f, indent=1)
+        print(f"\n[OK] Results saved to {output}")
+
+    except Exception as e:
+        print(f"[ERROR] Contract benchmark failed: {str(e)}")
+        raise
@@ -1,37 +1,81 @@
-import json
-import csv
+import argparse
 import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import tracing
+from chain.rpc import DEFAULT_RPC_URL
+from portfolio.valuation import COINS, DEFAULT_CHUNK_SIZE, load_forecast_matrix, write_portfolio_forecast
+from portfolio.wallet_store import open_wallet_store
+
+class OnchainWallets:
+    """Holdings read from the contract at one block, in the WalletStore shape valuation uses"""
+
+    def __init__(self, holdings):
+        self.holdings = holdings
+
+    def items(self, batch_size=None):
+        return iter(self.holdings.items())
+
+    def close(self):
+        pass
+
+def read_onchain_wallets(data_dir, rpc_url):
+    """Every wallet the deployed contract tracks, read in batched JSON-RPC round trips"""
+    from chain.holdings import CONTRACT_COINS, read_contract_address, unsupported_coins
+    from chain.reader import DEFAULT_WORKERS, HoldingsReader
+    from chain.rpc import RpcClient
+
+    address = read_contract_address(data_dir)
+    if address is None:
+        print(f"[ERROR] No contract address in {data_dir}/contract_address.txt, run scripts/deploy.py first")
+        raise SystemExit(1)
+    dropped = unsupported_coins(COINS)
+    if dropped:
+        print(f"[WARN] The contract only carries {', '.join(CONTRACT_COINS)}; "
+              f"{', '.join(dropped)} count as 0 in the on-chain valuation")
+    with tracing.span("read holdings on-chain", "stage") as span_args:
+        with RpcClient(rpc_url, pool_size=DEFAULT_WORKERS) as rpc:
+            result = HoldingsReader(rpc, address).read_all()
+        if span_args is not None:
+            span_args.update(block=result.block, round_trips=result.round_trips)
+    print(f"[OK] Read {len(result.holdings)} wallets at block {result.block} "
+          f"in {result.round_trips} round trips ({result.seconds:.2f}s)")
+    return OnchainWallets(result.holdings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Value every wallet over the forecast horizon")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="wallets valued per matrix product")
+    parser.add_argument("--onchain", action="store_true",
+                        help="value the wallets tracked by the deployed contract instead of the wallet store")
+    parser.add_argument("--rpc-url", default=DEFAULT_RPC_URL, help="node JSON-RPC endpoint for --onchain")
+    args = parser.parse_args(argv)
 
-def main():
     data_dir = "data"
-    # Load wallet balances (use first wallet)
-    with open(os.path.join(data_dir, "wallet_balances.json"), 'r') as f:
-        first_wallet = list(json.load(f).values())[0]
-    holdings = {
-        "BTC": first_wallet.get("btc", 0.0),
-        "ETH": first_wallet.get("eth", 0.0),
-        "SOL": first_wallet.get("sol", 0.0),
-        "XRP": first_wallet.get("xrp", 0.0)
-    }
-    # Load forecast data for each coin
-    coins = ["BTC", "ETH", "SOL", "XRP"]
-    forecasts = {}
-    for coin in coins:
-        with open(os.path.join(data_dir, f"{coin}_forecast.csv"), 'r') as f:
-            forecasts[coin] = {int(row['day']): float(row['predicted_price'])
-                              for row in csv.DictReader(f)}
-    # Calculate portfolio value for each day (1-7)
-    portfolio_forecast = []
-    for day in range(1, 8):
-        total_value = sum(holdings[coin] * forecasts[coin][day] for coin in coins)
-        portfolio_forecast.append({"day": day, "total_value": total_value})
-    # Save to CSV
+    if args.onchain:
+        wallets = read_onchain_wallets(data_dir, args.rpc_url)
+    else:
+        # Open the wallet store (re-imported from wallet_balances.json only if that changed)
+        with tracing.span("open wallet store", "stage"):
+            wallets = open_wallet_store(data_dir, COINS)
+    # Load forecast data for each coin as a (coins x days) matrix
+    days, prices = load_forecast_matrix(data_dir, COINS)
+    # Value all wallets for every forecast day and save to CSV
     output_file = os.path.join(data_dir, "portfolio_forecast.csv")
-    with open(output_file, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=["day", "total_value"])
-        writer.writeheader()
-        writer.writerows(portfolio_forecast)
-    print("[OK] Portfolio forecast calculated for 7 days")
+    try:
+        with tracing.span("value wallets", "stage") as span_args:
+            count = write_portfolio_forecast(output_file, wallets.items(args.chunk_size), prices, days,
+                                             COINS, args.chunk_size)
+            if span_args is not None:
+                span_args["wallets"] = count
+    finally:
+        wallets.close()
+    print(f"[OK] Portfolio forecast calculated for {count} wallets over {len(days)} days")
 
 if __name__ == "__main__":
     main()
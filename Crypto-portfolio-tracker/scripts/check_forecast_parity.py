@@ -0,0 +1,65 @@
+"""
+Check a forecasting backend against the Julia reference forecasts.
+
+Fits every coin from the price store with the chosen backend and compares
+the 7-day predictions to data/{COIN}_forecast.csv as written by forecast.jl.
+Exits non-zero if any coin differs by more than --rtol.
+"""
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from coin_registry import symbols
+from ml.forecasting import BACKENDS, get_backend, load_series
+
+COINS = symbols()
+
+def read_reference(data_dir, coin):
+    with open(os.path.join(data_dir, f"{coin}_forecast.csv"), "r") as f:
+        rows = sorted((int(row["day"]), float(row["predicted_price"])) for row in csv.DictReader(f))
+    return np.array([price for _, price in rows])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a forecasting backend with data/*_forecast.csv")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="numpy")
+    parser.add_argument("--coins", nargs="+", default=COINS)
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    backend = get_backend(args.backend)
+    try:
+        forecasts = backend.forecast(load_series(args.data_dir, args.coins))
+    finally:
+        backend.close()
+
+    failed = 0
+    for coin in args.coins:
+        reference = read_reference(args.data_dir, coin)
+        predictions = forecasts[coin].predictions
+        if predictions.shape != reference.shape:
+            print(f"[ERROR] {coin}: {len(predictions)} forecast days, reference has {len(reference)}")
+            failed += 1
+            continue
+        error = float(np.max(np.abs(predictions - reference) / np.abs(reference)))
+        if error > args.rtol:
+            print(f"[ERROR] {coin}: max relative error {error:.3e} exceeds {args.rtol:.0e}")
+            failed += 1
+        else:
+            print(f"[OK] {coin}: max relative error {error:.3e} (MAE {forecasts[coin].mae:.6f})")
+
+    if failed:
+        print(f"\n[ERROR] {failed} of {len(args.coins)} coins differ from the reference forecasts")
+        raise SystemExit(1)
+    print(f"\n[OK] {args.backend} backend matches the reference forecasts")
+
+if __name__ == "__main__":
+    main()
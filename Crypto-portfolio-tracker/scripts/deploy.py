@@ -25,6 +25,10 @@ def main():
 
         print(f"[OK] Contract address saved to {data_dir}/contract_address.txt")
 
+        # Save the deployment block: the chain indexer starts reading logs there
+        with open(os.path.join(data_dir, "contract_block.txt"), "w") as f:
+            f.write(str(portfolio_tracker.tx.block_number))
+
     except Exception as e:
         print(f"[ERROR] Deployment failed: {str(e)}")
         raise
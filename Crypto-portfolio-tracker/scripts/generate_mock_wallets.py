@@ -1,36 +1,139 @@
-import random
-import json
+import argparse
 import os
+import sys
+from pathlib import Path
 
-def generate_wallet_address():
-    """Generate random wallet address (0x + 40 hex characters)"""
-    hex_chars = '0123456789abcdef'
-    return '0x' + ''.join(random.choice(hex_chars) for _ in range(40))
-
-def generate_random_holdings():
-    """Generate random crypto holdings within specified ranges"""
-    return {
-        "btc": round(random.uniform(0.1, 5.0), 4),
-        "eth": round(random.uniform(1.0, 50.0), 4),
-        "sol": round(random.uniform(10.0, 500.0), 4),
-        "xrp": round(random.uniform(1000.0, 50000.0), 4)
-    }
-
-def main():
-    """Generate mock wallets with random holdings and save to JSON"""
-    num_wallets = 5
-    wallets = {}
-    # Generate 5 mock wallets
-    for i in range(num_wallets):
-        wallets[generate_wallet_address()] = generate_random_holdings()
-    # Save to data/wallet_balances.json
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from coin_registry import holding_ranges, symbols
+
+HEX_CHARS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+# Holding ranges per coin (low, high) from the coin registry; other coins fall back to DEFAULT_RANGE
+HOLDING_RANGES = holding_ranges()
+DEFAULT_RANGE = (1.0, 100.0)
+DISTRIBUTIONS = ["uniform", "lognormal", "pareto"]
+
+def generate_addresses(rng, count):
+    """Generate `count` random wallet addresses (0x + 40 hex characters) in one shot"""
+    raw = rng.integers(0, 256, size=(count, 20), dtype=np.uint8)
+    # Split each byte into two nibbles and map them onto hex characters
+    nibbles = np.empty((count, 40), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+    chars = HEX_CHARS[nibbles].view("S40").ravel()
+    return ["0x" + address.decode() for address in chars]
+
+def generate_holdings(rng, count, coins, distribution="uniform", sigma=1.0, alpha=1.5):
+    """Generate a (count x coins) holdings matrix.
+
+    uniform:   within each coin's range (the original behaviour)
+    lognormal: heavy-tailed around the range's geometric mean, spread `sigma`
+    pareto:    power-law tail starting at the range's low end, shape `alpha`
+    """
+    columns = []
+    for coin in coins:
+        low, high = HOLDING_RANGES.get(coin, DEFAULT_RANGE)
+        if distribution == "uniform":
+            column = rng.uniform(low, high, size=count)
+        elif distribution == "lognormal":
+            column = rng.lognormal(np.log(np.sqrt(low * high)), sigma, size=count)
+        elif distribution == "pareto":
+            column = low * (1.0 + rng.pareto(alpha, size=count))
+        else:
+            raise ValueError(f"Unknown distribution: {distribution}")
+        columns.append(column)
+    return np.round(np.column_stack(columns), 4)
+
+def iter_wallet_batches(count, seed=None, coins=None, distribution="uniform", batch_size=100_000):
+    """Yield (addresses, holdings matrix) batches; one child RNG per batch keeps output reproducible.
+
+    coins defaults to every registry coin (lower-case keys).
+    """
+    coins = coins or [symbol.lower() for symbol in symbols()]
+    seeds = np.random.SeedSequence(seed).spawn((count + batch_size - 1) // batch_size)
+    for index, child in enumerate(seeds):
+        rng = np.random.default_rng(child)
+        size = min(batch_size, count - index * batch_size)
+        yield generate_addresses(rng, size), generate_holdings(rng, size, coins, distribution)
+
+def format_batch(addresses, holdings, coins, ndjson=False):
+    """Serialize a batch as NDJSON lines or as JSON object members"""
+    fields = ", ".join(f'"{coin}": %.4f' for coin in coins)
+    if ndjson:
+        row_format = '{"address": "%s", ' + fields + "}\n"
+    else:
+        row_format = '  "%s": {' + fields + "}"
+    return [row_format % (address, *row) for address, row in zip(addresses, holdings.tolist())]
+
+def write_json(path, batches, coins):
+    """Stream batches into one {address: holdings} JSON object"""
+    first = True
+    with open(path, "w") as f:
+        f.write("{\n")
+        for addresses, holdings in batches:
+            rows = format_batch(addresses, holdings, coins)
+            if rows:
+                f.write(("" if first else ",\n") + ",\n".join(rows))
+                first = False
+        f.write("\n}\n")
+
+def write_ndjson_shards(directory, batches, coins, shard_size):
+    """Stream batches into part-NNNNN.ndjson files of at most shard_size wallets each"""
+    os.makedirs(directory, exist_ok=True)
+    shard, in_shard, f = 0, 0, None
+    try:
+        for addresses, holdings in batches:
+            rows = format_batch(addresses, holdings, coins, ndjson=True)
+            while rows:
+                if f is None or in_shard == shard_size:
+                    if f:
+                        f.close()
+                        shard += 1
+                    f = open(os.path.join(directory, f"part-{shard:05d}.ndjson"), "w")
+                    in_shard = 0
+                take = rows[:shard_size - in_shard]
+                f.writelines(take)
+                in_shard += len(take)
+                rows = rows[len(take):]
+    finally:
+        if f:
+            f.close()
+    return shard + 1 if f else 0
+
+def main(argv=None):
+    """Generate mock wallets with random holdings and save them to disk"""
+    parser = argparse.ArgumentParser(description="Generate mock wallets")
+    parser.add_argument("--count", type=int, default=5, help="number of wallets")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible output")
+    parser.add_argument("--coins", default=",".join(symbols()),
+                        help="comma-separated coin symbols (default: every registry coin)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="wallets generated per vectorized batch")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="json: data/wallet_balances.json; ndjson: sharded files under --output")
+    parser.add_argument("--output", default=None, help="output file (json) or directory (ndjson)")
+    parser.add_argument("--shard-size", type=int, default=1_000_000, help="wallets per ndjson shard")
+    args = parser.parse_args(argv)
+
+    coins = [coin.strip().lower() for coin in args.coins.split(",") if coin.strip()]
+    batches = iter_wallet_batches(args.count, args.seed, coins, args.distribution, args.batch_size)
     data_dir = "data"
     os.makedirs(data_dir, exist_ok=True)
-    output_file = os.path.join(data_dir, "wallet_balances.json")
-    with open(output_file, "w") as f:
-        json.dump(wallets, f, indent=2)
-    print(f"[OK] Successfully created {num_wallets} mock wallets")
-    print(f"[OK] Wallet balances saved to {output_file}")
+    if args.format == "json":
+        output_file = args.output or os.path.join(data_dir, "wallet_balances.json")
+        write_json(output_file, batches, coins)
+        print(f"[OK] Successfully created {args.count} mock wallets")
+        print(f"[OK] Wallet balances saved to {output_file}")
+    else:
+        output_dir = args.output or os.path.join(data_dir, "wallets")
+        shards = write_ndjson_shards(output_dir, batches, coins, args.shard_size)
+        print(f"[OK] Successfully created {args.count} mock wallets")
+        print(f"[OK] Wallet balances saved to {shards} shard(s) in {output_dir}")
 
 if __name__ == "__main__":
     main()
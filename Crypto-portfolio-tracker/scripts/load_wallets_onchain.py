@@ -0,0 +1,48 @@
+from brownie import PortfolioTracker, accounts, web3
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from chain.holdings import read_contract_address
+from chain.loader import default_gas_budget, load_holdings
+from portfolio.wallet_store import open_wallet_store
+
+def parse_flag(value):
+    """brownie run passes arguments as strings, so "False" or "0" must not count as true"""
+    return str(value).strip().lower() not in ("0", "false", "no", "off", "")
+
+def main(gas_budget=None, data_dir="data", skip_unchanged=True):
+    """Upsert every wallet in the wallet store into the deployed contract, batched by gas budget
+
+    brownie run scripts/load_wallets_onchain.py main [gas_budget] [data_dir] [skip_unchanged]
+    """
+    try:
+        address = read_contract_address(data_dir)
+        if address is None:
+            raise RuntimeError(f"No contract address in {data_dir}/contract_address.txt, run scripts/deploy.py first")
+        tracker = PortfolioTracker.at(address)
+        owner = accounts[0]
+
+        gas_budget = int(gas_budget) if gas_budget else default_gas_budget(web3.eth.get_block("latest").gasLimit)
+        store = open_wallet_store(data_dir)
+        print(f"Loading {len(store)} wallets into {address} (gas budget {gas_budget} per transaction)...")
+
+        def progress(wallets, gas_used, seconds):
+            print(f"  batch of {wallets} wallets: {gas_used} gas ({gas_used / wallets:.0f} per wallet), {seconds:.2f}s")
+
+        try:
+            result = load_holdings(tracker, owner, store.items(), gas_budget,
+                                   skip_unchanged=parse_flag(skip_unchanged), on_batch=progress)
+        finally:
+            store.close()
+
+        rate = result.written / result.seconds if result.seconds else 0.0
+        print(f"[OK] Wrote {result.written} wallets in {result.transactions} transactions "
+              f"({result.gas_used} gas, {rate:.0f} wallets/s); {result.skipped} already up to date")
+
+    except Exception as e:
+        print(f"[ERROR] Loading wallets failed: {str(e)}")
+        raise
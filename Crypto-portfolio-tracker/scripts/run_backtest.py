@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from coin_registry import symbols
+from ml.backtest import backtest, write_error_table
+from ml.features import LAGS
+from ml.forecasting import HORIZON
+
+COINS = symbols()
+
+def print_table(coin, rows):
+    print(f"\n{coin}")
+    print(f"{'horizon':>7} {'origins':>8} {'MAE':>14} {'RMSE':>14} {'MAPE %':>8} {'bias':>14}")
+    for row in rows:
+        print(f"{row.horizon:>7} {row.origins:>8} {row.mae:>14.6f} {row.rmse:>14.6f} {row.mape:>8.3f} {row.bias:>14.6f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the forecast model")
+    parser.add_argument("--coins", nargs="+", default=COINS)
+    parser.add_argument("--lags", type=int, default=LAGS)
+    parser.add_argument("--horizon", type=int, default=HORIZON, help="forecast steps evaluated per origin")
+    parser.add_argument("--min-train", type=int, default=None,
+                        help="training rows before the first origin (default: half the history)")
+    parser.add_argument("--forgetting", type=float, default=1.0, help="RLS forgetting factor")
+    parser.add_argument("--step", type=int, default=1, help="evaluate every N-th origin")
+    parser.add_argument("--workers", type=int, default=None, help="parallel processes (default: one per coin, up to CPUs)")
+    parser.add_argument("--output", default=os.path.join("data", "backtest_errors.csv"))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = backtest("data", args.coins, args.workers, lags=args.lags, horizon=args.horizon,
+                       min_train=args.min_train, forgetting=args.forgetting, step=args.step)
+    elapsed = time.perf_counter() - start
+    for coin, rows in results.items():
+        print_table(coin, rows)
+    write_error_table(args.output, results)
+    print(f"\n[OK] Backtested {len(results)} coins in {elapsed:.2f}s; error table saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from bench.datasets import SCALES, history_rows, scale_key
+from bench.suite import CASES, DEFAULT_CASES, DEFAULT_TOLERANCE, compare, format_throughput, run_suite
+
+BENCH_DIR = PROJECT_ROOT / "data" / "benchmarks"
+
+def print_results(results):
+    print(f"\n{'case':<18}{'median ms':>12}{'min ms':>12}{'throughput':>24}{'peak MB':>10}{'growth MB':>11}")
+    for name, result in results["cases"].items():
+        print(f"{name:<18}{result['seconds'] * 1000:>12.1f}{result['min_seconds'] * 1000:>12.1f}"
+              f"{format_throughput(result):>24}{result['peak_rss_mb']:>10.0f}{result['rss_growth_mb']:>11.0f}")
+
+def print_comparison(rows, tolerance):
+    print(f"\nAgainst the baseline (tolerance {tolerance:.0%}):")
+    print(f"{'case':<18}{'baseline ms':>13}{'ms':>10}{'time':>8}{'memory':>8}  status")
+    for row in rows:
+        ratio = lambda value: f"{value:.2f}x" if value is not None else "-"
+        baseline = f"{row.baseline_seconds * 1000:.1f}" if row.baseline_seconds is not None else "-"
+        mark = {"regression": "[ERROR]", "improved": "[OK]", "ok": "[OK]", "new": "-"}[row.status]
+        print(f"{row.case:<18}{baseline:>13}{row.seconds * 1000:>10.1f}{ratio(row.time_ratio):>8}"
+              f"{ratio(row.memory_ratio):>8}  {mark} {row.status}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every stage on a synthetic dataset")
+    parser.add_argument("--scale", choices=list(SCALES), default="small",
+                        help="dataset preset; the options below override single axes")
+    parser.add_argument("--wallets", type=int, help="number of wallets")
+    parser.add_argument("--coins", type=int, help="number of coins (at least 4)")
+    parser.add_argument("--days", type=int, help="length of every price history in days")
+    parser.add_argument("--bar-minutes", type=int, help="price bar spacing: 1440 daily, 60 hourly, 1 minute bars")
+    parser.add_argument("--seed", type=int, help="dataset RNG seed")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=DEFAULT_CASES,
+                        help="cases to run (forecast_julia needs Julia and is off by default)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported")
+    parser.add_argument("--lags", type=int, default=3)
+    parser.add_argument("--fetch-workers", type=int, default=8, help="concurrent requests in the fetch case")
+    parser.add_argument("--fetch-max-points", type=int, default=100_000,
+                        help="newest points the stub server returns per coin")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="delay added to every stub response")
+    parser.add_argument("--dataset-dir", help="where the dataset lives (default data/benchmarks/datasets/<scale>)")
+    parser.add_argument("--output", help="results JSON (default data/benchmarks/<scale>.json)")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown or memory growth before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    overrides = {field: getattr(args, field) for field in ("wallets", "coins", "days", "bar_minutes", "seed")
+                 if getattr(args, field) is not None}
+    scale = SCALES[args.scale]._replace(**overrides)
+    key = scale_key(scale)
+    dataset_dir = args.dataset_dir or str(BENCH_DIR / "datasets" / key)
+    output = args.output or str(BENCH_DIR / f"{args.scale if not overrides else key}.json")
+
+    print(f"Benchmarking {scale.wallets} wallets, {scale.coins} coins x {history_rows(scale)} bars "
+          f"({scale.days} days of {scale.bar_minutes}-minute bars), {args.repeat} run(s) per case")
+    options = {"lags": args.lags, "fetch_workers": args.fetch_workers, "fetch_max_points": args.fetch_max_points,
+               "stub_latency": args.stub_latency_ms / 1000}
+    try:
+        results = run_suite(scale, dataset_dir, args.cases, args.repeat, options)
+    except Exception as e:
+        print(f"[ERROR] Benchmark failed: {e}")
+        raise SystemExit(1) from e
+    print_results(results)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"\n[OK] Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        try:
+            rows = compare(results, baseline, args.tolerance)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            raise SystemExit(1) from e
+        print_comparison(rows, args.tolerance)
+        if any(row.status == "regression" for row in rows):
+            print("[ERROR] Performance regression against the baseline")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,78 @@
 from pathlib import Path
+import argparse
+import os
 import subprocess
-import pandas as pd
+import sys
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
 ML_DIR = PROJECT_ROOT / "ml"
 DATA_DIR = PROJECT_ROOT / "data"
 SCRIPTS_DIR = PROJECT_ROOT / "scripts"
 
-# (label, script_path, expected_output_csv)
+import tracing
+from coin_registry import symbols
+
+# (label, script_path, output): Julia stages hand their per-coin result arrays
+# ({coin}_{output}) back through the exchange; the portfolio stage writes a CSV.
+# forecast.jl builds lag features itself, so Preprocessing only runs for --csv
 JULIA_STAGES = [
-    ("Preprocessing", ML_DIR / "preprocess.jl", DATA_DIR / "BTC_preprocessed.csv"),
-    ("Forecast", ML_DIR / "forecast.jl", DATA_DIR / "forecast_output.csv"),
+    ("Preprocessing", ML_DIR / "preprocess.jl", "features"),
+    ("Forecast", ML_DIR / "forecast.jl", "forecast"),
     ("Portfolio Forecast", SCRIPTS_DIR / "calculate_portfolio_forecast.py", DATA_DIR / "portfolio_forecast.csv"),
 ]
 
-def run_script(script_path):
-    """Run Julia or Python script based on file extension"""
-    if script_path.suffix == '.jl':
-        command = ['julia', str(script_path)]
-    elif script_path.suffix == '.py':
-        command = ['python', str(script_path)]
-    else:
-        raise ValueError(f"Unsupported script type: {script_path.suffix}")
+# Julia stages fan out one job per coin across the executor's workers
+COINS = symbols()
+JOB_TIMEOUT = 600
+
+def open_executor(mode):
+    """Return a warm Julia executor with run_all(), or None to fall back to cold subprocesses"""
+    with tracing.span("open executor", "stage", mode=mode):
+        return _open_executor(mode)
+
+def _open_executor(mode):
+    from JuliaExecutor import JuliaWorkerPool, connect_daemon
+
+    if mode == "daemon":
+        executor = connect_daemon()
+        if executor:
+            print("[OK] Using Julia daemon")
+            return executor
+        print("- Julia daemon unavailable; starting a worker pool for this run")
+    if mode in ("daemon", "pool"):
+        pool = JuliaWorkerPool()
+        if pool.is_running:
+            return pool
+        pool.shutdown()
+        print("- Julia workers failed to start; falling back to one subprocess per stage")
+    return None
+
+def run_julia_jobs(executor, script_path, env):
+    """Run a Julia stage on the executor, one job per coin"""
+    jobs = [(str(script_path), {**env, "CRYPTO_COINS": coin}) for coin in COINS]
+    results = executor.run_all(jobs, timeout=JOB_TIMEOUT)
+    ok = True
+    for coin, result in zip(COINS, results):
+        if result.get("output"):
+            print(result["output"])
+        if not result.get("success"):
+            print(f"Script execution failed for {script_path} ({coin}): {result.get('error')}")
+            ok = False
+    return ok
+
+def run_script(script_path, executor=None, env=None):
+    """Run a Julia script on the warm executor, or as a cold subprocess"""
+    env = env or {}
+    if executor is not None:
+        return run_julia_jobs(executor, script_path, env)
 
     try:
         result = subprocess.run(
-            command,
-            capture_output=True, text=True, check=True
+            ['julia', str(script_path)],
+            capture_output=True, text=True, check=True,
+            env={**os.environ, **env, "CRYPTO_COINS": ",".join(COINS)}
         )
         print(result.stdout)
         if result.stderr:
@@ -43,27 +89,80 @@ def ensure_required_paths():
         if not path.exists():
             raise FileNotFoundError(f"Required path is missing: {path}")
 
-def run_stage(label, script_path, output_csv):
+def preview(name, array):
+    import numpy as np
+
+    print(f"- {name}: {array.shape[0]} rows" + (f" x {array.shape[1]} columns" if array.ndim > 1 else ""))
+    with np.printoptions(precision=6, suppress=True):
+        print(np.asarray(array[:5]))
+
+def run_portfolio_stage(exchange, output_csv):
+    """Value every wallet against the forecast arrays, in process"""
+    import numpy as np
+    from portfolio.valuation import write_portfolio_forecast
+    from portfolio.wallet_store import open_wallet_store
+
+    prices = np.vstack([exchange.get(f"{coin}_forecast") for coin in COINS])
+    days = np.arange(1, prices.shape[1] + 1)
+    wallets = open_wallet_store(str(DATA_DIR), COINS)
+    try:
+        count = write_portfolio_forecast(str(output_csv), wallets.items(), prices, days, COINS)
+    finally:
+        wallets.close()
+    print(f"[OK] Portfolio forecast calculated for {count} wallets over {len(days)} days")
+    return count
+
+def run_stage(label, script_path, output, exchange, executor=None, env=None):
     if not script_path.exists():
         raise FileNotFoundError(f"Script not found: {script_path}")
 
     print(f"\n=== {label}: running {script_path.relative_to(PROJECT_ROOT)} ===")
-    success = run_script(script_path)
+    with tracing.span(label, "stage"):
+        _run_stage(label, script_path, output, exchange, executor, env)
+
+def _run_stage(label, script_path, output, exchange, executor, env):
+    if script_path.suffix == '.py':
+        if not run_portfolio_stage(exchange, output):
+            print("- No wallets found; check upstream data.")
+        print(f"[OK] {label} finished. Wrote {output.name}")
+        return
+    if script_path.suffix != '.jl':
+        raise ValueError(f"Unsupported script type: {script_path.suffix}")
+
+    success = run_script(script_path, executor, {**exchange.env, **(env or {})})
     if not success:
         raise RuntimeError(f"{label} failed.")
-    print(f"[OK] {label} finished. Reading {output_csv.name}...")
+    print(f"[OK] {label} finished. Reading {output} arrays...")
+
+    for coin in COINS:
+        name = f"{coin}_{output}"
+        if name not in exchange:
+            raise FileNotFoundError(f"{label} completed but returned no {name}.bin array")
+        preview(name, exchange.get(name))
 
-    if not output_csv.exists():
-        raise FileNotFoundError(f"{label} completed but no CSV was created at {output_csv}")
+def run_inprocess_forecast(exchange, name, lags, forgetting):
+    """Preprocessing + Forecast in process with a Python backend, no Julia needed"""
+    from ml.forecasting import NumpyBackend, OnlineBackend, load_series, write_forecast_csv
 
-    df = pd.read_csv(output_csv)
-    row_count = len(df)
-    print(f"- Loaded {row_count} rows from {output_csv.name}")
-    preview_rows = min(5, row_count)
-    if preview_rows:
-        print(df.head(preview_rows).to_string(index=False))
+    if name == "online":
+        # Folds only prices newer than data/model_state.sqlite into each model
+        backend = OnlineBackend(lags, forgetting, str(DATA_DIR / "model_state.sqlite"))
     else:
-        print("- CSV is empty; check upstream data.")
+        backend = NumpyBackend(lags=lags)
+    print(f"\n=== Forecast: {name} backend ===")
+    try:
+        with tracing.span("load series", "stage", coins=len(COINS)):
+            series = load_series(str(DATA_DIR), COINS)
+        with tracing.span("Forecast", "stage", backend=name):
+            forecasts = backend.forecast(series)
+    finally:
+        backend.close()
+    for coin, forecast in forecasts.items():
+        write_forecast_csv(str(DATA_DIR), coin, forecast.predictions)
+        exchange.put(f"{coin}_forecast", forecast.predictions)
+        mode = f" ({backend.modes[coin]})" if name == "online" else ""
+        print(f"[OK] {coin} model MAE: {forecast.mae}{mode}; 7-day forecast saved to {coin}_forecast.csv")
+        preview(f"{coin}_forecast", forecast.predictions)
 
 def explain_failure(error):
     print("\n[ERROR] ML pipeline failed.")
@@ -71,22 +170,60 @@ def explain_failure(error):
     missing_path = str(error)
     if ".jl" in missing_path or ".py" in missing_path:
         print("- Troubleshooting: confirm the script directory exists and the requested file is present.")
-    elif ".csv" in missing_path:
-        print("- Troubleshooting: the script may have crashed before writing its CSV. Re-run the script manually to inspect the error.")
+    elif ".csv" in missing_path or ".bin" in missing_path:
+        print("- Troubleshooting: the script may have crashed before writing its output. Re-run the script manually to inspect the error.")
     elif isinstance(error, RuntimeError):
         print("- Troubleshooting: inspect the stdout printed above for specific error messages. Ensure required interpreters (julia/python) are on PATH and all dependencies are installed.")
     else:
         print("- Troubleshooting: rerun after fixing the issue above or examine logs at data/*.csv for more context.")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Julia ML pipeline")
+    parser.add_argument("--executor", choices=["daemon", "pool", "subprocess"], default="daemon",
+                        help="daemon: reuse (or start) the warm Julia daemon; pool: warm workers for this "
+                             "run only; subprocess: a cold julia process per stage")
+    parser.add_argument("--csv", action="store_true",
+                        help="also run preprocessing and write the *_preprocessed.csv files (for debugging)")
+    parser.add_argument("--lags", type=int, default=3, help="number of lagged prices used as features")
+    parser.add_argument("--backend", choices=["julia", "numpy", "online"], default="julia",
+                        help="numpy fits every coin in process and skips Julia entirely; online updates "
+                             "persisted recursive-least-squares models with only the new prices")
+    parser.add_argument("--forgetting", type=float, default=1.0,
+                        help="forgetting factor for --backend online (1.0 = no forgetting)")
+    parser.add_argument("--skip-portfolio", action="store_true",
+                        help="stop after the forecasts (the pipeline runs the valuation as its own stage)")
+    args = parser.parse_args(argv)
+
+    from ml.exchange import ArrayExchange
+
+    executor = None
+    env = {"CRYPTO_LAGS": str(args.lags)}
+    if args.csv:
+        env["CRYPTO_DEBUG_CSV"] = "1"
+    if tracing.enabled():
+        # The daemon was started with its own environment; pass the trace directory per job
+        env[tracing.ENV_VAR] = os.environ[tracing.ENV_VAR]
     try:
         ensure_required_paths()
-        for label, script_path, output_path in JULIA_STAGES:
-            run_stage(label, script_path, output_path)
+        stages = JULIA_STAGES if args.csv else JULIA_STAGES[1:]
+        with ArrayExchange() as exchange:
+            if args.backend != "julia":
+                run_inprocess_forecast(exchange, args.backend, args.lags, args.forgetting)
+                stages = [stage for stage in JULIA_STAGES if stage[1].suffix == ".py"]
+            else:
+                executor = open_executor(args.executor)
+            if args.skip_portfolio:
+                stages = [stage for stage in stages if stage[1].suffix != ".py"]
+            for label, script_path, output in stages:
+                run_stage(label, script_path, output, exchange, executor, env)
         print("\n[OK] ML pipeline completed successfully.")
     except Exception as exc:
         explain_failure(exc)
         raise SystemExit(1) from exc
+    finally:
+        # A per-run pool is torn down; the daemon stays warm for the next run
+        if executor is not None:
+            executor.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,75 @@
+from chain.holdings import CONTRACT_COINS, to_units
+from chain.indexer import HOLDINGS_UPDATED_TOPIC, ChainIndexer, checkpoint_key, decode_log
+from chain.rpc import RpcError
+from portfolio.wallet_store import WalletStore
+
+CONTRACT = "0x" + "c" * 40
+
+
+def holdings_log(block, index, wallet, amounts):
+    return {
+        "blockNumber": hex(block),
+        "logIndex": hex(index),
+        "topics": [HOLDINGS_UPDATED_TOPIC, "0x" + "0" * 24 + wallet[2:]],
+        "data": "0x" + "".join(f"{to_units(amount):064x}" for amount in amounts),
+    }
+
+
+class FakeRpc:
+    """A node holding a fixed list of logs, refusing ranges wider than max_range blocks"""
+
+    def __init__(self, head, logs, max_range=None):
+        self.head = head
+        self.logs = logs
+        self.max_range = max_range
+        self.ranges = []
+
+    def block_number(self):
+        return self.head
+
+    def get_logs(self, address, from_block, to_block, topics):
+        if self.max_range and to_block - from_block + 1 > self.max_range:
+            raise RpcError("query returned more than 10000 results", -32005)
+        self.ranges.append((from_block, to_block))
+        return [log for log in self.logs if from_block <= int(log["blockNumber"], 16) <= to_block]
+
+
+def test_decode_log():
+    wallet = "0x" + "ab" * 20
+    assert decode_log(holdings_log(1, 0, wallet, [1.5, 2, 0, 30000])) == (
+        wallet, {"btc": 1.5, "eth": 2.0, "sol": 0.0, "xrp": 30000.0})
+
+
+def test_sync_keeps_coins_outside_the_contract(tmp_path):
+    wallet = "0x" + "1" * 40
+    store = WalletStore(str(tmp_path / "wallets.sqlite"), ["BTC", "ETH", "SOL", "XRP", "DOGE"])
+    store.upsert_many([(wallet, {"btc": 1.0, "doge": 1000.0})])
+    rpc = FakeRpc(10, [holdings_log(5, 0, wallet, [2, 3, 4, 5]),
+                       holdings_log(7, 0, "0x" + "2" * 40, [1, 0, 0, 0])])
+    try:
+        ChainIndexer(rpc, store, CONTRACT).sync()
+        assert store[wallet] == {"btc": 2.0, "eth": 3.0, "sol": 4.0, "xrp": 5.0, "doge": 1000.0}
+        assert store["0x" + "2" * 40]["doge"] == 0.0
+    finally:
+        store.close()
+
+
+def test_sync_resumes_from_checkpoint_with_smaller_pages(tmp_path):
+    wallet = "0x" + "1" * 40
+    logs = [holdings_log(block, 0, wallet, [block, 0, 0, 0]) for block in range(1, 101, 9)]
+    store = WalletStore(str(tmp_path / "wallets.sqlite"), [coin.upper() for coin in CONTRACT_COINS])
+    try:
+        rpc = FakeRpc(60, logs, max_range=16)
+        result = ChainIndexer(rpc, store, CONTRACT, start_block=1, page_blocks=64).sync()
+        assert (result.from_block, result.to_block) == (1, 60)
+        assert max(end - start + 1 for start, end in rpc.ranges) <= 16
+        assert store.get_meta(checkpoint_key(CONTRACT)) == "60"
+        assert store[wallet]["btc"] == 55.0
+
+        rpc.head = 100
+        rpc.ranges.clear()
+        ChainIndexer(rpc, store, CONTRACT, start_block=1, page_blocks=64).sync()
+        assert rpc.ranges[0][0] == 61
+        assert store[wallet]["btc"] == 100.0
+    finally:
+        store.close()
@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+import pytest
+
+from chain.holdings import CONTRACT_COINS, decode_holdings, encode_holdings
+from chain.loader import BASE_TX_GAS, GasBudgetChunker, load_holdings
+
+Receipt = namedtuple("Receipt", ["gas_used"])
+
+NEW_GAS = 100_000
+UPDATE_GAS = 20_000
+
+
+class FakeSetHoldingsBatch:
+    def __init__(self, contract):
+        self.contract = contract
+
+    def gas(self, addresses):
+        return BASE_TX_GAS + sum(UPDATE_GAS if a in self.contract.holdings else NEW_GAS for a in addresses)
+
+    def estimate_gas(self, addresses, rows, tx):
+        return self.gas(addresses)
+
+    def __call__(self, addresses, rows, tx):
+        gas_used = self.gas(addresses)
+        assert gas_used <= tx["gas_limit"], "transaction would run out of gas"
+        self.contract.holdings.update(zip(addresses, rows))
+        self.contract.transactions.append(len(addresses))
+        return Receipt(gas_used)
+
+
+class FakeContract:
+    """Just enough of PortfolioTracker's call shape for the loader"""
+
+    def __init__(self):
+        self.holdings = {}
+        self.transactions = []
+        self.setHoldingsBatch = FakeSetHoldingsBatch(self)
+
+    def getHoldingsBatch(self, addresses):
+        return [self.holdings.get(a, (0,) * len(CONTRACT_COINS)) for a in addresses]
+
+
+def wallets(count, scale=1.0):
+    return [(f"0x{index:040x}", {coin: scale * (index + 1) for coin in CONTRACT_COINS}) for index in range(count)]
+
+
+def test_chunks_fit_the_gas_budget():
+    contract = FakeContract()
+    budget = BASE_TX_GAS + 10 * NEW_GAS
+    result = load_holdings(contract, "owner", wallets(95), budget)
+
+    assert result.written == 95 and result.skipped == 0
+    assert sum(contract.transactions) == 95
+    assert max(contract.transactions) <= 10
+    assert decode_holdings(contract.holdings[f"0x{4:040x}"]) == wallets(5)[4][1]
+
+
+def test_rerun_skips_unchanged_wallets():
+    contract = FakeContract()
+    budget = BASE_TX_GAS + 10 * NEW_GAS
+    load_holdings(contract, "owner", wallets(30), budget)
+    contract.transactions.clear()
+
+    changed = wallets(30)[:25] + wallets(30, scale=2.0)[25:]
+    result = load_holdings(contract, "owner", changed, budget)
+    assert (result.written, result.skipped) == (5, 25)
+    assert contract.holdings[f"0x{29:040x}"] == encode_holdings(changed[29][1])
+
+
+def test_single_wallet_over_budget_is_an_error():
+    contract = FakeContract()
+    with pytest.raises(ValueError, match="more than the gas budget"):
+        load_holdings(contract, "owner", wallets(3), BASE_TX_GAS + NEW_GAS // 2)
+    assert contract.transactions == []
+
+
+def test_chunker_learns_the_highest_cost():
+    chunker = GasBudgetChunker(BASE_TX_GAS + 100 * 1_000, wallet_gas=50_000)
+    chunker.observe(10, BASE_TX_GAS + 10 * 1_000)
+    assert chunker.size == 100
+    chunker.observe(10, BASE_TX_GAS + 10 * 4_000)
+    chunker.observe(10, BASE_TX_GAS + 10 * 2_000)
+    assert chunker.size == 25
+
+
+def test_warns_about_coins_the_contract_cannot_carry():
+    with pytest.warns(UserWarning, match="holdings of doge are not loaded"):
+        load_holdings(FakeContract(), "owner", wallets(2), BASE_TX_GAS + 10 * NEW_GAS,
+                      coins=["BTC", "ETH", "SOL", "XRP", "DOGE"])
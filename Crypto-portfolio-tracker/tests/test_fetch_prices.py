@@ -0,0 +1,63 @@
+import csv
+
+import pytest
+
+from api import fetch_prices
+from api.fetch_prices import DAY_MS
+from api.price_store import PriceStore
+
+HOUR_MS = 60 * 60 * 1000
+DAY = 1_762_732_800_000  # 2025-11-10 00:00:00 UTC
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_prices, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def response(days_back, now_ms, now_price):
+    """A daily-interval market_chart response: one bar per UTC midnight, then the current price"""
+    bars = [[DAY - n * DAY_MS, 100.0 + n] for n in range(days_back, -1, -1)]
+    return bars + [[now_ms, now_price]]
+
+
+def sync(symbol, prices_data):
+    last = fetch_prices.read_last_timestamp(fetch_prices.history_path(symbol))
+    return fetch_prices.apply_sync(symbol, prices_data, last)
+
+
+def csv_rows(symbol):
+    with open(fetch_prices.history_path(symbol), newline="") as f:
+        return [(row["date"], float(row["price"])) for row in csv.DictReader(f)]
+
+
+def test_same_day_syncs_replace_the_current_price(data_dir):
+    sync("BTC", response(5, DAY + 10 * HOUR_MS, 1.0))
+    sync("BTC", response(2, DAY + 11 * HOUR_MS, 2.0))
+    sync("BTC", response(2, DAY + 12 * HOUR_MS, 3.0))
+
+    rows = csv_rows("BTC")
+    assert len(rows) == 7  # six daily bars and one current price
+    assert rows[-1][1] == 3.0
+    assert [price for _, price in rows[:-1]] == [105.0, 104.0, 103.0, 102.0, 101.0, 100.0]
+
+    timestamps, prices = PriceStore(str(data_dir)).arrays("BTC", mmap=False)
+    assert len(timestamps) == 7
+    assert all(fetch_prices.is_daily_bar(int(ts)) for ts in timestamps[:-1])
+    assert timestamps[-1] == DAY + 12 * HOUR_MS and prices[-1] == 3.0
+
+
+def test_next_day_sync_keeps_the_new_bar(data_dir):
+    sync("BTC", response(3, DAY + 10 * HOUR_MS, 1.0))
+    tomorrow = [[DAY, 100.0], [DAY + DAY_MS, 99.0], [DAY + DAY_MS + HOUR_MS, 2.0]]
+    assert sync("BTC", tomorrow) == 2
+
+    rows = csv_rows("BTC")
+    assert [price for _, price in rows] == [103.0, 102.0, 101.0, 100.0, 99.0, 2.0]
+
+
+def test_stale_response_keeps_the_stored_price(data_dir):
+    sync("BTC", response(2, DAY + 10 * HOUR_MS, 1.0))
+    assert sync("BTC", response(2, DAY + 9 * HOUR_MS, 5.0)) == 0
+    assert csv_rows("BTC")[-1][1] == 1.0
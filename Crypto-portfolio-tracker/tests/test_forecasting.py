@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+import pytest
+
+from api.price_store import PriceStore
+from ml import forecasting
+from ml.forecasting import NumpyBackend, OnlineBackend, get_backend, load_series
+from ml.online import design_matrix, fit_state, refresh_state, update_state, weighted_fit
+from scripts.check_forecast_parity import read_reference
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+REFERENCE_COINS = ["BTC", "ETH", "SOL", "XRP"]
+RTOL = 1e-9
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(n, dtype=np.int64) * 86_400_000
+    return timestamps, 100.0 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+@pytest.fixture
+def reference_series(tmp_path):
+    """The committed price histories, loaded the way the forecast stage reads them"""
+    store = PriceStore(str(tmp_path))
+    for coin in REFERENCE_COINS:
+        history = os.path.join(DATA_DIR, f"{coin}_history.csv")
+        if not os.path.exists(history) or not os.path.exists(os.path.join(DATA_DIR, f"{coin}_forecast.csv")):
+            pytest.skip(f"no reference data for {coin}")
+        store.import_csv(coin, history)
+    return load_series(str(tmp_path), REFERENCE_COINS)
+
+
+def test_numpy_backend_matches_reference_forecasts(reference_series):
+    forecasts = NumpyBackend().forecast(reference_series)
+    for coin in REFERENCE_COINS:
+        reference = read_reference(DATA_DIR, coin)
+        np.testing.assert_allclose(forecasts[coin].predictions, reference, rtol=RTOL)
+        assert np.isfinite(forecasts[coin].mae)
+
+
+def test_numpy_backend_batches_series_of_different_lengths():
+    series = {"A": random_walk(200, seed=1), "B": random_walk(57, seed=2)}
+    batched = NumpyBackend().forecast(series)
+    for coin in series:
+        alone = NumpyBackend().forecast({coin: series[coin]})[coin]
+        np.testing.assert_allclose(batched[coin].predictions, alone.predictions, rtol=1e-10)
+        assert batched[coin].mae == pytest.approx(alone.mae, rel=1e-10)
+
+
+@pytest.mark.parametrize("forgetting", [1.0, 0.98])
+def test_rls_updates_match_batch_refit(forgetting):
+    timestamps, prices = random_walk(300)
+    state = fit_state(timestamps[:240], prices[:240], forgetting=forgetting)
+    for end in (250, 251, 300):  # several updates, one of a single row
+        state = update_state(state, timestamps[:end], prices[:end])
+    coef, cov = weighted_fit(*design_matrix(prices, state.lags), forgetting)
+
+    assert state.last_timestamp == timestamps[-1]
+    assert state.observations == len(prices) - state.lags
+    np.testing.assert_allclose(state.coef, coef, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(state.cov, cov, rtol=1e-6, atol=1e-12)
+
+
+def test_online_backend_updates_persisted_state(tmp_path):
+    timestamps, prices = random_walk(300)
+    path = str(tmp_path / "model_state.sqlite")
+    backend = OnlineBackend(path=path)
+    backend.forecast({"A": (timestamps[:280], prices[:280])})
+    assert backend.modes["A"] == "fit"
+    backend.close()
+
+    backend = OnlineBackend(path=path)
+    updated = backend.forecast({"A": (timestamps, prices)})["A"]
+    assert backend.modes["A"] == "update"
+    backend.close()
+
+    refit = OnlineBackend(path=str(tmp_path / "fresh.sqlite"))
+    fresh = refit.forecast({"A": (timestamps, prices)})["A"]
+    refit.close()
+    np.testing.assert_allclose(updated.predictions, fresh.predictions, rtol=1e-8)
+
+
+def with_current_price(timestamps, prices, days, hour, price):
+    """The first `days` daily bars plus the off-grid current price a sync ends with"""
+    return (np.append(timestamps[:days], timestamps[days - 1] + hour * 3_600_000),
+            np.append(prices[:days], price))
+
+
+def test_replaced_current_price_still_updates():
+    timestamps, prices = random_walk(300)
+    state, mode = refresh_state(None, *with_current_price(timestamps, prices, 250, 10, 99.0))
+    assert mode == "fit"
+    assert state.last_timestamp == timestamps[249]
+
+    # Later the same day: only the current price moved
+    same_day, mode = refresh_state(state, *with_current_price(timestamps, prices, 250, 11, 98.0))
+    assert mode == "unchanged"
+
+    # Next day: a new daily bar, and the old current price is gone
+    state, mode = refresh_state(same_day, *with_current_price(timestamps, prices, 251, 10, 97.0))
+    assert mode == "update"
+    assert state.last_timestamp == timestamps[250]
+    refit = fit_state(timestamps[:251], prices[:251])
+    np.testing.assert_allclose(state.coef, refit.coef, rtol=1e-8)
+
+
+def test_get_backend_rejects_unknown_names():
+    with pytest.raises(ValueError, match="Unknown forecasting backend"):
+        get_backend("prophet")
+
+
+def test_get_backend_keeps_constructor_errors(monkeypatch):
+    class Broken(forecasting.ForecastBackend):
+        def __init__(self):
+            raise KeyError("missing setting")
+
+    monkeypatch.setitem(forecasting.BACKENDS, "broken", Broken)
+    with pytest.raises(KeyError, match="missing setting"):
+        get_backend("broken")
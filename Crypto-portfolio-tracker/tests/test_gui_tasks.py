@@ -0,0 +1,79 @@
+import time
+
+from gui.tasks import TaskRunner
+
+
+class FakeRoot:
+    """Collects root.after callbacks instead of running a Tk event loop"""
+
+    def __init__(self):
+        self.scheduled = []
+        self.errors = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        self.errors.append(exc)
+
+    def poll(self):
+        callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback()
+
+
+def wait_for_events(runner, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while runner.events.qsize() < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_failing_callback_does_not_stop_delivery():
+    root = FakeRoot()
+    runner = TaskRunner(root, max_workers=2)
+    delivered = []
+
+    def broken(result):
+        raise RuntimeError("widget gone")
+
+    try:
+        runner.submit("a", lambda token, progress: 1, broken)
+        runner.submit("b", lambda token, progress: 2, delivered.append)
+        wait_for_events(runner, 2)
+        root.poll()
+        assert delivered == [2]
+        assert [str(e) for e in root.errors] == ["widget gone"]
+        assert not runner.busy()
+
+        # Polling is still scheduled, so later results arrive too
+        assert len(root.scheduled) == 1
+        runner.submit("c", lambda token, progress: 3, delivered.append)
+        wait_for_events(runner, 1)
+        root.poll()
+        assert delivered == [2, 3]
+    finally:
+        runner.shutdown()
+
+
+def test_failing_progress_callback_is_reported():
+    root = FakeRoot()
+    runner = TaskRunner(root, max_workers=1)
+    delivered = []
+
+    def progress_fails(key, fraction, message):
+        raise ValueError("bad progress")
+
+    runner.on_progress = progress_fails
+    try:
+        def work(token, progress):
+            progress(0.5, "half")
+            return "done"
+
+        runner.submit("a", work, delivered.append)
+        wait_for_events(runner, 2)
+        root.poll()
+        # The progress error and the "Ready" update both fail, the result is still delivered
+        assert delivered == ["done"]
+        assert len(root.errors) == 2
+    finally:
+        runner.shutdown()
@@ -0,0 +1,58 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import tracing
+from ml.forecasting import OnlineBackend
+
+
+@pytest.fixture
+def trace_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(tracing.ENV_VAR, str(tmp_path))
+    monkeypatch.setattr(tracing, "_file", None)
+    yield tmp_path
+    if tracing._file is not None:
+        tracing._file.close()
+        tracing._file = None
+
+
+def events(directory):
+    with open(os.path.join(directory, f"{os.getpid()}.jsonl")) as f:
+        return [event for event in map(json.loads, f) if event.get("ph") == "X"]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="needs /proc for the RSS high-water mark")
+def test_span_records_its_own_memory_growth(trace_dir):
+    # Enough to push the process past any peak earlier tests left behind
+    size = (int(tracing.peak_rss_mb()) + 64) << 20
+    with tracing.span("allocate"):
+        block = bytearray(size)
+        block[::4096] = b"x" * len(block[::4096])
+    with tracing.span("idle"):
+        pass
+    del block
+
+    recorded = {event["name"]: event["args"] for event in events(trace_dir)}
+    assert recorded["allocate"]["rss_growth_mb"] >= 32
+    # The process peak stays high, but the later span did not raise it
+    assert recorded["idle"]["peak_rss_mb"] >= recorded["allocate"]["peak_rss_mb"]
+    assert recorded["idle"]["rss_growth_mb"] < 1
+
+    summary = {row["name"]: row for row in tracing.merge(str(trace_dir))}
+    assert summary["idle"]["rss_growth_mb"] < 1 <= summary["allocate"]["rss_growth_mb"]
+
+
+def test_online_backend_traces_the_refresh_mode(trace_dir, tmp_path):
+    timestamps = np.arange(60, dtype=np.int64) * 86_400_000
+    prices = 100.0 + np.sin(np.arange(60))
+    backend = OnlineBackend(path=str(tmp_path / "model_state.sqlite"))
+    try:
+        backend.forecast({"BTC": (timestamps[:50], prices[:50])})
+        backend.forecast({"BTC": (timestamps, prices)})
+    finally:
+        backend.close()
+
+    modes = [event["args"].get("mode") for event in events(trace_dir) if event["name"] == "refresh model"]
+    assert modes == ["fit", "update"]
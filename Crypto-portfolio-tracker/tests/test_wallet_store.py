@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from portfolio.wallet_store import WalletStore, open_wallet_store
+
+ADDRESSES = [f"0x{digit}{index:039x}" for digit in "0123456789abcdef" for index in range(2)] + ["0xab" + "1" * 38]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WalletStore(str(tmp_path / "wallets.sqlite"), ["BTC", "ETH"])
+    store.upsert_many((address, {"btc": 1.0}) for address in ADDRESSES)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", sorted(ADDRESSES)),
+    ("0", sorted(ADDRESSES)),
+    ("0x", sorted(ADDRESSES)),
+    ("0X", sorted(ADDRESSES)),
+    ("0xab", ["0xab" + "1" * 38]),
+    ("AB", ["0xab" + "1" * 38]),
+    ("0x0", sorted(a for a in ADDRESSES if a.startswith("0x0"))),
+    ("f", sorted(a for a in ADDRESSES if a.startswith("0xf"))),
+])
+def test_search_prefixes(store, query, expected):
+    assert store.search(query, limit=100) == expected
+
+
+def test_search_pages_after_cursor(store):
+    first = store.search("0", limit=5)
+    rest = store.search("0", after=first[-1], limit=100)
+    assert first + rest == sorted(ADDRESSES)
+
+
+def write_json(path, wallets):
+    with open(path, "w") as f:
+        json.dump(wallets, f)
+
+
+def test_json_import_leaves_a_chain_indexed_store_alone(tmp_path):
+    address = "0x" + "1" * 40
+    write_json(tmp_path / "wallet_balances.json", {address: {"btc": 1.0, "eth": 2.0}})
+    store = open_wallet_store(str(tmp_path), ["BTC", "ETH"])
+    assert store[address] == {"btc": 1.0, "eth": 2.0}
+
+    # The indexer applies an on-chain update and checkpoints it
+    store.upsert_many([(address, {"btc": 5.0, "eth": 6.0})], meta={"chain:0xabc": "120"})
+    store.close()
+
+    # The pipeline regenerates the JSON file
+    write_json(tmp_path / "wallet_balances.json", {address: {"btc": 9.0, "eth": 9.0}, "0x" + "2" * 40: {}})
+    store = open_wallet_store(str(tmp_path), ["BTC", "ETH"])
+    try:
+        assert store.get_meta("chain:0xabc") == "120"
+        assert store[address] == {"btc": 5.0, "eth": 6.0}
+        assert len(store) == 1
+    finally:
+        store.close()
+
+
+def test_json_import_follows_file_changes(tmp_path):
+    address = "0x" + "1" * 40
+    write_json(tmp_path / "wallet_balances.json", {address: {"btc": 1.0}})
+    store = open_wallet_store(str(tmp_path), ["BTC"])
+    write_json(tmp_path / "wallet_balances.json", {address: {"btc": 3.0, "eth": 0.5}})
+    try:
+        assert store.sync_from_json(str(tmp_path / "wallet_balances.json")) == 1
+        assert store[address] == {"btc": 3.0}
+    finally:
+        store.close()
+
+
+def test_symbols_that_are_not_plain_identifiers(tmp_path):
+    coins = ["BTC", "1INCH", "ALL", "SELECT", 'A"B']
+    address = "0x" + "1" * 40
+    store = WalletStore(str(tmp_path / "wallets.sqlite"), coins)
+    try:
+        store.upsert_many([(address, {"btc": 1.0, "1inch": 2.0, "all": 3.0, "select": 4.0, 'a"b': 5.0})])
+        store.upsert_many([(address, {"1inch": 6.0, "all": 7.0})], columns=["1inch", "all"])
+        assert store[address] == {"btc": 1.0, "1inch": 6.0, "all": 7.0, "select": 4.0, 'a"b': 5.0}
+        assert store.page() == [(address, store[address])]
+    finally:
+        store.close()
+
+    # Reopening finds the existing columns instead of adding them again
+    store = WalletStore(str(tmp_path / "wallets.sqlite"), coins)
+    try:
+        assert store.coins == ["btc", "1inch", "all", "select", 'a"b']
+    finally:
+        store.close()
@@ -0,0 +1,152 @@
+"""
+Lightweight span tracing shared by every process of the pipeline.
+
+Tracing is on when CRYPTO_TRACE_DIR is set (run_app.py --trace sets it for
+every stage). Each process then appends Chrome-trace "complete" events,
+one JSON object per line, to {CRYPTO_TRACE_DIR}/{pid}.jsonl. Each event
+records wall time, the CPU time of the thread that ran it, the
+process's peak RSS so far and, for span() blocks, how far the block raised
+that peak. Stages that run in process share one peak, so the growth is the
+per-stage memory figure. ml/trace.jl writes
+the same format from Julia. merge() folds all the files into a trace.json
+that chrome://tracing or Perfetto can open, plus a per-span summary.
+
+When tracing is off, span() returns a shared no-op context manager.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENV_VAR = "CRYPTO_TRACE_DIR"
+
+_NULL_SPAN = nullcontext()
+_lock = threading.Lock()
+_file = None
+
+
+def enabled():
+    return bool(os.environ.get(ENV_VAR))
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident set, in MB"""
+    # ru_maxrss survives exec, so a child would report its parent's peak; VmHWM does not
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _process_name():
+    return " ".join([os.path.basename(sys.argv[0]) or "python", *sys.argv[1:]])
+
+
+def _write(event):
+    global _file
+    with _lock:
+        if _file is None:
+            directory = os.environ[ENV_VAR]
+            os.makedirs(directory, exist_ok=True)
+            _file = open(os.path.join(directory, f"{os.getpid()}.jsonl"), "a", buffering=1)
+            _file.write(json.dumps({"ph": "M", "name": "process_name", "pid": os.getpid(), "tid": 0,
+                                    "args": {"name": _process_name()}}) + "\n")
+        _file.write(json.dumps(event) + "\n")
+
+
+def record(name, start, seconds, category="step", cpu_seconds=None, rss_start_mb=None, **args):
+    """Emit a span measured elsewhere (start: epoch seconds; rss_start_mb: peak RSS when it began)"""
+    if not enabled():
+        return
+    args["peak_rss_mb"] = peak_rss_mb()
+    if rss_start_mb is not None and args["peak_rss_mb"] is not None:
+        args["rss_growth_mb"] = args["peak_rss_mb"] - rss_start_mb
+    if cpu_seconds is not None:
+        args["cpu_ms"] = cpu_seconds * 1000
+    _write({"ph": "X", "name": name, "cat": category, "pid": os.getpid(),
+            "tid": threading.get_native_id(), "ts": int(start * 1e6), "dur": int(seconds * 1e6),
+            "args": args})
+
+
+@contextmanager
+def _span(name, category, args):
+    start = time.time()
+    rss_start = peak_rss_mb()
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield args
+    finally:
+        record(name, start, time.perf_counter() - wall, category, time.thread_time() - cpu, rss_start, **args)
+
+
+def span(name, category="step", **args):
+    """Time a block; extra keyword args (and keys added to the yielded dict) are attached to the event"""
+    if not enabled():
+        return _NULL_SPAN
+    return _span(name, category, args)
+
+
+def merge(directory, trace_path=None, summary_path=None):
+    """Combine every process's events into Chrome-trace JSON and a per-span summary.
+
+    Returns the summary: [{"name", "category", "count", "wall_ms", "cpu_ms", "peak_rss_mb", "rss_growth_mb"}],
+    slowest first. peak_rss_mb is the highest process peak seen during the span; rss_growth_mb
+    is the most the span itself raised it.
+    """
+    events = []
+    for entry in sorted(os.listdir(directory)):
+        if entry.endswith(".jsonl"):
+            with open(os.path.join(directory, entry), "r") as f:
+                events.extend(json.loads(line) for line in f if line.strip())
+
+    totals = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        total = totals.setdefault((event["name"], event.get("cat")), {
+            "name": event["name"], "category": event.get("cat"), "count": 0,
+            "wall_ms": 0.0, "cpu_ms": 0.0, "peak_rss_mb": 0.0, "rss_growth_mb": 0.0})
+        args = event.get("args", {})
+        total["count"] += 1
+        total["wall_ms"] += event["dur"] / 1000
+        total["cpu_ms"] += args.get("cpu_ms") or 0.0
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], args.get("peak_rss_mb") or 0.0)
+        total["rss_growth_mb"] = max(total["rss_growth_mb"], args.get("rss_growth_mb") or 0.0)
+    summary = sorted(totals.values(), key=lambda total: total["wall_ms"], reverse=True)
+
+    trace_path = trace_path or os.path.join(directory, "trace.json")
+    with open(trace_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    with open(summary_path or os.path.join(directory, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=1)
+    return summary
+
+
+_process_start = time.time()
+
+
+def _record_process():
+    """Whole-process span, written at exit: total CPU time and peak RSS of this process"""
+    if enabled():
+        record(_process_name().split(" ")[0], _process_start, time.time() - _process_start, "process",
+               time.process_time())
+
+
+atexit.register(_record_process)